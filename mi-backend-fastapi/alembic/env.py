@@ -1,10 +1,18 @@
 from logging.config import fileConfig
 
-from sqlalchemy import engine_from_config
-from sqlalchemy import pool
-
 from alembic import context
 
+from app.database.connection import Base, DATABASE_URL, engine, is_sqlite
+# Registrar todos los modelos en Base.metadata (autogenerate compara contra ellos)
+from app.models.vehicle import Vehicle  # noqa: F401
+from app.models.user import User  # noqa: F401
+from app.models.invoice import Invoice  # noqa: F401
+from app.models.invoice_sequence import InvoiceSequence  # noqa: F401
+from app.models.parking_session import ParkingSession  # noqa: F401
+from app.models.daily_rollup import DailyRollup  # noqa: F401
+from app.models.change_log import ChangeLog, ChangeVersion  # noqa: F401
+from app.models.occupancy_minute import OccupancyMinute  # noqa: F401
+
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -12,13 +20,12 @@ config = context.config
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
 
-# add your model's MetaData object here
-# for 'autogenerate' support
-# from myapp import mymodel
-# target_metadata = mymodel.Base.metadata
-target_metadata = None
+# La URL sale de DATABASE_URL (la misma que usa la app), no de alembic.ini
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
 
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
@@ -44,6 +51,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_as_batch=is_sqlite(url),
     )
 
     with context.begin_transaction():
@@ -57,15 +65,15 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
-    connectable = engine_from_config(
-        config.get_section(config.config_ini_section, {}),
-        prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
-    )
-
-    with connectable.connect() as connection:
+    # El motor de la app: mismos PRAGMAs de SQLite / opciones de pool de PostgreSQL
+    with engine.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite no soporta ALTER de columnas: se recrea la tabla (modo batch)
+            render_as_batch=connection.dialect.name == "sqlite",
+            # Cada migración en su propia transacción (los índices CONCURRENTLY salen de ella)
+            transaction_per_migration=True,
         )
 
         with context.begin_transaction():
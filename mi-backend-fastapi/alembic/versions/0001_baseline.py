@@ -0,0 +1,77 @@
+"""baseline: users, vehicles, invoices
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:30:00
+
+Esquema original (el que creaba create_all). Usa IF NOT EXISTS para que una base
+existente pase por aquí sin cambios y quede versionada.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("is_admin", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index("ix_users_id", "users", ["id"], if_not_exists=True)
+    op.create_index("ix_users_username", "users", ["username"], unique=True, if_not_exists=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True, if_not_exists=True)
+
+    op.create_table(
+        "vehicles",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("license_plate", sa.String(), nullable=False),
+        sa.Column("owner_name", sa.String(), nullable=True),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("vehicle_type", sa.String(), nullable=False),
+        sa.Column("is_inside", sa.Boolean(), nullable=True),
+        sa.Column("entry_time", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("exit_time", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("registration_value", sa.Float(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index("ix_vehicles_id", "vehicles", ["id"], if_not_exists=True)
+    op.create_index("ix_vehicles_license_plate", "vehicles", ["license_plate"], if_not_exists=True)
+
+    op.create_table(
+        "invoices",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("invoice_number", sa.String(), nullable=False),
+        sa.Column("date", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("vehicle_id", sa.Integer(), sa.ForeignKey("vehicles.id"), nullable=False),
+        sa.Column("total_amount", sa.Float(), nullable=False),
+        sa.Column("parking_time", sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_invoices_id", "invoices", ["id"], if_not_exists=True)
+    op.create_index("ix_invoices_invoice_number", "invoices", ["invoice_number"], unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("invoices")
+    op.drop_table("vehicles")
+    op.drop_table("users")
@@ -0,0 +1,277 @@
+"""visitas, consecutivos, acumulados, registro de cambios y ocupación por minuto
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:30:00
+
+Tablas agregadas después del esquema original, con los mismos IF NOT EXISTS que la
+base. Luego reconstruye parking_sessions, daily_rollups y occupancy_minutes desde los
+datos existentes (cada backfill solo corre si su tabla está vacía). Los backfills usan
+las tablas tal como quedan en esta revisión (sa.table), no los modelos de la app.
+"""
+import heapq
+from collections import defaultdict
+from datetime import timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.timezone import to_lot_time
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+vehicles = sa.table(
+    "vehicles",
+    sa.column("id", sa.Integer()),
+    sa.column("vehicle_type", sa.String()),
+    sa.column("is_inside", sa.Boolean()),
+    sa.column("entry_time", sa.DateTime(timezone=True)),
+    sa.column("exit_time", sa.DateTime(timezone=True)),
+    sa.column("created_at", sa.DateTime(timezone=True)),
+)
+invoices = sa.table(
+    "invoices",
+    sa.column("id", sa.Integer()),
+    sa.column("vehicle_id", sa.Integer()),
+    sa.column("date", sa.DateTime(timezone=True)),
+    sa.column("total_amount", sa.Float()),
+    sa.column("parking_time", sa.Integer()),
+)
+parking_sessions = sa.table(
+    "parking_sessions",
+    sa.column("id", sa.Integer()),
+    sa.column("vehicle_id", sa.Integer()),
+    sa.column("invoice_id", sa.Integer()),
+    sa.column("entry_time", sa.DateTime(timezone=True)),
+    sa.column("exit_time", sa.DateTime(timezone=True)),
+    sa.column("amount", sa.Float()),
+    sa.column("minutes", sa.Integer()),
+)
+daily_rollups = sa.table(
+    "daily_rollups",
+    sa.column("day", sa.Date()),
+    sa.column("vehicle_type", sa.String()),
+    sa.column("entries", sa.Integer()),
+    sa.column("exits", sa.Integer()),
+    sa.column("revenue", sa.Float()),
+    sa.column("total_minutes", sa.Integer()),
+)
+occupancy_minutes = sa.table(
+    "occupancy_minutes",
+    sa.column("minute", sa.DateTime()),
+    sa.column("occupancy", sa.Integer()),
+    sa.column("peak", sa.Integer()),
+)
+
+
+def _is_empty(bind, table) -> bool:
+    return not bind.scalar(sa.select(sa.func.count()).select_from(table))
+
+
+def _insert(bind, table, params: list[dict]) -> None:
+    for start in range(0, len(params), BATCH_SIZE):
+        bind.execute(sa.insert(table), params[start:start + BATCH_SIZE])
+
+
+# 🔁 parking_sessions desde las facturas (una por visita). La última factura de cada
+# vehículo usa sus horas actuales; las anteriores estiman la salida con parking_time.
+# Vehículos dentro sin factura reciben una sesión abierta sin factura.
+def backfill_parking_sessions(bind) -> None:
+    if not _is_empty(bind, parking_sessions):
+        return
+    latest_ids = dict(bind.execute(
+        sa.select(invoices.c.vehicle_id, sa.func.max(invoices.c.id)).group_by(invoices.c.vehicle_id)
+    ).all())
+
+    params = []
+    rows = bind.execute(
+        sa.select(
+            invoices.c.id, invoices.c.date, invoices.c.total_amount, invoices.c.parking_time,
+            vehicles.c.id.label("vehicle_id"), vehicles.c.is_inside, vehicles.c.entry_time,
+            vehicles.c.exit_time, vehicles.c.created_at,
+        )
+        .join(vehicles, vehicles.c.id == invoices.c.vehicle_id)
+        .order_by(invoices.c.id)
+    )
+    for row in rows:
+        if latest_ids.get(row.vehicle_id) == row.id:
+            entry_time = row.entry_time or row.date or row.created_at
+            exit_time = None if row.is_inside else (row.exit_time or entry_time)
+        else:
+            entry_time = row.date or row.created_at
+            exit_time = entry_time and entry_time + timedelta(minutes=row.parking_time or 0)
+        if entry_time is None:
+            continue  # sin ninguna fecha no hay visita que reconstruir
+        params.append({
+            "vehicle_id": row.vehicle_id,
+            "invoice_id": row.id,
+            "entry_time": entry_time,
+            "exit_time": exit_time,
+            "amount": row.total_amount or 0,
+            "minutes": row.parking_time or 0,
+        })
+        if len(params) >= BATCH_SIZE:
+            _insert(bind, parking_sessions, params)
+            params = []
+
+    inside = bind.execute(
+        sa.select(vehicles.c.id, vehicles.c.entry_time, vehicles.c.created_at)
+        .where(vehicles.c.is_inside == sa.true(), vehicles.c.id.not_in(latest_ids.keys()))
+    )
+    for row in inside:
+        params.append({
+            "vehicle_id": row.id,
+            "invoice_id": None,
+            "entry_time": row.entry_time or row.created_at,
+            "exit_time": None,
+            "amount": 0,
+            "minutes": 0,
+        })
+    _insert(bind, parking_sessions, params)
+
+
+# 📊 daily_rollups desde parking_sessions: entradas en el día de entrada; salidas,
+# ingresos y minutos en el día de salida.
+def backfill_daily_rollups(bind) -> None:
+    if not _is_empty(bind, daily_rollups):
+        return
+    totals = defaultdict(lambda: {"entries": 0, "exits": 0, "revenue": 0.0, "total_minutes": 0})
+    rows = bind.execute(
+        sa.select(
+            parking_sessions.c.entry_time, parking_sessions.c.exit_time, parking_sessions.c.amount,
+            parking_sessions.c.minutes, vehicles.c.vehicle_type,
+        ).join(vehicles, vehicles.c.id == parking_sessions.c.vehicle_id)
+    )
+    for entry_time, exit_time, amount, minutes, vehicle_type in rows:
+        vehicle_type = vehicle_type or "carro"
+        if entry_time:
+            totals[(entry_time.date(), vehicle_type)]["entries"] += 1
+        if exit_time:
+            row = totals[(exit_time.date(), vehicle_type)]
+            row["exits"] += 1
+            row["revenue"] += amount or 0
+            row["total_minutes"] += minutes or 0
+    _insert(bind, daily_rollups, [
+        {"day": day, "vehicle_type": vehicle_type, **counts} for (day, vehicle_type), counts in totals.items()
+    ])
+
+
+def _moments(bind, column, delta: int):
+    for (value,) in bind.execute(sa.select(column).where(column.is_not(None)).order_by(column)):
+        yield to_lot_time(value).replace(second=0, microsecond=0), delta
+
+
+# 📈 occupancy_minutes desde parking_sessions: entradas (+1) y salidas (-1) mezcladas en
+# orden; las salidas van antes que las entradas del mismo minuto.
+def backfill_occupancy_minutes(bind) -> None:
+    if not _is_empty(bind, occupancy_minutes):
+        return
+    moments = heapq.merge(
+        list(_moments(bind, parking_sessions.c.exit_time, -1)),
+        list(_moments(bind, parking_sessions.c.entry_time, 1)),
+    )
+    level, params = 0, []
+    for minute, delta in moments:
+        level += delta
+        if params and params[-1]["minute"] == minute:
+            params[-1]["occupancy"] = level
+            params[-1]["peak"] = max(params[-1]["peak"], level)
+            continue
+        params.append({"minute": minute, "occupancy": level, "peak": level})
+    _insert(bind, occupancy_minutes, params)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "invoice_sequences",
+        sa.Column("day", sa.String(8), primary_key=True),
+        sa.Column("last_value", sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "parking_sessions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("vehicle_id", sa.Integer(), sa.ForeignKey("vehicles.id"), nullable=False),
+        sa.Column("invoice_id", sa.Integer(), sa.ForeignKey("invoices.id"), nullable=True),
+        sa.Column("entry_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("exit_time", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("minutes", sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_parking_sessions_id", "parking_sessions", ["id"], if_not_exists=True)
+    op.create_index("ix_parking_sessions_entry_time", "parking_sessions", ["entry_time"], if_not_exists=True)
+    op.create_index(
+        "ix_parking_sessions_vehicle_entry", "parking_sessions", ["vehicle_id", "entry_time"], if_not_exists=True
+    )
+    op.create_index(
+        "ix_parking_sessions_open",
+        "parking_sessions",
+        ["vehicle_id"],
+        postgresql_where=sa.text("exit_time IS NULL"),
+        sqlite_where=sa.text("exit_time IS NULL"),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "daily_rollups",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("vehicle_type", sa.String(), primary_key=True),
+        sa.Column("entries", sa.Integer(), nullable=False),
+        sa.Column("exits", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+        sa.Column("total_minutes", sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "change_log",
+        sa.Column("version", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("entity", sa.String(20), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_change_log_entity", "change_log", ["entity", "entity_id", "version"], if_not_exists=True)
+    op.create_index("ix_change_log_entity_version", "change_log", ["entity", "version"], if_not_exists=True)
+
+    op.create_table(
+        "change_versions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("last_value", sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "occupancy_minutes",
+        sa.Column("minute", sa.DateTime(), primary_key=True),
+        sa.Column("occupancy", sa.Integer(), nullable=False),
+        sa.Column("peak", sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+
+    # Datos: en la misma conexión (y transacción) de la migración
+    bind = op.get_bind()
+    backfill_parking_sessions(bind)
+    backfill_daily_rollups(bind)
+    backfill_occupancy_minutes(bind)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("occupancy_minutes")
+    op.drop_table("change_versions")
+    op.drop_table("change_log")
+    op.drop_table("daily_rollups")
+    op.drop_table("parking_sessions")
+    op.drop_table("invoice_sequences")
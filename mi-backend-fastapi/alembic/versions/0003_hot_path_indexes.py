@@ -0,0 +1,62 @@
+"""índices de las consultas calientes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:30:00
+
+En PostgreSQL se construyen con CREATE INDEX CONCURRENTLY fuera de transacción
+(autocommit_block): no bloquean escrituras en tablas con datos. Si una construcción
+concurrente falla queda un índice INVALID que IF NOT EXISTS no repara: borrarlo con
+DROP INDEX CONCURRENTLY y volver a correr la migración.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# nombre, tabla, columnas, opciones
+INDEXES = [
+    ("ix_vehicles_inside", "vehicles", ["license_plate"],
+     {"postgresql_where": sa.text("is_inside"), "sqlite_where": sa.text("is_inside = 1")}),
+    ("ix_vehicles_entry_time", "vehicles", ["entry_time"], {}),
+    ("ix_invoices_vehicle_latest", "invoices", ["vehicle_id", sa.text("id DESC")], {}),
+    ("ix_invoices_date", "invoices", ["date"], {}),
+    ("ix_invoices_user_id", "invoices", ["user_id"], {}),
+    ("ix_parking_sessions_exit_time", "parking_sessions", ["exit_time"], {}),
+]
+
+# Reemplazado por ix_invoices_vehicle_latest (mismo prefijo)
+REPLACED = [("ix_invoices_vehicle_id", "invoices")]
+
+
+def _concurrently() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in INDEXES:
+            op.create_index(
+                name, table, columns, if_not_exists=True, postgresql_concurrently=_concurrently(), **options
+            )
+        for name, table in REPLACED:
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=_concurrently())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table in REPLACED:
+            op.create_index(
+                name, table, ["vehicle_id"], if_not_exists=True, postgresql_concurrently=_concurrently()
+            )
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=_concurrently())
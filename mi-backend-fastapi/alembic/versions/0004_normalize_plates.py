@@ -0,0 +1,87 @@
+"""placas normalizadas
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 16:00:00
+
+Las placas se guardan en mayúsculas y sin espacios (app.utils.normalize_plate) y los
+filtros comparan contra esa forma. Las filas escritas antes quedan en la misma forma.
+Vehículos que quedan con la misma placa se fusionan en el de menor id: sus visitas y
+facturas pasan a él y toma el estado (dentro, horas, tipo) del de entrada más reciente.
+"""
+from collections import defaultdict
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STATE_COLUMNS = ("vehicle_type", "is_inside", "entry_time", "exit_time", "registration_value", "status")
+
+vehicles = sa.table(
+    "vehicles",
+    sa.column("id", sa.Integer()),
+    sa.column("license_plate", sa.String()),
+    sa.column("owner_name", sa.String()),
+    sa.column("phone", sa.String()),
+    sa.column("vehicle_type", sa.String()),
+    sa.column("is_inside", sa.Boolean()),
+    sa.column("entry_time", sa.DateTime(timezone=True)),
+    sa.column("exit_time", sa.DateTime(timezone=True)),
+    sa.column("registration_value", sa.Float()),
+    sa.column("status", sa.String()),
+)
+invoices = sa.table("invoices", sa.column("vehicle_id", sa.Integer()))
+parking_sessions = sa.table("parking_sessions", sa.column("vehicle_id", sa.Integer()))
+
+
+# La regla de app.utils.normalize_plate al momento de esta revisión
+def normalize_plate(plate: str) -> str:
+    return plate.strip().upper()
+
+
+def _latest(rows):
+    return max(rows, key=lambda row: (row.entry_time is not None, row.entry_time or 0, row.id))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    by_plate = defaultdict(list)
+    for row in bind.execute(sa.select(vehicles).order_by(vehicles.c.id)):
+        by_plate[normalize_plate(row.license_plate)].append(row)
+
+    renamed = []
+    for plate, rows in by_plate.items():
+        keeper, duplicates = rows[0], rows[1:]
+        if duplicates:
+            ids = [row.id for row in duplicates]
+            for table in (parking_sessions, invoices):
+                bind.execute(sa.update(table).where(table.c.vehicle_id.in_(ids)).values(vehicle_id=keeper.id))
+            latest = _latest(rows)
+            state = {name: getattr(latest, name) for name in STATE_COLUMNS}
+            state["owner_name"] = latest.owner_name or keeper.owner_name
+            state["phone"] = latest.phone or keeper.phone
+            bind.execute(sa.update(vehicles).where(vehicles.c.id == keeper.id).values(**state))
+            bind.execute(sa.delete(vehicles).where(vehicles.c.id.in_(ids)))
+        if keeper.license_plate != plate:
+            renamed.append({"vehicle_id": keeper.id, "plate": plate})
+
+    if renamed:
+        bind.execute(
+            sa.update(vehicles)
+            .where(vehicles.c.id == sa.bindparam("vehicle_id"))
+            .values(license_plate=sa.bindparam("plate")),
+            renamed,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # No se conoce cómo estaba escrita cada placa: no hay nada que revertir
@@ -0,0 +1,50 @@
+"""retención del registro de cambios
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 17:00:00
+
+change_versions.pruned_through guarda hasta qué versión se recortó el registro; /sync
+pide recargar completo a quien venga de antes. Las BD con datos anteriores al registro
+reciben la versión base 1 (como app.database.backfill_change_log).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+change_versions = sa.table(
+    "change_versions",
+    sa.column("id", sa.Integer()),
+    sa.column("last_value", sa.Integer()),
+    sa.column("pruned_through", sa.Integer()),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "change_versions", sa.Column("pruned_through", sa.Integer(), nullable=False, server_default="0")
+    )
+
+    # Versión base solo si hay datos y todavía ninguna versión
+    bind = op.get_bind()
+    has_versions = bind.scalar(sa.select(change_versions.c.id).limit(1)) is not None
+    has_data = bind.scalar(sa.text("SELECT 1 FROM parking_sessions LIMIT 1")) or bind.scalar(
+        sa.text("SELECT 1 FROM invoices LIMIT 1")
+    )
+    if not has_versions and has_data:
+        bind.execute(sa.insert(change_versions).values(id=1, last_value=1, pruned_through=1))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("change_versions") as batch_op:
+        batch_op.drop_column("pruned_through")
@@ -0,0 +1,41 @@
+"""índice de la factura de cada estadía
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 18:00:00
+
+El reporte de ingresos separa las facturas manuales (sin estadía) buscando la estadía
+de cada factura; sin índice en parking_sessions.invoice_id eso recorre la tabla.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _concurrently() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_parking_sessions_invoice_id", "parking_sessions", ["invoice_id"],
+            if_not_exists=True, postgresql_concurrently=_concurrently(),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_parking_sessions_invoice_id", table_name="parking_sessions",
+            if_exists=True, postgresql_concurrently=_concurrently(),
+        )
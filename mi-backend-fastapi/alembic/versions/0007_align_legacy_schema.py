@@ -0,0 +1,78 @@
+"""alinear bases creadas antes de Alembic con los modelos
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 19:00:00
+
+0001 solo crea lo que falta (IF NOT EXISTS), así que una base del create_all viejo
+conserva su esquema: ix_vehicles_license_plate único y columnas que los modelos
+declaran NOT NULL pero allí admiten NULL. Esta revisión las deja como en los modelos;
+en una base creada por 0001 no cambia nada.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# tabla -> columna -> (tipo, valor para las filas NULL; None = no hay valor razonable)
+NOT_NULL = {
+    "invoices": {
+        "invoice_number": (sa.String(), sa.literal("SIN-") + sa.cast(sa.column("id"), sa.String())),
+        "vehicle_id": (sa.Integer(), None),
+        "total_amount": (sa.Float(), 0),
+        "parking_time": (sa.Integer(), 0),
+    },
+    "vehicles": {
+        "vehicle_type": (sa.String(), "carro"),
+    },
+}
+
+
+def _plate_index_unique(inspector) -> bool:
+    return any(
+        index["name"] == "ix_vehicles_license_plate" and index["unique"]
+        for index in inspector.get_indexes("vehicles")
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    for table, columns in NOT_NULL.items():
+        nullable = {column["name"] for column in inspector.get_columns(table) if column["nullable"]}
+        pending = {name: spec for name, spec in columns.items() if name in nullable}
+        if not pending:
+            continue
+        for name, (_, fill) in pending.items():
+            target = sa.table(table, sa.column("id"), sa.column(name))
+            if fill is None:
+                if bind.scalar(sa.select(sa.func.count()).select_from(target).where(target.c[name].is_(None))):
+                    raise RuntimeError(f"{table}.{name} tiene filas NULL: corregirlas a mano antes de migrar")
+                continue
+            bind.execute(sa.update(target).where(target.c[name].is_(None)).values({name: fill}))
+        with op.batch_alter_table(table) as batch_op:
+            for name, (type_, _) in pending.items():
+                batch_op.alter_column(name, existing_type=type_, nullable=False)
+        if table == "invoices" and bind.dialect.name == "sqlite":
+            # SQLite recrea la tabla y el índice reflejado pierde el "id DESC"
+            op.drop_index("ix_invoices_vehicle_latest", table_name="invoices")
+            op.create_index("ix_invoices_vehicle_latest", "invoices", ["vehicle_id", sa.text("id DESC")])
+
+    # El modelo no exige placa única (quitamos unique=True); la base vieja sí
+    if _plate_index_unique(inspector):
+        op.drop_index("ix_vehicles_license_plate", table_name="vehicles")
+        op.create_index("ix_vehicles_license_plate", "vehicles", ["license_plate"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # No se sabe si la base venía del create_all viejo o de 0001: no hay nada que revertir
@@ -1,3 +1,8 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -13,6 +18,8 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 32))
 
 # Contexto para hashear contraseñas
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -27,6 +34,77 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+
+class PasswordPoolBusy(Exception):
+    """La cola de hashing está llena; el cliente debe reintentar."""
+
+
+# 🔒 Pool acotado para bcrypt: saca el trabajo de CPU del event loop y
+# limita cuántas operaciones pueden esperar, para que un pico de logins
+# no congele las entradas/salidas de vehículos.
+class PasswordHasherPool:
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._recent_waits = deque(maxlen=1024)
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _record_wait(self, waited: float) -> None:
+        with self._lock:
+            self.completed += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self._recent_waits.append(waited)
+
+    async def run(self, fn, *args):
+        # _in_flight solo se toca desde el event loop, no necesita lock
+        if self._in_flight >= self.max_queue:
+            self.rejected += 1
+            raise PasswordPoolBusy()
+
+        self._in_flight += 1
+        submitted = time.perf_counter()
+
+        def job():
+            self._record_wait(time.perf_counter() - submitted)
+            return fn(*args)
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            self._in_flight -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            waits = sorted(self._recent_waits)
+            completed, total_wait, max_wait = self.completed, self.total_wait, self.max_wait
+        p95 = waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "completed": completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(total_wait / completed * 1000, 3) if completed else 0.0,
+            "p95_wait_ms": round(p95 * 1000, 3),
+            "max_wait_ms": round(max_wait * 1000, 3),
+        }
+
+
+password_pool = PasswordHasherPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE)
+
+async def hash_password_async(password: str) -> str:
+    return await password_pool.run(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -0,0 +1,18 @@
+import orjson
+from fastapi.responses import ORJSONResponse
+
+# ⚡ Serialización rápida con orjson. Las filas que arma el backend desde SQL ya tienen la
+# forma del esquema de respuesta, así que se serializan sin volver a pasar por Pydantic.
+
+OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, option=OPTIONS)
+
+
+def dumps_line(content) -> bytes:
+    return orjson.dumps(content, option=OPTIONS | orjson.OPT_APPEND_NEWLINE)
+
+
+__all__ = ["ORJSONResponse", "dumps", "dumps_line"]
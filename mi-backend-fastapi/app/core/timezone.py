@@ -0,0 +1,39 @@
+import os
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 🕒 Zona horaria del parqueadero. Las horas se guardan sin zona, en hora local del lote.
+PARKING_TIMEZONE = os.getenv("PARKING_TIMEZONE", "America/Bogota")
+LOT_TZ = ZoneInfo(PARKING_TIMEZONE)
+
+
+def lot_now() -> datetime:
+    return datetime.now(LOT_TZ).replace(tzinfo=None)
+
+
+def lot_today() -> date:
+    return lot_now().date()
+
+
+def to_lot_time(value: datetime) -> datetime:
+    # Horas con zona (p. ej. de cámaras) -> hora local del lote sin zona
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(LOT_TZ).replace(tzinfo=None)
+
+
+# Rango semiabierto [inicio, fin) de un día: permite usar el índice de la columna,
+# a diferencia de func.date(columna) == día
+def day_range(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def date_range(date_from: date | None, date_to: date | None) -> tuple[datetime | None, datetime | None]:
+    start = datetime.combine(date_from, time.min) if date_from else None
+    end = datetime.combine(date_to + timedelta(days=1), time.min) if date_to else None
+    return start, end
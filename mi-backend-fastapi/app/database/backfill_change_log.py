@@ -0,0 +1,27 @@
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database.connection import engine
+from app.models.change_log import ChangeVersion
+from app.models.invoice import Invoice
+from app.models.parking_session import ParkingSession
+
+
+# 🔄 Versión base del registro de cambios para datos que no pasaron por él (anteriores
+# al registro o cargados con benchmarks.seed): queda la versión 1 como ya recortada, así
+# /sync responde reset=True una vez y los clientes siguen desde ahí en vez de quedarse
+# en la versión 0. Solo corre si no hay versiones, así que es seguro llamarla siempre.
+def backfill_change_log(bind=engine) -> int:
+    with Session(bind) as db:
+        if db.scalar(select(ChangeVersion.id).limit(1)) is not None:
+            return 0
+        has_data = db.scalar(select(ParkingSession.id).limit(1)) or db.scalar(select(Invoice.id).limit(1))
+        if not has_data:
+            return 0
+        db.add(ChangeVersion(id=1, last_value=1, pruned_through=1))
+        db.commit()
+        return 1
+
+
+if __name__ == "__main__":
+    print(f"✅ {backfill_change_log()} versión base del registro de cambios")
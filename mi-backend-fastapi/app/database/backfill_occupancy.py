@@ -0,0 +1,57 @@
+import heapq
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.timezone import to_lot_time
+from app.database.connection import engine
+from app.models.vehicle import Vehicle  # noqa: F401  (relaciones de ParkingSession)
+from app.models.invoice import Invoice  # noqa: F401
+from app.models.occupancy_minute import OccupancyMinute
+from app.models.parking_session import ParkingSession
+
+BATCH_SIZE = 1000
+
+
+def _moments(db: Session, column, delta: int):
+    rows = db.execute(
+        select(column).where(column.is_not(None)).order_by(column).execution_options(yield_per=BATCH_SIZE)
+    )
+    for (value,) in rows:
+        yield to_lot_time(value).replace(second=0, microsecond=0), delta
+
+
+# 📈 Reconstruir occupancy_minutes desde parking_sessions: entradas (+1) y salidas (-1)
+# ya ordenadas por los índices de entry_time/exit_time y mezcladas en un solo recorrido.
+# Solo corre si la tabla está vacía, así que es seguro llamarla en cada arranque.
+def backfill_occupancy_minutes(bind=engine) -> int:
+    with Session(bind) as db:
+        if db.scalar(select(func.count()).select_from(OccupancyMinute)):
+            return 0
+
+        # Las salidas van antes que las entradas del mismo minuto (key: delta)
+        moments = heapq.merge(
+            _moments(db, ParkingSession.exit_time, -1),
+            _moments(db, ParkingSession.entry_time, 1),
+        )
+        level, written, params = 0, 0, []
+        for minute, delta in moments:
+            level += delta
+            if params and params[-1]["minute"] == minute:
+                params[-1]["occupancy"] = level
+                params[-1]["peak"] = max(params[-1]["peak"], level)
+                continue
+            if len(params) >= BATCH_SIZE:
+                db.execute(insert(OccupancyMinute), params)
+                written += len(params)
+                params = []
+            params.append({"minute": minute, "occupancy": level, "peak": level})
+        if params:
+            db.execute(insert(OccupancyMinute), params)
+            written += len(params)
+        db.commit()
+        return written
+
+
+if __name__ == "__main__":
+    print(f"✅ {backfill_occupancy_minutes()} minutos de ocupación creados")
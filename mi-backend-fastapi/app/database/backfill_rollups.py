@@ -0,0 +1,47 @@
+from collections import defaultdict
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.database.connection import engine
+from app.models.vehicle import Vehicle
+from app.models.parking_session import ParkingSession
+from app.models.daily_rollup import DailyRollup
+
+BATCH_SIZE = 1000
+
+
+# 📊 Reconstruir daily_rollups a partir de parking_sessions (mismas reglas que en vivo:
+# entradas en el día de entrada; salidas, ingresos y minutos en el día de salida).
+# Solo corre si la tabla está vacía, así que es seguro llamarla en cada arranque.
+def backfill_daily_rollups(bind=engine) -> int:
+    with Session(bind) as db:
+        if db.scalar(select(func.count()).select_from(DailyRollup)):
+            return 0
+
+        totals = defaultdict(lambda: {"entries": 0, "exits": 0, "revenue": 0.0, "total_minutes": 0})
+        rows = db.execute(
+            select(ParkingSession.entry_time, ParkingSession.exit_time, ParkingSession.amount,
+                   ParkingSession.minutes, Vehicle.vehicle_type)
+            .join(Vehicle, Vehicle.id == ParkingSession.vehicle_id)
+            .execution_options(yield_per=BATCH_SIZE)
+        )
+        for entry_time, exit_time, amount, minutes, vehicle_type in rows:
+            vehicle_type = vehicle_type or "carro"
+            if entry_time:
+                totals[(entry_time.date(), vehicle_type)]["entries"] += 1
+            if exit_time:
+                row = totals[(exit_time.date(), vehicle_type)]
+                row["exits"] += 1
+                row["revenue"] += amount or 0
+                row["total_minutes"] += minutes or 0
+
+        params = [{"day": day, "vehicle_type": vehicle_type, **counts} for (day, vehicle_type), counts in totals.items()]
+        for start in range(0, len(params), BATCH_SIZE):
+            db.execute(insert(DailyRollup), params[start:start + BATCH_SIZE])
+        db.commit()
+        return len(params)
+
+
+if __name__ == "__main__":
+    print(f"✅ {backfill_daily_rollups()} acumulados diarios creados")
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.database.connection import engine
+from app.models.vehicle import Vehicle
+from app.models.invoice import Invoice
+from app.models.parking_session import ParkingSession
+
+BATCH_SIZE = 1000
+
+
+# 🔁 Reconstruir parking_sessions a partir de las facturas existentes (una por visita).
+# - La última factura de cada vehículo usa las horas actuales del vehículo.
+# - Las anteriores solo conservan la fecha de la factura: la salida se estima
+#   sumando parking_time minutos.
+# - Vehículos dentro sin factura reciben una sesión abierta sin factura.
+# Solo corre si la tabla está vacía, así que es seguro llamarla en cada arranque.
+def backfill_parking_sessions(bind=engine) -> int:
+    with Session(bind) as db:
+        if db.scalar(select(func.count()).select_from(ParkingSession)):
+            return 0
+
+        latest_ids = {
+            vehicle_id: invoice_id
+            for vehicle_id, invoice_id in db.execute(
+                select(Invoice.vehicle_id, func.max(Invoice.id)).group_by(Invoice.vehicle_id)
+            )
+        }
+
+        created = 0
+        batch = []
+        rows = db.execute(
+            select(Invoice, Vehicle)
+            .join(Vehicle, Vehicle.id == Invoice.vehicle_id)
+            .order_by(Invoice.id)
+            .execution_options(yield_per=BATCH_SIZE)
+        )
+        for invoice, vehicle in rows:
+            if latest_ids.get(vehicle.id) == invoice.id:
+                entry_time = vehicle.entry_time or invoice.date or vehicle.created_at
+                exit_time = None if vehicle.is_inside else (vehicle.exit_time or entry_time)
+            else:
+                entry_time = invoice.date or vehicle.created_at
+                exit_time = entry_time and entry_time + timedelta(minutes=invoice.parking_time or 0)
+            if entry_time is None:
+                continue  # sin ninguna fecha no hay visita que reconstruir
+            batch.append({
+                "vehicle_id": vehicle.id,
+                "invoice_id": invoice.id,
+                "entry_time": entry_time,
+                "exit_time": exit_time,
+                "amount": invoice.total_amount or 0,
+                "minutes": invoice.parking_time or 0,
+            })
+            if len(batch) >= BATCH_SIZE:
+                db.execute(insert(ParkingSession), batch)
+                created += len(batch)
+                batch = []
+
+        for vehicle in db.scalars(
+            select(Vehicle).where(Vehicle.is_inside == True, Vehicle.id.not_in(latest_ids.keys()))
+        ):
+            batch.append({
+                "vehicle_id": vehicle.id,
+                "invoice_id": None,
+                "entry_time": vehicle.entry_time or vehicle.created_at,
+                "exit_time": None,
+                "amount": 0,
+                "minutes": 0,
+            })
+
+        if batch:
+            db.execute(insert(ParkingSession), batch)
+            created += len(batch)
+        db.commit()
+        return created
+
+
+if __name__ == "__main__":
+    print(f" Sesiones creadas: {backfill_parking_sessions()}")
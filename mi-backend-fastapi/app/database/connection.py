@@ -1,22 +1,190 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Réplica de solo lectura opcional para listados y reportes (GET)
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
 
-# Configuración especial si usas SQLite
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL, connect_args={"check_same_thread": False}
+# ⚙️ Perfil SQLite: WAL deja leer mientras se escribe; synchronous=NORMAL es seguro con WAL
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", -64000)),   # negativo = KiB (64 MB)
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 268435456)),  # 256 MB
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+# ⚙️ Perfil PostgreSQL: pool por proceso, conexiones verificadas y recicladas
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_COUNTER_POOL_SIZE = int(os.getenv("DB_COUNTER_POOL_SIZE", 5))
+
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def engine_options(url: str) -> dict:
+    if is_sqlite(url):
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+# PRAGMAs por conexión (journal_mode=WAL queda guardado en el archivo)
+def apply_sqlite_pragmas(engine, read_only: bool = False) -> None:
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+# 🔒 Motor de escritura SQLite: cada transacción toma el lock de escritura al empezar
+# (BEGIN IMMEDIATE). Con el BEGIN diferido del driver, dos transacciones que leen y luego
+# escriben no pueden promoverse y SQLite responde "database is locked" al instante, sin
+# esperar busy_timeout; con IMMEDIATE la segunda espera su turno en el BEGIN.
+def apply_sqlite_immediate_begin(engine) -> None:
+    @event.listens_for(engine, "connect")
+    def _disable_driver_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None  # el driver deja de emitir su propio BEGIN
+
+    @event.listens_for(engine, "begin")
+    def _begin_immediate(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def build_engine(url: str):
+    engine = create_engine(url, **engine_options(url))
+    if is_sqlite(url):
+        apply_sqlite_pragmas(engine)
+    return engine
+
+
+engine = build_engine(DATABASE_URL)
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Motor asíncrono: aiosqlite para SQLite, asyncpg para PostgreSQL
+_async_drivers = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+def to_async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return f"{_async_drivers.get(scheme, scheme)}{sep}{rest}"
+
+
+def build_async_engine(url: str, read_only: bool = False):
+    options = engine_options(url)
+    if is_sqlite(url) and ":memory:" not in url:
+        # aiosqlite usa NullPool por defecto: una conexión (y sus PRAGMAs) por sesión.
+        # Con pool las conexiones se reutilizan; WAL permite lectores concurrentes.
+        options.update(poolclass=AsyncAdaptedQueuePool, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+        if not read_only:
+            # SQLite admite un solo escritor: una conexión de escritura por proceso. Las
+            # transacciones esperan en orden en el pool en vez de competir por el lock.
+            options.update(pool_size=1, max_overflow=0, pool_timeout=DB_POOL_TIMEOUT)
+    if read_only and not is_sqlite(url):
+        # asyncpg: toda transacción de esta conexión es de solo lectura
+        options["connect_args"] = {"server_settings": {"default_transaction_read_only": "on"}}
+    async_engine = create_async_engine(url, **options)
+    if is_sqlite(url):
+        apply_sqlite_pragmas(async_engine.sync_engine, read_only)
+        if not read_only:
+            apply_sqlite_immediate_begin(async_engine.sync_engine)
+    return async_engine
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+async_engine = build_async_engine(ASYNC_DATABASE_URL)
+
+# expire_on_commit=False: los objetos siguen legibles tras el commit sin recargas implícitas
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# 📖 Lecturas: motor propio si hay DATABASE_READ_URL. Con SQLite en archivo también hay
+# motor propio sobre el mismo archivo (BEGIN normal: las lecturas no toman el lock de
+# escritura); en los demás casos, el mismo motor principal.
+if DATABASE_READ_URL:
+    ASYNC_DATABASE_READ_URL = os.getenv("ASYNC_DATABASE_READ_URL") or to_async_url(DATABASE_READ_URL)
+elif is_sqlite(ASYNC_DATABASE_URL) and ":memory:" not in ASYNC_DATABASE_URL:
+    ASYNC_DATABASE_READ_URL = ASYNC_DATABASE_URL
+else:
+    ASYNC_DATABASE_READ_URL = None
+
+if ASYNC_DATABASE_READ_URL:
+    async_read_engine = build_async_engine(ASYNC_DATABASE_READ_URL, read_only=True)
+    AsyncReadSessionLocal = async_sessionmaker(
+        async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
     )
 else:
-    engine = create_engine(DATABASE_URL)
+    async_read_engine = async_engine
+    AsyncReadSessionLocal = AsyncSessionLocal
+
+# 🔢 Contadores (consecutivos de factura) en transacciones cortas propias, con un pool
+# aparte: no compiten por las conexiones que sostienen las transacciones de la portería.
+# En SQLite no hay: las escrituras van de a una y los contadores usan la transacción
+# de quien llama.
+if is_sqlite(ASYNC_DATABASE_URL):
+    async_counter_engine = None
+    AsyncCounterSessionLocal = None
+else:
+    async_counter_engine = create_async_engine(
+        ASYNC_DATABASE_URL, **{**engine_options(ASYNC_DATABASE_URL), "pool_size": DB_COUNTER_POOL_SIZE, "max_overflow": 0}
+    )
+    AsyncCounterSessionLocal = async_sessionmaker(async_counter_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+# Cerrar las conexiones del pool al apagar (los hilos de aiosqlite no son daemon)
+async def dispose_engines() -> None:
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+    if async_counter_engine is not None:
+        await async_counter_engine.dispose()
+    await async_engine.dispose()
+
+
+# Tras un fork (gunicorn con preload): olvidar las conexiones heredadas sin cerrarlas,
+# siguen siendo del proceso padre. El worker abre las suyas al primer uso.
+# Los motores async no se tocan: solo conectan dentro del event loop, que nunca corre en
+# el maestro, y recrear su pool deja el evento "connect" con un lock de hilos: dos
+# peticiones que abren su primera conexión a la vez bloquean el event loop del worker.
+def reset_engines_after_fork() -> None:
+    engine.dispose(close=False)
+
+
+def engine_stats() -> dict:
+    return {
+        "dialect": async_engine.dialect.name,
+        "pool": async_engine.pool.status(),
+        "read_replica": bool(DATABASE_READ_URL),
+        "read_pool": async_read_engine.pool.status(),
+        "counter_pool": async_counter_engine.pool.status() if async_counter_engine is not None else None,
+    }
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
@@ -26,3 +194,12 @@ def get_database_session():
         yield db
     finally:
         db.close()
+
+async def get_async_database_session():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependencia para GET de listados y reportes (réplica si está configurada)
+async def get_async_read_session():
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -1,18 +1,20 @@
-from app.database.connection import engine, Base
-from app.models.vehicle import Vehicle
-from app.models.user import User  # ← AGREGAR
-from app.models.invoice import Invoice  # ✅ necesario para que SQLAlchemy registre la tabla
+from pathlib import Path
 
-def create_tables():
-    Base.metadata.create_all(bind=engine)
-    print("✅ Tablas creadas correctamente")
+from alembic import command
+from alembic.config import Config
 
-def create_tables():
-    try:
-        Base.metadata.create_all(bind=engine)
-        print(" Tables created successfully!")
-    except Exception as e:
-        print(f" Error creating tables: {e}")
+# alembic.ini está en la raíz del backend (junto a run.py)
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+
+# 🗄️ El esquema lo manejan las migraciones de Alembic (alembic/versions). Equivale a
+# `alembic upgrade head`: crea las tablas en una base nueva, versiona una existente
+# y aplica los índices pendientes. Ya no corre al arrancar el servidor.
+def create_tables(revision: str = "head"):
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    command.upgrade(config, revision)
+    print("✅ Base de datos migrada a", revision)
 
 if __name__ == "__main__":
-    create_tables()
\ No newline at end of file
+    create_tables()
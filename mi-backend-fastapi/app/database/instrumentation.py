@@ -0,0 +1,127 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+# Consultas por petición en los headers X-DB-Queries / X-DB-Time-Ms y aviso en el log
+# cuando una petición pasa de DB_QUERY_WARN sentencias (señal típica de N+1)
+DB_QUERY_STATS = os.getenv("DB_QUERY_STATS", "true").lower() in ("1", "true", "yes")
+DB_QUERY_WARN = int(os.getenv("DB_QUERY_WARN", 50))
+
+
+class QueryStats:
+    def __init__(self, capture: bool = False):
+        self.statements = 0
+        self.seconds = 0.0
+        # Con capture=True se guardan (sql, parámetros) para EXPLAIN en las pruebas
+        self.captured: list[tuple[str, object]] | None = [] if capture else None
+
+    @property
+    def milliseconds(self) -> float:
+        return round(self.seconds * 1000, 2)
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+_over_threshold = 0
+
+
+# 🔢 Sentencias de la petición (o bloque) en curso. El contexto llega a los eventos del
+# motor también dentro de los greenlets de SQLAlchemy async y del threadpool de FastAPI.
+@contextmanager
+def track_queries(capture: bool = False):
+    stats = QueryStats(capture)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+# El inicio se guarda en el contexto de la sentencia, no en la conexión: una sentencia que
+# falla no llega a after_cursor_execute y su inicio se descarta con el contexto
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_query_started", None)
+    if stats is None or started is None:
+        return
+    stats.statements += 1
+    stats.seconds += time.perf_counter() - started
+    if stats.captured is not None and not executemany:
+        stats.captured.append((statement, parameters))
+
+
+def instrument_engine(engine) -> None:
+    if not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# Middleware ASGI: los headers se fijan al empezar la respuesta; en respuestas en
+# streaming las consultas posteriores solo cuentan para el aviso del log
+class QueryStatsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Queries"] = str(stats.statements)
+                    headers["X-DB-Time-Ms"] = str(stats.milliseconds)
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+
+        if stats.statements > DB_QUERY_WARN:
+            global _over_threshold
+            _over_threshold += 1
+            logger.warning(
+                "%s %s ejecutó %s consultas (%s ms)", scope["method"], scope["path"], stats.statements, stats.milliseconds
+            )
+
+
+# 🔍 Plan de ejecución de una sentencia (objeto SQLAlchemy o SQL ya compilado con sus
+# parámetros, como los de QueryStats.captured). Una línea por nodo del plan.
+def explain(connection, statement, parameters=None) -> list[str]:
+    if not isinstance(statement, str):
+        compiled = statement.compile(dialect=connection.dialect)
+        statement, parameters = str(compiled), compiled.params
+        if compiled.positional:
+            parameters = tuple(parameters[name] for name in compiled.positiontup)
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters or {})
+    return [row[0] for row in rows]
+
+
+# Tablas recorridas completas en un plan (SQLite: "SCAN t" sin índice; PostgreSQL: "Seq Scan on t")
+def full_scans(plan: list[str], dialect: str) -> set[str]:
+    scans = set()
+    for line in plan:
+        words = line.split()
+        if dialect == "sqlite" and words[:1] == ["SCAN"] and "INDEX" not in words:
+            scans.add(words[1])
+        elif "Seq Scan on" in line:
+            scans.add(line.split("Seq Scan on", 1)[1].split()[0])
+    return scans
+
+
+def stats() -> dict:
+    return {"enabled": DB_QUERY_STATS, "warn_threshold": DB_QUERY_WARN, "requests_over_threshold": _over_threshold}
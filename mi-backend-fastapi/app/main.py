@@ -1,11 +1,95 @@
-from fastapi import FastAPI
+import time
+
+STARTUP_BEGAN = time.perf_counter()  # antes de importar routers y servicios
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Header
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, invoice, vehicles # Importamos también las rutas de vehículos
+from app.routers import auth, exports, invoice, reports, sync, tariffs, vehicles # Importamos también las rutas de vehículos
+from app.core.security import password_pool
+from app.core.serialization import ORJSONResponse
+from app.database import instrumentation
+from app.database.connection import (
+    AsyncReadSessionLocal,
+    AsyncSessionLocal,
+    async_counter_engine,
+    async_engine,
+    async_read_engine,
+    dispose_engines,
+    engine_stats,
+)
+from app.services.ingestion import GATE_INGESTION_MODE, gate_batcher
+from app.services.change_log import run_compaction
+from app.services.events import event_hub, sse_stream
+from app.services.http_cache import response_cache
+from app.services.occupancy import occupancy_index
+from app.services.occupancy_series import occupancy_ring
+from app.services.reports import report_cache
+from app.services.stats import parking_stats
+
+logger = logging.getLogger(__name__)
+
+# Procesos que atienden la misma BD (lo fija serve.py). Con más de uno, los índices en
+# memoria no ven las escrituras de los otros workers: se consulta la BD directamente.
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", 1))
+
+IMPORT_SECONDS = time.perf_counter() - STARTUP_BEGAN
+
+# ⏱️ Estado de arranque de este proceso (/ready y /metrics)
+startup = {"ready": False, "pid": None, "workers": WEB_WORKERS, "import_ms": round(IMPORT_SECONDS * 1000, 1)}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up_began = time.perf_counter()
+    startup["pid"] = os.getpid()  # con preload el módulo se importó en el proceso maestro
+    # Cargar el índice de ocupación; si falla, los endpoints consultan la BD directamente
+    try:
+        async with AsyncSessionLocal() as db:
+            if WEB_WORKERS == 1:
+                await occupancy_index.rebuild(db)
+                await occupancy_ring.load(db)
+            await parking_stats.reconcile(db)
+    except Exception:
+        logger.exception("No se pudo construir el índice de ocupación")
+
+    if GATE_INGESTION_MODE == "batched":
+        gate_batcher.start()
+    # Reconciliación periódica de /vehicles/stats contra la BD
+    parking_stats.start(AsyncSessionLocal)
+    compaction = asyncio.create_task(run_compaction(AsyncSessionLocal))
+
+    startup["warm_up_ms"] = round((time.perf_counter() - warm_up_began) * 1000, 1)
+    startup["total_ms"] = round((time.perf_counter() - STARTUP_BEGAN) * 1000, 1)
+    launched_at = os.getenv("WEB_LAUNCHED_AT")
+    if launched_at:
+        # Desde que se lanzó serve.py (incluye el arranque del intérprete y el fork)
+        startup["since_launch_ms"] = round((time.time() - float(launched_at)) * 1000, 1)
+    startup["ready"] = True
+    logger.info(
+        "Worker %s listo en %s ms (imports %s ms, precarga %s ms)",
+        startup["pid"], startup["total_ms"], startup["import_ms"], startup["warm_up_ms"],
+    )
+    yield
+    startup["ready"] = False
+    compaction.cancel()
+    await parking_stats.stop()
+    await gate_batcher.stop()
+    await dispose_engines()
+
 
 app = FastAPI(
     title="Parking System API",
     description="API for parking system management",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Configuración de CORS
@@ -15,12 +99,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-DB-Queries", "X-DB-Time-Ms"],
 )
 
+# 🔢 Consultas SQL por petición (headers X-DB-Queries / X-DB-Time-Ms)
+if instrumentation.DB_QUERY_STATS:
+    engines = [async_engine, async_read_engine, async_counter_engine]
+    for db_engine in {e.sync_engine for e in engines if e is not None}:
+        instrumentation.instrument_engine(db_engine)
+    app.add_middleware(instrumentation.QueryStatsMiddleware)
+
 # Incluir routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
 app.include_router(invoice.router, prefix="/api/v1/invoices", tags=["Invoices"])
 app.include_router(vehicles.router, prefix="/api/v1/vehicles", tags=["Vehicles"])
+app.include_router(sync.router, prefix="/api/v1/sync", tags=["Sync"])
+app.include_router(exports.router, prefix="/api/v1/exports", tags=["Exports"])
+app.include_router(reports.router, prefix="/api/v1/reports", tags=["Reports"])
+app.include_router(tariffs.router, prefix="/api/v1/tariffs", tags=["Tariffs"])
 
 # 🌐 Rutas base
 @app.get("/")
@@ -31,3 +127,46 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "parking-system-api"}
 
+# 🚦 Listo para recibir tráfico: precarga terminada y BD alcanzable (/health solo dice que el proceso vive)
+@app.get("/ready")
+async def readiness_check():
+    if not startup["ready"]:
+        return ORJSONResponse({"status": "starting", **startup}, status_code=503)
+    try:
+        # Motor de lectura: la sonda no espera turno detrás de las escrituras
+        async with AsyncReadSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
+    except Exception:
+        logger.exception("La BD no responde")
+        return ORJSONResponse({"status": "database_unavailable", **startup}, status_code=503)
+    return {"status": "ready", **startup}
+
+# 📈 Métricas internas
+@app.get("/metrics")
+async def metrics():
+    return {
+        "startup": startup,
+        "database": engine_stats(),
+        "queries": instrumentation.stats(),
+        "password_pool": password_pool.stats(),
+        "gate_ingestion": gate_batcher.stats(),
+        "stats": parking_stats.stats(),
+        "events": event_hub.stats(),
+        "response_cache": response_cache.stats(),
+        "reports": report_cache.stats(),
+        "occupancy_series": occupancy_ring.stats(),
+    }
+
+# 📡 Eventos en vivo (Server-Sent Events): entradas, salidas y facturas.
+# Reanuda desde el header Last-Event-ID (lo envía EventSource al reconectar) o ?last_event_id=
+@app.get("/api/v1/events")
+async def stream_events(
+    last_event_id: int | None = None,
+    last_event_id_header: int | None = Header(None, alias="Last-Event-ID"),
+):
+    resume_from = last_event_id_header if last_event_id_header is not None else last_event_id
+    return StreamingResponse(
+        sse_stream(event_hub, resume_from),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from app.database.connection import Base
+
+# Registro de cambios para /sync: una fila por entidad modificada, con versión creciente.
+# entity: "session" (visita, incluye datos del vehículo) o "invoice"
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    entity = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    changed_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_change_log_entity", "entity", "entity_id", "version"),
+        Index("ix_change_log_entity_version", "entity", "version"),  # versión por recurso (ETag)
+    )
+
+
+# Última versión asignada (una sola fila, id = 1). El UPDATE bloquea la fila hasta el
+# commit, así las versiones se hacen visibles en orden y /sync no se salta ninguna.
+# pruned_through: versiones hasta aquí ya no están en el registro (retención); un
+# `since` anterior recibe reset=True.
+class ChangeVersion(Base):
+    __tablename__ = "change_versions"
+
+    id = Column(Integer, primary_key=True)
+    last_value = Column(Integer, nullable=False, default=0)
+    pruned_through = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, Float, Date
+from app.database.connection import Base
+
+# Acumulados por día y tipo de vehículo, mantenidos en cada entrada/salida.
+# Las entradas cuentan en el día de entrada; salidas, ingresos y minutos en el de salida.
+class DailyRollup(Base):
+    __tablename__ = "daily_rollups"
+
+    day = Column(Date, primary_key=True)
+    vehicle_type = Column(String, primary_key=True)
+
+    entries = Column(Integer, nullable=False, default=0)
+    exits = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+    total_minutes = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database.connection import Base
@@ -8,9 +8,9 @@ class Invoice(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     invoice_number = Column(String, unique=True, index=True, nullable=False)
-    date = Column(DateTime(timezone=True), server_default=func.now())  # 👈 más consistente con Vehicle
+    date = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # 👈 más consistente con Vehicle
 
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     vehicle_id = Column(Integer, ForeignKey("vehicles.id"), nullable=False)
 
     total_amount = Column(Float, nullable=False)
@@ -20,6 +20,11 @@ class Invoice(Base):
     vehicle = relationship("Vehicle", back_populates="invoices")
 
 
+# Facturas de un vehículo y "última factura" (max(id) por vehicle_id) sin ordenar;
+# también cubre las búsquedas por vehicle_id solo
+Index("ix_invoices_vehicle_latest", Invoice.vehicle_id, Invoice.id.desc())
+
+
 
 
 
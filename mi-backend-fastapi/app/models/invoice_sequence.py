@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from app.database.connection import Base
+
+# Contador de facturas por día: una fila por fecha (YYYYMMDD)
+class InvoiceSequence(Base):
+    __tablename__ = "invoice_sequences"
+
+    day = Column(String(8), primary_key=True)
+    last_value = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, DateTime
+from app.database.connection import Base
+
+# Serie de ocupación por minuto. Solo hay fila para los minutos con entradas/salidas;
+# los demás heredan el valor del minuto anterior (carry-forward al consultar).
+class OccupancyMinute(Base):
+    __tablename__ = "occupancy_minutes"
+
+    minute = Column(DateTime, primary_key=True)          # hora local del lote, sin segundos
+    occupancy = Column(Integer, nullable=False)          # vehículos dentro al final del minuto
+    peak = Column(Integer, nullable=False)               # máximo dentro del minuto
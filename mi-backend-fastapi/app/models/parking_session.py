@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index, text
+from sqlalchemy.orm import relationship
+from app.database.connection import Base
+
+# Una fila por visita (entrada -> salida). Solo se inserta al entrar y se cierra
+# al salir; el historial ya no depende de la fila mutable de Vehicle.
+class ParkingSession(Base):
+    __tablename__ = "parking_sessions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    vehicle_id = Column(Integer, ForeignKey("vehicles.id"), nullable=False)
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=True)
+
+    entry_time = Column(DateTime(timezone=True), nullable=False)
+    exit_time = Column(DateTime(timezone=True), nullable=True)
+    amount = Column(Float, nullable=False, default=0)
+    minutes = Column(Integer, nullable=False, default=0)
+
+    # Relaciones
+    vehicle = relationship("Vehicle", back_populates="sessions")
+    invoice = relationship("Invoice")
+
+    __table_args__ = (
+        # Listados por día / rango de fechas
+        Index("ix_parking_sessions_entry_time", "entry_time"),
+        # Reportes por fecha de salida (estadías cerradas)
+        Index("ix_parking_sessions_exit_time", "exit_time"),
+        # Estadía de una factura (reportes: facturas manuales = sin estadía)
+        Index("ix_parking_sessions_invoice_id", "invoice_id"),
+        # Historial de un vehículo ordenado por fecha
+        Index("ix_parking_sessions_vehicle_entry", "vehicle_id", "entry_time"),
+        # Sesiones abiertas (vehículos dentro): índice parcial, pequeño y caliente
+        Index(
+            "ix_parking_sessions_open",
+            "vehicle_id",
+            postgresql_where=text("exit_time IS NULL"),
+            sqlite_where=text("exit_time IS NULL"),
+        ),
+    )
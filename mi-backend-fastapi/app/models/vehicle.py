@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Float, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Float, Integer, String, DateTime, Boolean, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database.connection import Base
@@ -22,6 +22,19 @@ class Vehicle(Base):
 
     # Relación con facturas
     invoices = relationship("Invoice", back_populates="vehicle")
+    sessions = relationship("ParkingSession", back_populates="vehicle")
+
+    __table_args__ = (
+        # Vehículos dentro (salida sin índice de ocupación, backfills): índice parcial
+        Index(
+            "ix_vehicles_inside",
+            "license_plate",
+            postgresql_where=text("is_inside"),
+            sqlite_where=text("is_inside = 1"),
+        ),
+        # Listados y filtros por hora de entrada
+        Index("ix_vehicles_entry_time", "entry_time"),
+    )
 
 
 
@@ -1,18 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from app.database.connection import get_database_session
+from app.database.connection import AsyncSessionLocal, get_async_read_session
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse, Token
 from app.core.security import (
-    hash_password,
-    verify_password,
+    PasswordPoolBusy,
+    hash_password_async,
+    verify_password_async,
     create_access_token,
     verify_access_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
 
+# ⏳ Pool de bcrypt saturado: mejor un 503 rápido que bloquear el servidor
+def password_pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servicio de autenticación ocupado, intente de nuevo.",
+        headers={"Retry-After": "1"},
+    )
+
 router = APIRouter(
     prefix="/auth",
     tags=["authentication"]
@@ -20,45 +31,72 @@ router = APIRouter(
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# 🔐 bcrypt nunca corre dentro de una transacción de escritura: en SQLite la escritura
+# toma el lock al empezar y detendría la portería mientras se calcula el hash. Las
+# búsquedas van por la sesión de lectura y se cierran antes de hashear.
+
+def username_taken() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="El nombre de usuario o correo ya están registrados."
+    )
+
 # 🚀 REGISTRAR USUARIO
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register_user(user: UserCreate, db: Session = Depends(get_database_session)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_read_session)):
     # Verificar si el usuario o el email ya existen
     print("Test {user.username} - {user.password}")
-    existing_user = db.query(User).filter(
-        (User.username == user.username) | (User.email == user.email)
-    ).first()
+    result = await db.execute(
+        select(User).where((User.username == user.username) | (User.email == user.email))
+    )
+    existing_user = result.scalars().first()
+    await db.commit()  # liberar la conexión de lectura antes de bcrypt
 
     if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El nombre de usuario o correo ya están registrados."
-        )
+        raise username_taken()
 
     # Crear usuario con contraseña encriptada
-    hashed_password = hash_password(user.password)
+    try:
+        hashed_password = await hash_password_async(user.password)
+    except PasswordPoolBusy:
+        raise password_pool_busy()
     new_user = User(
         username=user.username,
         email=user.email,
         password=hashed_password,
     )
 
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    # Transacción de escritura solo para el INSERT; si otro registro ganó la carrera,
+    # las restricciones únicas lo rechazan
+    async with AsyncSessionLocal() as write_db:
+        write_db.add(new_user)
+        try:
+            await write_db.flush()
+            await write_db.refresh(new_user)
+            await write_db.commit()
+        except IntegrityError:
+            await write_db.rollback()
+            raise username_taken()
     print(new_user)
     return new_user
 
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_database_session)
+    db: AsyncSession = Depends(get_async_read_session)
 ):
     # Buscar usuario
-    user = db.query(User).filter(User.username == form_data.username).first()
+    result = await db.execute(select(User).where(User.username == form_data.username))
+    user = result.scalars().first()
+    await db.commit()  # liberar la conexión de lectura antes de bcrypt
 
     # Verificar usuario y contraseña
-    if not user or not verify_password(form_data.password, user.password):
+    try:
+        password_ok = user is not None and await verify_password_async(form_data.password, user.password)
+    except PasswordPoolBusy:
+        raise password_pool_busy()
+
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuario o contraseña incorrectos.",
@@ -97,7 +135,7 @@ async def login(
 @router.get("/me", response_model=UserResponse)
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_database_session)
+    db: AsyncSession = Depends(get_async_read_session)
 ):
     payload = verify_access_token(token)
     username = payload.get("sub")
@@ -108,7 +146,8 @@ async def get_current_user(
             detail="Token inválido o sin usuario asociado."
         )
 
-    user = db.query(User).filter(User.username == username).first()
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
 
     if user is None:
         raise HTTPException(
@@ -0,0 +1,38 @@
+from datetime import date
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.database.connection import AsyncReadSessionLocal
+from app.services.export import DATASETS, FORMATS, export_chunks_async, export_filename, parquet_available
+
+router = APIRouter(tags=["Exports"])
+
+
+# 📤 Exportar facturas o visitas de un rango de fechas (CSV o Parquet), en streaming
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: str,
+    format: str = Query("csv", description="csv | parquet"),
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    if dataset not in DATASETS:
+        raise HTTPException(status_code=404, detail=f"Exportación desconocida. Opciones: {', '.join(DATASETS)}")
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato no soportado. Opciones: {', '.join(FORMATS)}")
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(status_code=501, detail="La exportación Parquet requiere pyarrow en el servidor.")
+
+    # La sesión vive dentro del generador: se cierra al terminar el stream
+    async def generate():
+        async with AsyncReadSessionLocal() as db:
+            async for chunk in export_chunks_async(db, dataset, format, date_from, date_to):
+                yield chunk
+
+    filename = export_filename(dataset, format, date_from, date_to)
+    return StreamingResponse(
+        generate(),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
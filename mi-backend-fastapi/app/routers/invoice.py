@@ -1,56 +1,84 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from datetime import datetime
-from app.database.connection import get_database_session
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.core.serialization import dumps
+from app.core.timezone import lot_now
+from app.database.connection import get_async_database_session, get_async_read_session
 from app.models.invoice import Invoice
 from app.schemas.invoice import InvoiceCreate, InvoiceResponse
+from app.services.change_log import INVOICE, record_changes
+from app.services.events import event_hub
+from app.services.http_cache import conditional_json, resource_version
+from app.services.invoice_projection import fetch_invoice_rows, invoice_criteria
+from app.utils import generate_invoice_number
 
 router = APIRouter(prefix="/invoices", tags=["Invoices"])
 
-def generate_invoice_number(db: Session):
-    today_str = datetime.now().strftime("%Y%m%d")
-    last_invoice = (
-        db.query(Invoice)
-        .filter(Invoice.invoice_number.like(f"{today_str}%"))
-        .order_by(Invoice.id.desc())
-        .first()
-    )
-
-    sequence = 1
-    if last_invoice:
-        try:
-            last_seq = int(last_invoice.invoice_number.split("-")[-1])
-            sequence = last_seq + 1
-        except ValueError:
-            sequence = 1  # fallback en caso de formato inesperado
-
-    return f"{today_str}-{sequence:03d}"
-
 @router.post("/create")
-def create_invoice(data: InvoiceCreate, db: Session = Depends(get_database_session)):
+async def create_invoice(data: InvoiceCreate, db: AsyncSession = Depends(get_async_database_session)):
     try:
-        invoice_number = generate_invoice_number(db)
+        # Hora local del lote, como el resto de fechas (server_default=now() es UTC en SQLite)
+        now = lot_now()
+        invoice_number = await generate_invoice_number(db, now)
         invoice = Invoice(
             invoice_number=invoice_number,
+            date=now,
             vehicle_id=data.vehicle_id,
             user_id=data.user_id,
             total_amount=data.total_amount,
             parking_time=data.parking_time,
         )
         db.add(invoice)
-        db.commit()
-        db.refresh(invoice)
+        await db.flush()
+        await record_changes(db, [(INVOICE, invoice.id)])
+        await db.commit()
+
+        # Recargar con el vehículo ya cargado (en async no hay lazy load)
+        result = await db.execute(
+            select(Invoice).options(selectinload(Invoice.vehicle)).where(Invoice.id == invoice.id)
+        )
+        invoice = result.scalar_one()
+        event_hub.publish("invoice", {
+            "invoice_number": invoice.invoice_number,
+            "license_plate": invoice.vehicle.license_plate,
+            "total_amount": invoice.total_amount,
+            "parking_time": invoice.parking_time,
+        })
 
         return {
             "success": True,
             "message": "Factura generada correctamente",
-            "invoice": InvoiceResponse.from_orm(invoice)
+            "invoice": InvoiceResponse.model_validate(invoice)
         }
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error al generar la factura: {str(e)}")
 
+# 🧾 Listar facturas. Sin `limit` devuelve todas (como antes); con `limit` pagina por id
+# y el cursor de la página siguiente viaja en el header X-Next-Cursor (el cuerpo sigue
+# siendo una lista).
 @router.get("/", response_model=list[InvoiceResponse])
-def list_invoices(db: Session = Depends(get_database_session)):
-    return db.query(Invoice).all()
+async def list_invoices(
+    request: Request,
+    cursor: int | None = Query(None, description="Último id de factura recibido; devuelve las siguientes"),
+    limit: int | None = Query(None, ge=1, le=1000),
+    date_from: date | None = None,
+    date_to: date | None = None,
+    plate: str | None = None,
+    vehicle_id: int | None = None,
+    user_id: int | None = None,
+    db: AsyncSession = Depends(get_async_read_session),
+):
+    async def build():
+        criteria = invoice_criteria(date_from, date_to, plate, vehicle_id, user_id)
+        rows = await fetch_invoice_rows(db, *criteria, after_id=cursor, limit=limit)
+        headers = {}
+        if limit is not None and len(rows) == limit:
+            headers["X-Next-Cursor"] = str(rows[-1]["id"])
+        return dumps(rows), headers
+
+    return await conditional_json(request, build, await resource_version(db))
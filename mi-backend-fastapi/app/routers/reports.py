@@ -0,0 +1,123 @@
+import re
+from datetime import date, datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.timezone import lot_now, to_lot_time
+from app.database.connection import get_async_read_session as get_read_db
+from app.schemas.report import OccupancySeriesResponse, ReportBucket, RevenueReportResponse, StaysReportResponse
+from app.services.occupancy_series import MINUTE, OCCUPANCY_MAX_POINTS, auto_step, minute_of, occupancy_series
+from app.services.reports import MAX_PERIODS, bucket_starts, default_range, report_cache
+from app.services.vehicle_projection import vehicle_type_labels
+
+router = APIRouter(tags=["Reports"])
+
+STEP_UNITS = {"m": 1, "h": 60, "d": 1440}
+
+
+def _resolve_range(bucket: ReportBucket, date_from: date | None, date_to: date | None) -> tuple[date, date]:
+    date_from, date_to = default_range(bucket.value, date_from, date_to)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from debe ser anterior o igual a date_to.")
+    if len(bucket_starts(date_from, date_to, bucket.value)) > MAX_PERIODS:
+        raise HTTPException(status_code=400, detail=f"El rango supera el máximo de {MAX_PERIODS} periodos.")
+    return date_from, date_to
+
+
+def _filter_type(rows: list[dict], vehicle_type: str | None) -> list[dict]:
+    if not vehicle_type:
+        return rows
+    wanted = vehicle_type_labels.get(vehicle_type, vehicle_type)
+    return [row for row in rows if row["vehicle_type"] == wanted]
+
+
+# 💰 Ingresos por día/semana/mes (periodos completos que tocan el rango)
+@router.get("/revenue", response_model=RevenueReportResponse)
+async def revenue_report(
+    bucket: ReportBucket = ReportBucket.day,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    vehicle_type: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    date_from, date_to = _resolve_range(bucket, date_from, date_to)
+    rows = _filter_type(await report_cache.rows(db, "revenue", bucket.value, date_from, date_to), vehicle_type)
+    return {
+        "success": True,
+        "message": "Reporte de ingresos generado correctamente",
+        "bucket": bucket,
+        "date_from": date_from,
+        "date_to": date_to,
+        "total_invoices": sum(row["invoices"] for row in rows),
+        "total_revenue": sum(row["revenue"] for row in rows),
+        "rows": rows,
+    }
+
+
+# ⏱️ Estadías (duración de las visitas cerradas) por día/semana/mes
+@router.get("/stays", response_model=StaysReportResponse)
+async def stays_report(
+    bucket: ReportBucket = ReportBucket.day,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    vehicle_type: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    date_from, date_to = _resolve_range(bucket, date_from, date_to)
+    rows = _filter_type(await report_cache.rows(db, "stays", bucket.value, date_from, date_to), vehicle_type)
+    total_stays = sum(row["stays"] for row in rows)
+    total_minutes = sum(row["total_minutes"] for row in rows)
+    return {
+        "success": True,
+        "message": "Reporte de estadías generado correctamente",
+        "bucket": bucket,
+        "date_from": date_from,
+        "date_to": date_to,
+        "total_stays": total_stays,
+        "average_minutes": round(total_minutes / total_stays, 2) if total_stays else 0,
+        "rows": [
+            {**row, "average_minutes": round(row["total_minutes"] / row["stays"], 2) if row["stays"] else 0}
+            for row in rows
+        ],
+    }
+
+
+# "15" / "15m" / "1h" / "1d" -> minutos
+def _parse_step(step: str) -> int:
+    match = re.fullmatch(r"(\d+)([mhd]?)", step.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise HTTPException(status_code=400, detail="step debe ser un entero positivo con sufijo m, h o d (ej. 15m, 1h).")
+    return int(match.group(1)) * STEP_UNITS[match.group(2) or "m"]
+
+
+# 📈 Serie de ocupación por minuto reducida a `step` (por defecto: últimas 24 h con
+# un paso que deja como mucho OCCUPANCY_MAX_POINTS puntos). ?from=&to=&step=
+@router.get("/occupancy", response_model=OccupancySeriesResponse)
+async def occupancy_report(
+    start: datetime | None = Query(None, alias="from"),
+    end: datetime | None = Query(None, alias="to"),
+    step: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    end = minute_of(to_lot_time(end)) if end else minute_of(lot_now()) + MINUTE
+    start = minute_of(to_lot_time(start)) if start else end - timedelta(days=1)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="from debe ser anterior a to.")
+    step_minutes = _parse_step(step) if step else auto_step(start, end)
+    if (end - start) / MINUTE / step_minutes > OCCUPANCY_MAX_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El rango con step={step_minutes}m supera el máximo de {OCCUPANCY_MAX_POINTS} puntos.",
+        )
+
+    points, source = await occupancy_series(db, start, end, step_minutes)
+    return {
+        "success": True,
+        "message": "Serie de ocupación generada correctamente",
+        "start": start,
+        "end": end,
+        "step_minutes": step_minutes,
+        "source": source,
+        "points": points,
+    }
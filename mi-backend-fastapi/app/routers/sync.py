@@ -0,0 +1,65 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.database.connection import get_async_database_session as get_db, get_async_read_session as get_read_db
+from app.models.invoice import Invoice
+from app.models.parking_session import ParkingSession
+from app.schemas.invoice import InvoiceResponse
+from app.schemas.sync import SyncResponseMessage
+from app.schemas.vehicle import VehicleHistoryResponse
+from app.services.change_log import INVOICE, SESSION, compact_change_log, fetch_changes, version_bounds
+from app.services.vehicle_projection import fetch_vehicle_rows
+
+router = APIRouter(tags=["Sync"])
+
+
+# 🔄 Cambios desde una versión: el cliente guarda `version` y la envía como `since`.
+# since=0 (primera vez), una versión desconocida o una ya recortada por la retención del
+# registro responden reset=True: cargar /history completo.
+@router.get("", response_model=SyncResponseMessage)
+async def sync_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=5000),
+    db: AsyncSession = Depends(get_read_db),
+):
+    version, pruned_through = await version_bounds(db)
+    if since == 0 or since > version or since < pruned_through:
+        return {"success": True, "message": "Recargar listas completas", "since": since, "version": version, "reset": True}
+
+    changes = await fetch_changes(db, since, limit)
+    has_more = len(changes) == limit
+    if changes:
+        version = changes[-1].version if has_more else max(version, changes[-1].version)
+
+    session_ids = [c.entity_id for c in changes if c.entity == SESSION]
+    invoice_ids = [c.entity_id for c in changes if c.entity == INVOICE]
+
+    vehicles = []
+    if session_ids:
+        rows = await fetch_vehicle_rows(db, ParkingSession.id.in_(session_ids))
+        vehicles = [VehicleHistoryResponse.model_validate(row) for row in rows]
+    invoices = []
+    if invoice_ids:
+        result = await db.execute(
+            select(Invoice).options(selectinload(Invoice.vehicle)).where(Invoice.id.in_(invoice_ids)).order_by(Invoice.id)
+        )
+        invoices = [InvoiceResponse.model_validate(invoice) for invoice in result.scalars()]
+
+    return {
+        "success": True,
+        "message": "Cambios obtenidos correctamente",
+        "since": since,
+        "version": version,
+        "has_more": has_more,
+        "vehicles": vehicles,
+        "invoices": invoices,
+    }
+
+
+# 🧹 Compactar el registro de cambios (también corre periódicamente)
+@router.post("/compact")
+async def compact(db: AsyncSession = Depends(get_db)):
+    removed = await compact_change_log(db)
+    return {"success": True, "message": "Registro de cambios compactado", "removed": removed}
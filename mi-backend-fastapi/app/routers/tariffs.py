@@ -0,0 +1,50 @@
+import time
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.connection import get_async_read_session as get_read_db
+from app.schemas.tariff import TariffResponseMessage, TariffSimulationRequest, TariffSimulationResponse
+from app.services.tariffs import Tariff, current_tariff, simulate_tariff
+
+router = APIRouter(tags=["Tariffs"])
+
+
+# 💲 Tarifa vigente
+@router.get("", response_model=TariffResponseMessage)
+async def get_tariff():
+    return {"success": True, "message": "Tarifa vigente", "tariff": current_tariff.to_dict()}
+
+
+# 🔁 Recalcular el historial con una tarifa propuesta (sin `tariff`: con la vigente,
+# para encontrar visitas cobradas con reglas anteriores). No modifica nada.
+@router.post("/simulate", response_model=TariffSimulationResponse)
+async def simulate(request: TariffSimulationRequest, db: AsyncSession = Depends(get_read_db)):
+    if request.date_from and request.date_to and request.date_from > request.date_to:
+        raise HTTPException(status_code=400, detail="date_from debe ser anterior o igual a date_to.")
+    if request.tariff is not None and not request.tariff:
+        raise HTTPException(status_code=400, detail="La tarifa debe tener al menos un tipo de vehículo.")
+    try:
+        tariff = (
+            Tariff.from_dict({name: table.model_dump() for name, table in request.tariff.items()})
+            if request.tariff
+            else current_tariff
+        )
+        started = time.perf_counter()
+        rows = await simulate_tariff(db, tariff, request.date_from, request.date_to, request.vehicle_type)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    total_current = sum(row["current"] for row in rows)
+    total_simulated = sum(row["simulated"] for row in rows)
+    return {
+        "success": True,
+        "message": "Simulación de tarifa generada correctamente",
+        "date_from": request.date_from,
+        "date_to": request.date_to,
+        "total_sessions": sum(row["sessions"] for row in rows),
+        "total_current": total_current,
+        "total_simulated": total_simulated,
+        "total_difference": total_simulated - total_current,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        "rows": rows,
+    }
@@ -1,247 +1,227 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime
-
-from app.database.connection import get_database_session as get_db
-from app.models.vehicle import Vehicle
-from app.models.invoice import Invoice
-from app.utils import generate_invoice_number, calculate_registration_value
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+
+from app.core.serialization import dumps
+from app.core.timezone import day_range, lot_now, lot_today, to_lot_time
+from app.database.connection import (
+    AsyncReadSessionLocal,
+    get_async_database_session as get_db,
+    get_async_read_session as get_read_db,
+)
+from app.models.parking_session import ParkingSession
+from app.services.events import publish_gate_event
+from app.services.http_cache import PROCESS_ID, conditional_json, resource_version
+from app.services.gate import apply_entry, apply_exit, on_committed
+from app.services.gate_batch import apply_gate_batch, apply_occupancy_updates
+from app.services.ingestion import GATE_INGESTION_MODE, gate_batcher
+from app.services.occupancy import occupancy_index
+from app.services.occupancy_series import occupancy_ring
+from app.services.reports import report_cache
+from app.services.rollups import fetch_daily_rollups
+from app.services.stats import parking_stats
+from app.utils import normalize_plate
+from app.services.vehicle_projection import (
+    fetch_vehicle_rows,
+    history_criteria,
+    stream_vehicle_rows_ndjson,
+)
 
 from app.schemas.vehicle import (
-    VehicleResponse,
     VehicleEntryResponseMessage,
     VehicleExitResponseMessage,
     VehicleListResponseMessage,
-    VehicleHistoryResponse,
     VehicleHistoryResponseMessage,
-    VehicleCreate  # opcional si lo usas para el body
+    GateEventIn,
+    GateBatchResponseMessage,
+    DailySummaryResponseMessage,
+    VehicleStatsResponse,
 )
 
-# Mapeo de tipos (soporte EN/ES) solo para etiqueta
-vehicle_type_map = {
-    "carro": {"label": "carro", "value": 5000},
-    "moto": {"label": "moto", "value": 1500},
-    "car": {"label": "carro", "value": 5000},
-    "motorcycle": {"label": "moto", "value": 1500}
-}
+GATE_BATCH_MAX_EVENTS = int(os.getenv("GATE_BATCH_MAX_EVENTS", 5000))
 
 router = APIRouter(tags=["Vehicles"])
 @router.post("/entry/{license_plate}", response_model=VehicleEntryResponseMessage)
-def register_vehicle_entry(
+async def register_vehicle_entry(
     license_plate: str,
     payload: dict | None = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    now = datetime.now()
-    vehicle_type = (payload or {}).get("vehicle_type", "carro")
-    owner_name = (payload or {}).get("owner_name")
-    phone = (payload or {}).get("phone")
-    registration_value = calculate_registration_value(vehicle_type)
-    tipo_label = vehicle_type_map.get(vehicle_type, {"label": "carro"})["label"]
-
-    vehicle = db.query(Vehicle).filter(Vehicle.license_plate == license_plate).first()
-
-    # 🚫 Ya está dentro
-    if vehicle and vehicle.is_inside:
-        return VehicleEntryResponseMessage(
-            success=False,
-            message="El vehículo ya está registrado 'en parqueadero'. No se permite una nueva entrada.",
-            id=vehicle.id,
-            license_plate=vehicle.license_plate,
-            vehicle_type=vehicle.vehicle_type,
-            status=vehicle.status,
-            entry_time=vehicle.entry_time,
-            invoice_number=None,
-            registration_value=vehicle.registration_value,
-            total_amount=0,
-            parking_time=0
-        )
+    # Placa normalizada antes de cualquier búsqueda (BD, índice de ocupación, lotes)
+    license_plate = normalize_plate(license_plate)
+    if GATE_INGESTION_MODE == "batched":
+        return await gate_batcher.submit("entry", license_plate, payload)
 
-    # 🆕 Nuevo vehículo
-    if not vehicle:
-        vehicle = Vehicle(
-            license_plate=license_plate,
-            vehicle_type=tipo_label,
-            owner_name=owner_name,
-            phone=phone,
-            status="en parqueadero",
-            is_inside=True,
-            entry_time=now,
-            registration_value=registration_value
-        )
-        db.add(vehicle)
-    else:
-        # 🔄 Actualizar existente
-        vehicle.vehicle_type = tipo_label
-        vehicle.owner_name = owner_name or vehicle.owner_name
-        vehicle.phone = phone or vehicle.phone
-        vehicle.status = "en parqueadero"
-        vehicle.is_inside = True
-        vehicle.entry_time = now
-        vehicle.registration_value = registration_value
-
-    db.commit()
-    db.refresh(vehicle)
-
-    # 🧾 Crear factura vacía
-    invoice = Invoice(
-        invoice_number=generate_invoice_number(db),
-        vehicle_id=vehicle.id,
-        total_amount=0,
-        parking_time=0
-    )
-    db.add(invoice)
-    db.commit()
-    db.refresh(invoice)
-
-    return VehicleEntryResponseMessage(
-        success=True,
-        message="Vehículo registrado con éxito",
-        id=vehicle.id,
-        license_plate=vehicle.license_plate,
-        vehicle_type=vehicle.vehicle_type,
-        status=vehicle.status,
-        entry_time=vehicle.entry_time,
-        invoice_number=invoice.invoice_number,
-        registration_value=vehicle.registration_value,
-        total_amount=invoice.total_amount,
-        parking_time=invoice.parking_time
-    )
+    response = await apply_entry(db, license_plate, payload, lot_now())
+    if response.success:
+        await db.commit()
+        on_committed("entry", response)
+    return response
 
 # 🚙 Registrar salida y actualizar factura
 @router.put("/exit/{license_plate}", response_model=VehicleExitResponseMessage)
-def register_exit(license_plate: str, db: Session = Depends(get_db)):
-    # Relajar filtro: placa y que esté En parqueadero o dentro
-    vehicle = (
-        db.query(Vehicle)
-        .filter(Vehicle.license_plate == license_plate)
-        .filter((Vehicle.is_inside == True) | (Vehicle.status == "En Parqueadero"))
-        .first()
-    )
-
-    if not vehicle:
-        raise HTTPException(status_code=404, detail="Vehículo no encontrado o no está En parqueadero.")
-
-    now = datetime.now()
-    if not vehicle.entry_time:
-        raise HTTPException(status_code=400, detail="El vehículo no tiene hora de entrada registrada.")
-
-    parking_time_minutes = int((now - vehicle.entry_time).total_seconds() // 60)
-
-    # Calcular tarifa proporcional por hora; si minutos = 0, cobrar base
-    tarifa_base = vehicle.registration_value or calculate_registration_value(vehicle.vehicle_type)
-    total_amount = int((parking_time_minutes / 60) * tarifa_base) if parking_time_minutes > 0 else int(tarifa_base)
-
-    # Actualizar vehículo
-    vehicle.exit_time = now
-    vehicle.is_inside = False
-    vehicle.status = "Fuera"
-    db.commit()
-    db.refresh(vehicle)
-
-    # Actualizar última factura
-    invoice = (
-        db.query(Invoice)
-        .filter(Invoice.vehicle_id == vehicle.id)
-        .order_by(Invoice.id.desc())
-        .first()
-    )
-    if invoice:
-        invoice.parking_time = parking_time_minutes
-        invoice.total_amount = total_amount
-        db.commit()
-        db.refresh(invoice)
-
-    return VehicleExitResponseMessage(
-        success=True,
-        message="Salida registrada y factura actualizada correctamente",
-        id=vehicle.id,
-        license_plate=vehicle.license_plate,
-        vehicle_type=vehicle.vehicle_type,
-        entry_time=vehicle.entry_time,
-        exit_time=vehicle.exit_time,
-        status=vehicle.status,
-        invoice_number=invoice.invoice_number if invoice else None,
-        total_amount=invoice.total_amount if invoice else 0,
-        parking_time=invoice.parking_time if invoice else 0
+async def register_exit(license_plate: str, db: AsyncSession = Depends(get_db)):
+    license_plate = normalize_plate(license_plate)
+    if GATE_INGESTION_MODE == "batched":
+        return await gate_batcher.submit("exit", license_plate)
+
+    response = await apply_exit(db, license_plate, lot_now())
+    await db.commit()
+    on_committed("exit", response)
+    return response
+
+# 📦 Lote de eventos de cámaras: todo en una transacción, resultado por evento
+@router.post("/batch", response_model=GateBatchResponseMessage)
+async def register_gate_batch(events: list[GateEventIn], db: AsyncSession = Depends(get_db)):
+    if len(events) > GATE_BATCH_MAX_EVENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El lote supera el máximo de {GATE_BATCH_MAX_EVENTS} eventos.",
+        )
+    if not events:
+        return GateBatchResponseMessage(success=True, message="Lote vacío", processed=0, failed=0, results=[])
+    for event in events:
+        event.license_plate = normalize_plate(event.license_plate)
+
+    results, occupancy_updates, occupancy_points = await apply_gate_batch(db, events)
+    await db.commit()
+    apply_occupancy_updates(occupancy_updates)
+    for minute, level, peak in occupancy_points:
+        occupancy_ring.record(minute, level, peak)
+    # Eventos atrasados (cámaras que estuvieron sin conexión) cambian periodos ya cerrados
+    if any(to_lot_time(event.timestamp).date() < lot_today() for event in events):
+        report_cache.clear()
+    for item in results:
+        parking_stats.record(item.type.value, item)
+        publish_gate_event(item.type.value, item)
+
+    failed = sum(1 for item in results if not item.success)
+    return GateBatchResponseMessage(
+        success=failed == 0,
+        message="Lote procesado correctamente" if failed == 0 else f"Lote procesado con {failed} eventos rechazados",
+        processed=len(results),
+        failed=failed,
+        results=results,
     )
 
 # 🚦 Listar vehículos En parqueaderos (incluye última factura)
 @router.get("/active", response_model=VehicleListResponseMessage)
-def list_active(db: Session = Depends(get_db)):
-    vehicles = db.query(Vehicle).filter(Vehicle.is_inside == True).all()
-    responses = []
-    for v in vehicles:
-        invoice = (
-            db.query(Invoice)
-            .filter(Invoice.vehicle_id == v.id)
-            .order_by(Invoice.id.desc())
-            .first()
-        )
-        responses.append(VehicleResponse.model_validate({
-            "id": v.id,
-            "license_plate": v.license_plate,
-            "vehicle_type": vehicle_type_map.get(v.vehicle_type, {"label": v.vehicle_type})["label"],
-            "entry_time": v.entry_time.isoformat() if v.entry_time else None,
-            "registration_value": v.registration_value or 0,
-            "status": v.status or "N/A",
-            "exit_time": v.exit_time.isoformat() if v.exit_time else None,
-            "invoice_number": invoice.invoice_number if invoice else None,
-            "total_amount": invoice.total_amount if invoice else 0,
-            "parking_time": invoice.parking_time if invoice else 0
-        }))
-    return {"success": True, "message": "Vehículos En parqueaderos listados correctamente", "vehicles": responses}
+async def list_active(request: Request, db: AsyncSession = Depends(get_read_db)):
+    async def build():
+        if occupancy_index.ready:
+            rows = occupancy_index.as_rows()
+        else:
+            rows = await fetch_vehicle_rows(db, ParkingSession.exit_time.is_(None))
+        return dumps({"success": True, "message": "Vehículos En parqueaderos listados correctamente", "vehicles": rows})
+
+    # Con el índice listo el ETag sale de su versión en memoria (sin ir a la BD)
+    if occupancy_index.ready:
+        return await conditional_json(request, build, PROCESS_ID, occupancy_index.version)
+    return await conditional_json(request, build, await resource_version(db))
+
+# 📈 Contadores del tablero (unos pocos bytes, sin recorrer el historial)
+@router.get("/stats", response_model=VehicleStatsResponse)
+async def get_stats(db: AsyncSession = Depends(get_read_db)):
+    return {"success": True, "message": "Estadísticas obtenidas correctamente", **await parking_stats.read(db)}
+
+# 🅿️ Verificar el índice de ocupación contra la BD
+@router.get("/occupancy/check")
+async def check_occupancy_index(db: AsyncSession = Depends(get_db)):
+    return await occupancy_index.check(db)
+
+# 🔄 Reconstruir el índice (p. ej. tras cambios hechos directamente en la BD)
+@router.post("/occupancy/rebuild")
+async def rebuild_occupancy_index(db: AsyncSession = Depends(get_db)):
+    count = await occupancy_index.rebuild(db)
+    return {"success": True, "message": "Índice de ocupación reconstruido", "indexed": count}
 
 # 📅 Listar vehículos de hoy (incluye última factura)
 @router.get("/today", response_model=VehicleListResponseMessage)
-def list_today(db: Session = Depends(get_db)):
-    today = datetime.now().date()
-    vehicles = db.query(Vehicle).filter(func.date(Vehicle.entry_time) == today).all()
-    responses = []
-    for v in vehicles:
-        invoice = (
-            db.query(Invoice)
-            .filter(Invoice.vehicle_id == v.id)
-            .order_by(Invoice.id.desc())
-            .first()
-        )
-        responses.append(VehicleResponse.model_validate({
-            "id": v.id,
-            "license_plate": v.license_plate,
-            "vehicle_type": vehicle_type_map.get(v.vehicle_type, {"label": v.vehicle_type})["label"],
-            "entry_time": v.entry_time.isoformat() if v.entry_time else None,
-            "registration_value": v.registration_value or 0,
-            "status": v.status or "N/A",
-            "exit_time": v.exit_time.isoformat() if v.exit_time else None,
-            "invoice_number": invoice.invoice_number if invoice else None,
-            "total_amount": invoice.total_amount if invoice else 0,
-            "parking_time": invoice.parking_time if invoice else 0
-        }))
-    return {"success": True, "message": "Vehículos de hoy listados correctamente", "vehicles": responses}
-
-# 📜 Historial de vehículos (incluye última factura)
+async def list_today(request: Request, db: AsyncSession = Depends(get_read_db)):
+    today = lot_today()
+
+    async def build():
+        start, end = day_range(today)
+        rows = await fetch_vehicle_rows(db, ParkingSession.entry_time >= start, ParkingSession.entry_time < end)
+        return dumps({"success": True, "message": "Vehículos de hoy listados correctamente", "vehicles": rows})
+
+    return await conditional_json(request, build, await resource_version(db), today)
+
+# 📊 Resumen del día desde los acumulados (sin recorrer visitas ni facturas)
+@router.get("/daily-summary", response_model=DailySummaryResponseMessage)
+async def daily_summary(day: date | None = None, db: AsyncSession = Depends(get_read_db)):
+    day = day or lot_today()
+    rollups = await fetch_daily_rollups(db, day)
+
+    def average(minutes, exits):
+        return round(minutes / exits, 2) if exits else 0
+
+    by_type = [
+        {
+            "vehicle_type": r.vehicle_type,
+            "entries": r.entries,
+            "exits": r.exits,
+            "revenue": r.revenue,
+            "total_minutes": r.total_minutes,
+            "average_stay_minutes": average(r.total_minutes, r.exits),
+        }
+        for r in rollups
+    ]
+    exits = sum(r.exits for r in rollups)
+    return {
+        "success": True,
+        "message": "Resumen diario obtenido correctamente",
+        "day": day,
+        "entries": sum(r.entries for r in rollups),
+        "exits": exits,
+        "revenue": sum(r.revenue for r in rollups),
+        "average_stay_minutes": average(sum(r.total_minutes for r in rollups), exits),
+        "by_type": by_type,
+    }
+
+# 📜 Historial de visitas (una fila por entrada, paginado por id de sesión)
 @router.get("/history", response_model=VehicleHistoryResponseMessage)
-def list_all(db: Session = Depends(get_db)):
-    vehicles = db.query(Vehicle).all()
-    history = []
-    for v in vehicles:
-        invoice = (
-            db.query(Invoice)
-            .filter(Invoice.vehicle_id == v.id)
-            .order_by(Invoice.id.desc())
-            .first()
-        )
-        history.append(VehicleHistoryResponse.model_validate({
-            "id": v.id,
-            "license_plate": v.license_plate,
-            "vehicle_type": vehicle_type_map.get(v.vehicle_type, {"label": v.vehicle_type})["label"],
-            "entry_time": v.entry_time.isoformat() if v.entry_time else None,
-            "registration_value": v.registration_value or 0,
-            "status": v.status or "",
-            "invoice_number": invoice.invoice_number if invoice else None,
-            "exit_time": v.exit_time.isoformat() if v.exit_time else None,
-            "total_amount": invoice.total_amount if invoice else 0,
-            "parking_time": invoice.parking_time if invoice else 0
-        }))
-    return {"success": True, "message": "Historial de vehículos obtenido correctamente", "history": history}
+async def list_all(
+    request: Request,
+    cursor: int | None = Query(None, description="Último session_id recibido; devuelve los siguientes"),
+    limit: int | None = Query(None, ge=1, le=1000),
+    plate: str | None = None,
+    vehicle_type: str | None = None,
+    status: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    async def build():
+        criteria = history_criteria(plate, vehicle_type, status, date_from, date_to)
+        rows = await fetch_vehicle_rows(db, *criteria, after_id=cursor, limit=limit)
+        next_cursor = rows[-1]["session_id"] if limit is not None and len(rows) == limit else None
+        return dumps({
+            "success": True,
+            "message": "Historial de vehículos obtenido correctamente",
+            "history": rows,
+            "next_cursor": next_cursor,
+        })
+
+    return await conditional_json(request, build, await resource_version(db))
+
+# 🌊 Historial completo en streaming (NDJSON, una fila por línea)
+@router.get("/history/stream")
+async def stream_history(
+    plate: str | None = None,
+    vehicle_type: str | None = None,
+    status: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    criteria = history_criteria(plate, vehicle_type, status, date_from, date_to)
+
+    # La sesión vive dentro del generador: se cierra al terminar el stream
+    async def generate():
+        async with AsyncReadSessionLocal() as db:
+            async for line in stream_vehicle_rows_ndjson(db, criteria):
+                yield line
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
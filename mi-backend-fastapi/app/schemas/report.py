@@ -0,0 +1,69 @@
+from datetime import date, datetime
+from enum import Enum
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class ReportBucket(str, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+# 🔹 Ingresos por periodo y tipo de vehículo
+class RevenueRow(BaseModel):
+    period: date
+    vehicle_type: Optional[str] = None
+    invoices: int
+    revenue: float
+
+
+class RevenueReportResponse(BaseModel):
+    success: bool
+    message: str
+    bucket: ReportBucket
+    date_from: date
+    date_to: date
+    total_invoices: int
+    total_revenue: float
+    rows: List[RevenueRow]
+
+
+# 🔹 Estadías cerradas por periodo y tipo de vehículo
+class StayRow(BaseModel):
+    period: date
+    vehicle_type: Optional[str] = None
+    stays: int
+    total_minutes: int
+    average_minutes: float
+    min_minutes: Optional[int] = None
+    max_minutes: Optional[int] = None
+
+
+class StaysReportResponse(BaseModel):
+    success: bool
+    message: str
+    bucket: ReportBucket
+    date_from: date
+    date_to: date
+    total_stays: int
+    average_minutes: float
+    rows: List[StayRow]
+
+
+# 🔹 Ocupación por intervalo (máximo, promedio ponderado por tiempo y valor al cierre)
+class OccupancyPoint(BaseModel):
+    time: datetime
+    max: int
+    avg: float
+    last: int
+
+
+class OccupancySeriesResponse(BaseModel):
+    success: bool
+    message: str
+    start: datetime
+    end: datetime
+    step_minutes: int
+    source: str  # "memory" | "database"
+    points: List[OccupancyPoint]
@@ -0,0 +1,17 @@
+from typing import List
+from pydantic import BaseModel
+
+from app.schemas.invoice import InvoiceResponse
+from app.schemas.vehicle import VehicleHistoryResponse
+
+
+# 🔹 Respuesta de /sync: filas nuevas o modificadas desde `since`
+class SyncResponseMessage(BaseModel):
+    success: bool
+    message: str
+    since: int
+    version: int          # enviar como `since` en la próxima llamada
+    reset: bool = False   # True: el cliente debe recargar sus listas completas
+    has_more: bool = False
+    vehicles: List[VehicleHistoryResponse] = []  # visitas (mismas filas que /history)
+    invoices: List[InvoiceResponse] = []
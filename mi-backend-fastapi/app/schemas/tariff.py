@@ -0,0 +1,56 @@
+from datetime import date
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+
+# 🔹 Franja horaria con otro valor por hora ("22:00"-"06:00" cruza la medianoche)
+class TimeBandSchema(BaseModel):
+    start: str = Field(pattern=r"^([01]\d|2[0-3]):[0-5]\d$")
+    end: str = Field(pattern=r"^(([01]\d|2[0-3]):[0-5]\d|24:00)$")
+    hourly_rate: float = Field(ge=0)
+
+
+# 🔹 Tabla de tarifas de un tipo de vehículo
+class RateTableSchema(BaseModel):
+    hourly_rate: float = Field(ge=0)
+    bands: List[TimeBandSchema] = []
+    daily_cap: Optional[float] = Field(None, ge=0)
+    minimum_charge: float = Field(0, ge=0)
+    short_stay_charge: Optional[float] = Field(None, ge=0)
+
+
+class TariffResponseMessage(BaseModel):
+    success: bool
+    message: str
+    tariff: Dict[str, RateTableSchema]
+
+
+# 🔹 Simulación: recalcular visitas cerradas con una tarifa propuesta (o la vigente)
+class TariffSimulationRequest(BaseModel):
+    tariff: Optional[Dict[str, RateTableSchema]] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    vehicle_type: Optional[str] = None
+
+
+class TariffSimulationRow(BaseModel):
+    vehicle_type: str
+    sessions: int
+    minutes: int
+    current: float      # lo cobrado
+    simulated: float    # lo que se cobraría con la tarifa simulada
+    difference: float
+    changed: int        # visitas cuyo valor cambia
+
+
+class TariffSimulationResponse(BaseModel):
+    success: bool
+    message: str
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    total_sessions: int
+    total_current: float
+    total_simulated: float
+    total_difference: float
+    elapsed_ms: float
+    rows: List[TariffSimulationRow]
@@ -1,7 +1,7 @@
 from enum import Enum
 from typing import Optional, List
 from pydantic import BaseModel, ConfigDict
-from datetime import datetime
+from datetime import date, datetime
 
 # 🔹 Enum de tipos de vehículo en español
 class VehicleType(str, Enum):
@@ -36,6 +36,8 @@ class VehicleResponse(BaseModel):
     status: str
     exit_time: str | None
 
+    session_id: Optional[int] = None  # visita (parking_sessions.id)
+
     # Campos de factura
     invoice_number: Optional[str] = None
     total_amount: float = 0
@@ -56,6 +58,9 @@ class VehicleEntryResponseMessage(BaseModel):
     status: str
     exit_time: datetime | None = None
 
+    session_id: Optional[int] = None
+    occupancy: Optional[int] = None  # vehículos dentro después de esta entrada
+
     # Campos de factura (pueden ser nulos si no se genera factura)
     invoice_number: Optional[str] = None
     total_amount: Optional[float] = 0
@@ -74,6 +79,8 @@ class VehicleExitResponseMessage(BaseModel):
     entry_time: datetime
     exit_time: datetime
     status: str
+    session_id: Optional[int] = None
+    occupancy: Optional[int] = None  # vehículos dentro después de esta salida
 
     # Campos de factura
     invoice_number: Optional[str] = None
@@ -103,6 +110,8 @@ class VehicleHistoryResponse(BaseModel):
     status: str
     exit_time: str | None
 
+    session_id: Optional[int] = None  # visita (parking_sessions.id)
+
     # Campos de factura
     invoice_number: Optional[str] = None
     total_amount: float = 0
@@ -115,3 +124,81 @@ class VehicleHistoryResponseMessage(BaseModel):
     success: bool
     message: str
     history: List[VehicleHistoryResponse]
+    next_cursor: Optional[int] = None  # None cuando no hay más páginas
+
+
+# 🔹 Lote de eventos de portería (cámaras ANPR)
+class GateEventType(str, Enum):
+    entry = "entry"
+    exit = "exit"
+
+
+class GateEventIn(BaseModel):
+    type: GateEventType
+    license_plate: str
+    timestamp: datetime
+    vehicle_type: Optional[str] = "carro"
+    owner_name: Optional[str] = None
+    phone: Optional[str] = None
+
+
+class GateEventResult(BaseModel):
+    index: int
+    type: GateEventType
+    license_plate: str
+    success: bool
+    message: str
+    id: Optional[int] = None
+    session_id: Optional[int] = None
+    # Mismos campos que las filas de /active y /today (viajan en los eventos SSE)
+    vehicle_type: Optional[str] = None
+    status: Optional[str] = None
+    registration_value: Optional[float] = None
+    entry_time: datetime | None = None
+    exit_time: datetime | None = None
+    invoice_number: Optional[str] = None
+    total_amount: float = 0
+    parking_time: int = 0
+    occupancy: Optional[int] = None
+
+
+class GateBatchResponseMessage(BaseModel):
+    success: bool
+    message: str
+    processed: int
+    failed: int
+    results: List[GateEventResult]
+
+
+# 🔹 Resumen diario (desde daily_rollups)
+class DailyRollupRow(BaseModel):
+    vehicle_type: str
+    entries: int
+    exits: int
+    revenue: float
+    total_minutes: int
+    average_stay_minutes: float
+
+
+class DailySummaryResponseMessage(BaseModel):
+    success: bool
+    message: str
+    day: date
+    entries: int
+    exits: int
+    revenue: float
+    average_stay_minutes: float
+    by_type: List[DailyRollupRow]
+
+
+# 🔹 Contadores del tablero
+class VehicleStatsResponse(BaseModel):
+    success: bool
+    message: str
+    day: date
+    occupancy: int
+    entries_today: int
+    exits_today: int
+    revenue_today: float
+    total_visits: int
+    reconciled_at: datetime | None = None
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+from datetime import timedelta
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.timezone import lot_now
+from app.models.change_log import ChangeLog, ChangeVersion
+from app.utils import upsert_insert
+
+logger = logging.getLogger(__name__)
+
+CHANGE_LOG_COMPACT_SECONDS = float(os.getenv("CHANGE_LOG_COMPACT_SECONDS", 600))
+# Cambios más viejos que esto se borran; clientes que no sincronizan hace más recargan completo
+CHANGE_LOG_RETENTION_HOURS = float(os.getenv("CHANGE_LOG_RETENTION_HOURS", 168))
+
+SESSION = "session"
+INVOICE = "invoice"
+
+
+async def _ensure_version_row(db: AsyncSession) -> None:
+    insert_ = upsert_insert(db)
+    if insert_ is not None:
+        await db.execute(
+            insert_(ChangeVersion).values(id=1, last_value=0).on_conflict_do_nothing(index_elements=["id"])
+        )
+        return
+    try:
+        async with db.begin_nested():
+            db.add(ChangeVersion(id=1, last_value=0))
+    except IntegrityError:
+        pass  # otra transacción creó la fila primero
+
+
+# Reservar `count` versiones consecutivas; devuelve la última
+async def _allocate_versions(db: AsyncSession, count: int) -> int:
+    bump = update(ChangeVersion).where(ChangeVersion.id == 1).values(last_value=ChangeVersion.last_value + count)
+    returning = db.get_bind().dialect.update_returning
+    if returning:
+        bump = bump.returning(ChangeVersion.last_value)
+
+    async def run_bump():
+        result = await db.execute(bump)
+        if returning:
+            return result.scalar_one_or_none()
+        if result.rowcount == 0:
+            return None
+        return (await db.get(ChangeVersion, 1, populate_existing=True)).last_value
+
+    last = await run_bump()
+    if last is None:
+        await _ensure_version_row(db)
+        last = await run_bump()
+    return last
+
+
+# 📝 Anotar cambios en la misma transacción que los produce (un INSERT para todos)
+async def record_changes(db: AsyncSession, changes: list[tuple[str, int]]) -> None:
+    changes = list(dict.fromkeys(changes))  # sin repetidos, conservando el orden
+    if not changes:
+        return
+    last = await _allocate_versions(db, len(changes))
+    first = last - len(changes) + 1
+    now = lot_now()
+    await db.execute(
+        insert(ChangeLog),
+        [
+            {"version": first + offset, "entity": entity, "entity_id": entity_id, "changed_at": now}
+            for offset, (entity, entity_id) in enumerate(changes)
+        ],
+    )
+
+
+# (última versión, versión hasta la que se recortó el registro) en una consulta
+async def version_bounds(db: AsyncSession) -> tuple[int, int]:
+    row = (await db.execute(
+        select(ChangeVersion.last_value, ChangeVersion.pruned_through).where(ChangeVersion.id == 1)
+    )).first()
+    return (row.last_value, row.pruned_through) if row else (0, 0)
+
+
+async def fetch_changes(db: AsyncSession, since: int, limit: int) -> list[ChangeLog]:
+    result = await db.execute(
+        select(ChangeLog).where(ChangeLog.version > since).order_by(ChangeLog.version).limit(limit)
+    )
+    return list(result.scalars())
+
+
+# 🧹 Compactación:
+# 1. Retención: se borra todo lo anterior a CHANGE_LOG_RETENTION_HOURS y la versión de
+#    corte queda en pruned_through (un `since` anterior recibe reset=True). Así el
+#    registro no crece con el historial completo.
+# 2. Dentro de la ventana, por entidad solo importa su último cambio: se borran las
+#    versiones anteriores. Cualquier `since` sigue recibiendo el estado final de cada fila.
+async def compact_change_log(db: AsyncSession) -> int:
+    horizon = lot_now() - timedelta(hours=CHANGE_LOG_RETENTION_HOURS)
+    cut = await db.scalar(select(func.max(ChangeLog.version)).where(ChangeLog.changed_at < horizon))
+    removed = 0
+    if cut is not None:
+        await db.execute(
+            update(ChangeVersion)
+            .where(ChangeVersion.id == 1, ChangeVersion.pruned_through < cut)
+            .values(pruned_through=cut)
+        )
+        result = await db.execute(
+            delete(ChangeLog).where(ChangeLog.version <= cut).execution_options(synchronize_session=False)
+        )
+        removed += result.rowcount
+
+    latest = select(func.max(ChangeLog.version)).group_by(ChangeLog.entity, ChangeLog.entity_id)
+    result = await db.execute(
+        delete(ChangeLog)
+        .where(ChangeLog.version.not_in(latest))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return removed + result.rowcount
+
+
+async def run_compaction(session_factory, interval: float = CHANGE_LOG_COMPACT_SECONDS) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as db:
+                removed = await compact_change_log(db)
+            if removed:
+                logger.info("Registro de cambios compactado: %d filas", removed)
+        except Exception:
+            logger.exception("Fallo compactando el registro de cambios")
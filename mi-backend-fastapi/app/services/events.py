@@ -0,0 +1,132 @@
+import asyncio
+import os
+from collections import deque
+from dataclasses import dataclass
+
+from app.core.serialization import dumps
+
+EVENTS_BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER_SIZE", 1000))
+EVENTS_SUBSCRIBER_QUEUE = int(os.getenv("EVENTS_SUBSCRIBER_QUEUE", 256))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15))
+
+# Campos que viajan en cada evento (los mismos nombres que las filas de /active y /today)
+EVENT_FIELDS = (
+    "id", "session_id", "license_plate", "vehicle_type", "status", "entry_time", "exit_time",
+    "registration_value", "invoice_number", "total_amount", "parking_time", "occupancy",
+)
+
+
+@dataclass
+class HubEvent:
+    id: int
+    type: str  # "entry" | "exit" | "invoice" | "reset"
+    data: dict
+
+    def encode(self) -> str:
+        # Formato Server-Sent Events; el id permite reanudar con Last-Event-ID
+        return f"id: {self.id}\nevent: {self.type}\ndata: {dumps(self.data).decode()}\n\n"
+
+
+class Subscriber:
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue[HubEvent] = asyncio.Queue(maxsize=maxsize)
+        self.lagged = False  # se llenó la cola: el cliente debe reconectarse y reanudar
+
+
+# 📡 Difusión de entradas/salidas/facturas a los tableros abiertos.
+# Guarda los últimos EVENTS_BUFFER_SIZE eventos con ids crecientes para reanudar desde
+# Last-Event-ID; cada suscriptor tiene una cola acotada y, si no la vacía a tiempo, se
+# desconecta en lugar de frenar a los demás. Es por proceso, como el índice de ocupación.
+class EventHub:
+    def __init__(self, buffer_size: int = EVENTS_BUFFER_SIZE, queue_size: int = EVENTS_SUBSCRIBER_QUEUE):
+        self._buffer: deque[HubEvent] = deque(maxlen=buffer_size)
+        self._subscribers: set[Subscriber] = set()
+        self._queue_size = queue_size
+        self.last_id = 0
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, event_type: str, data: dict) -> HubEvent:
+        self.last_id += 1
+        event = HubEvent(self.last_id, event_type, data)
+        self._buffer.append(event)
+        self.published += 1
+        for subscriber in list(self._subscribers):
+            if subscriber.lagged:
+                continue
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscriber.lagged = True
+                self.dropped += 1
+        return event
+
+    # Eventos posteriores a `last_event_id`; None si ya salieron del buffer (hay que recargar)
+    def replay(self, last_event_id: int) -> list[HubEvent] | None:
+        if last_event_id > self.last_id:
+            return None  # id de otro proceso o de antes de un reinicio
+        if last_event_id == self.last_id:
+            return []
+        if not self._buffer or last_event_id < self._buffer[0].id - 1:
+            return None
+        return [event for event in self._buffer if event.id > last_event_id]
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self._queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "last_id": self.last_id,
+            "buffered": len(self._buffer),
+            "published": self.published,
+            "dropped_subscribers": self.dropped,
+        }
+
+
+event_hub = EventHub()
+
+
+def event_payload(response) -> dict:
+    data = response.model_dump(mode="json", include=set(EVENT_FIELDS))
+    return {key: value for key, value in data.items() if value is not None}
+
+
+# Publicar una entrada/salida confirmada (respuesta del gate o resultado de lote)
+def publish_gate_event(kind: str, response) -> None:
+    if response.success:
+        event_hub.publish(kind, event_payload(response))
+
+
+# 🌊 Stream SSE de un suscriptor: primero lo pendiente desde `last_event_id`, luego en vivo.
+# Si el id ya no está en el buffer se envía "reset" (el cliente recarga sus listas).
+async def sse_stream(hub: EventHub, last_event_id: int | None):
+    subscriber = hub.subscribe()
+    try:
+        yield "retry: 3000\n\n"
+        sent = hub.last_id if last_event_id is None else last_event_id
+        backlog = hub.replay(sent)
+        if backlog is None:
+            sent = hub.last_id
+            yield HubEvent(sent, "reset", {}).encode()
+        for event in backlog or []:
+            yield event.encode()
+            sent = event.id
+
+        # Un suscriptor atrasado vacía su cola y termina; EventSource se reconecta con Last-Event-ID
+        while not (subscriber.lagged and subscriber.queue.empty()):
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if event.id > sent:
+                yield event.encode()
+                sent = event.id
+    finally:
+        hub.unsubscribe(subscriber)
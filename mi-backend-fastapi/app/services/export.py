@@ -0,0 +1,233 @@
+import csv
+import io
+import os
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.timezone import date_range, to_lot_time
+from app.models.invoice import Invoice
+from app.models.parking_session import ParkingSession
+from app.models.vehicle import Vehicle
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 5000))
+
+# 📤 Exportaciones para contabilidad. Se leen con cursor del lado del servidor
+# (stream_results + yield_per) y se escriben por bloques de EXPORT_BATCH_SIZE filas:
+# la memoria no depende del tamaño del rango.
+
+
+@dataclass(frozen=True)
+class ExportColumn:
+    name: str
+    kind: str  # "int" | "float" | "str" | "datetime"
+
+
+def _invoices_query(date_from: date | None, date_to: date | None):
+    stmt = (
+        select(
+            Invoice.id,
+            Invoice.invoice_number,
+            Invoice.date,
+            Invoice.vehicle_id,
+            Vehicle.license_plate,
+            Vehicle.vehicle_type,
+            Invoice.user_id,
+            Invoice.total_amount,
+            Invoice.parking_time,
+        )
+        .join(Vehicle, Vehicle.id == Invoice.vehicle_id)
+        .order_by(Invoice.id)
+    )
+    start, end = date_range(date_from, date_to)
+    if start:
+        stmt = stmt.where(Invoice.date >= start)
+    if end:
+        stmt = stmt.where(Invoice.date < end)
+    return stmt
+
+
+def _sessions_query(date_from: date | None, date_to: date | None):
+    stmt = (
+        select(
+            ParkingSession.id,
+            ParkingSession.vehicle_id,
+            Vehicle.license_plate,
+            Vehicle.vehicle_type,
+            ParkingSession.entry_time,
+            ParkingSession.exit_time,
+            ParkingSession.minutes,
+            ParkingSession.amount,
+            Invoice.invoice_number,
+        )
+        .join(Vehicle, Vehicle.id == ParkingSession.vehicle_id)
+        .outerjoin(Invoice, Invoice.id == ParkingSession.invoice_id)
+        .order_by(ParkingSession.id)
+    )
+    start, end = date_range(date_from, date_to)
+    if start:
+        stmt = stmt.where(ParkingSession.entry_time >= start)
+    if end:
+        stmt = stmt.where(ParkingSession.entry_time < end)
+    return stmt
+
+
+# dataset -> (columnas en el orden del SELECT, constructor de la consulta)
+DATASETS = {
+    "invoices": (
+        [
+            ExportColumn("id", "int"),
+            ExportColumn("invoice_number", "str"),
+            ExportColumn("date", "datetime"),
+            ExportColumn("vehicle_id", "int"),
+            ExportColumn("license_plate", "str"),
+            ExportColumn("vehicle_type", "str"),
+            ExportColumn("user_id", "int"),
+            ExportColumn("total_amount", "float"),
+            ExportColumn("parking_time", "int"),
+        ],
+        _invoices_query,
+    ),
+    "sessions": (
+        [
+            ExportColumn("session_id", "int"),
+            ExportColumn("vehicle_id", "int"),
+            ExportColumn("license_plate", "str"),
+            ExportColumn("vehicle_type", "str"),
+            ExportColumn("entry_time", "datetime"),
+            ExportColumn("exit_time", "datetime"),
+            ExportColumn("minutes", "int"),
+            ExportColumn("amount", "float"),
+            ExportColumn("invoice_number", "str"),
+        ],
+        _sessions_query,
+    ),
+}
+
+FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def _normalize(value):
+    # Horas con zona (PostgreSQL) -> hora local del lote, igual que las demás columnas
+    return to_lot_time(value) if isinstance(value, datetime) else value
+
+
+class CsvEncoder:
+    def __init__(self, columns: list[ExportColumn]):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._writer.writerow([column.name for column in columns])
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def encode(self, rows) -> bytes:
+        self._writer.writerows(
+            [v.isoformat() if isinstance(v, datetime) else v for v in map(_normalize, row)] for row in rows
+        )
+        return self._drain()
+
+    def close(self) -> bytes:
+        return self._drain()
+
+
+# Destino de solo escritura para ParquetWriter: acumula los bytes de cada row group para
+# enviarlos y llevar la posición (Parquet la necesita para el pie del archivo)
+class _ChunkSink(io.RawIOBase):
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetEncoder:
+    def __init__(self, columns: list[ExportColumn]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("La exportación Parquet requiere pyarrow (pip install pyarrow)")
+
+        types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string(), "datetime": pa.timestamp("us")}
+        self._pa = pa
+        self._schema = pa.schema([(column.name, types[column.kind]) for column in columns])
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression="snappy")
+
+    def encode(self, rows) -> bytes:
+        # Cada bloque es un row group: columnas construidas solo con las filas del bloque
+        rows = [tuple(map(_normalize, row)) for row in rows]
+        if rows:
+            arrays = [
+                self._pa.array(values, type=field.type)
+                for values, field in zip(zip(*rows), self._schema)
+            ]
+            self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+ENCODERS = {"csv": CsvEncoder, "parquet": ParquetEncoder}
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def export_filename(dataset: str, fmt: str, date_from: date | None, date_to: date | None) -> str:
+    span = "_".join(d.isoformat() for d in (date_from, date_to) if d) or "completo"
+    return f"{dataset}_{span}.{fmt}"
+
+
+# 🌊 Versión asíncrona (endpoint): bloques desde AsyncSession.stream
+async def export_chunks_async(db: AsyncSession, dataset: str, fmt: str, date_from=None, date_to=None):
+    columns, build_query = DATASETS[dataset]
+    encoder = ENCODERS[fmt](columns)
+    stmt = build_query(date_from, date_to).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    result = await db.stream(stmt)
+    async for rows in result.partitions():
+        chunk = encoder.encode(rows)
+        if chunk:
+            yield chunk
+    yield encoder.close()
+
+
+# 🖥️ Versión síncrona (CLI): misma salida, con el motor síncrono
+def export_chunks(db: Session, dataset: str, fmt: str, date_from=None, date_to=None):
+    columns, build_query = DATASETS[dataset]
+    encoder = ENCODERS[fmt](columns)
+    stmt = build_query(date_from, date_to).execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+    for rows in db.execute(stmt).partitions():
+        chunk = encoder.encode(rows)
+        if chunk:
+            yield chunk
+    yield encoder.close()
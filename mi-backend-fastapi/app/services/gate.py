@@ -0,0 +1,257 @@
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.vehicle import Vehicle
+from app.models.invoice import Invoice
+from app.models.parking_session import ParkingSession
+from app.utils import generate_invoice_number
+from app.services.occupancy import OccupancyEntry, occupancy_index
+from app.services.rollups import RollupDelta, apply_rollup_delta
+from app.services.change_log import INVOICE, SESSION, record_changes
+from app.services.events import publish_gate_event
+from app.services.occupancy_series import OccupancyDelta, apply_occupancy_delta, count_open_sessions, minute_of, occupancy_ring
+from app.services.stats import parking_stats
+from app.services.tariffs import current_tariff, vehicle_label
+from app.schemas.vehicle import VehicleEntryResponseMessage, VehicleExitResponseMessage
+
+# Lógica de entrada/salida compartida por el router (modo directo) y el batcher.
+# Las funciones apply_* solo hacen flush: el commit lo decide quien las llama.
+# Los HTTPException se lanzan siempre antes de modificar nada.
+
+
+# 💰 Minutos y valor a cobrar por una estadía que termina en `exit_time` (motor de tarifas)
+def calculate_parking_charge(vehicle: Vehicle, exit_time: datetime) -> tuple[int, int]:
+    return current_tariff.fare(vehicle.vehicle_type, vehicle.entry_time, exit_time)
+
+
+# 📈 Ocupación tras el cambio (visitas abiertas ya con flush) guardada en su minuto
+async def record_occupancy(db: AsyncSession, now: datetime) -> int:
+    occupancy = await count_open_sessions(db)
+    await apply_occupancy_delta(db, OccupancyDelta().record(now, occupancy))
+    return occupancy
+
+
+# 🚗 Registrar entrada: vehículo + factura vacía + visita en la misma transacción
+async def apply_entry(
+    db: AsyncSession,
+    license_plate: str,
+    payload: dict | None,
+    now: datetime,
+) -> VehicleEntryResponseMessage:
+    vehicle_type = (payload or {}).get("vehicle_type", "carro")
+    owner_name = (payload or {}).get("owner_name")
+    phone = (payload or {}).get("phone")
+    try:
+        tipo_label = vehicle_label(vehicle_type)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    registration_value = current_tariff.registration_value(tipo_label)
+
+    # 🚫 Ya está dentro (respondido desde el índice de ocupación, sin ir a la BD)
+    active = occupancy_index.get(license_plate) if occupancy_index.ready else None
+    if active:
+        return VehicleEntryResponseMessage(
+            success=False,
+            message="El vehículo ya está registrado 'en parqueadero'. No se permite una nueva entrada.",
+            id=active.vehicle_id,
+            license_plate=active.license_plate,
+            vehicle_type=active.vehicle_type,
+            status=active.status,
+            entry_time=active.entry_time,
+            invoice_number=None,
+            registration_value=active.registration_value,
+            total_amount=0,
+            parking_time=0
+        )
+
+    # Si hubiera placas repetidas gana el de menor id, como en /batch
+    result = await db.execute(
+        select(Vehicle).where(Vehicle.license_plate == license_plate).order_by(Vehicle.id).limit(1)
+    )
+    vehicle = result.scalars().first()
+
+    if vehicle and vehicle.is_inside:
+        return VehicleEntryResponseMessage(
+            success=False,
+            message="El vehículo ya está registrado 'en parqueadero'. No se permite una nueva entrada.",
+            id=vehicle.id,
+            license_plate=vehicle.license_plate,
+            vehicle_type=vehicle.vehicle_type,
+            status=vehicle.status,
+            entry_time=vehicle.entry_time,
+            invoice_number=None,
+            registration_value=vehicle.registration_value,
+            total_amount=0,
+            parking_time=0
+        )
+
+    # 🆕 Nuevo vehículo
+    if not vehicle:
+        vehicle = Vehicle(
+            license_plate=license_plate,
+            vehicle_type=tipo_label,
+            owner_name=owner_name,
+            phone=phone,
+            status="en parqueadero",
+            is_inside=True,
+            entry_time=now,
+            registration_value=registration_value
+        )
+        db.add(vehicle)
+    else:
+        # 🔄 Actualizar existente
+        vehicle.vehicle_type = tipo_label
+        vehicle.owner_name = owner_name or vehicle.owner_name
+        vehicle.phone = phone or vehicle.phone
+        vehicle.status = "en parqueadero"
+        vehicle.is_inside = True
+        vehicle.entry_time = now
+        vehicle.registration_value = registration_value
+
+    await db.flush()
+
+    # 🧾 Crear factura vacía y abrir la visita
+    invoice = Invoice(
+        invoice_number=await generate_invoice_number(db, now),
+        vehicle_id=vehicle.id,
+        date=now,
+        total_amount=0,
+        parking_time=0
+    )
+    db.add(invoice)
+    await db.flush()
+
+    session = ParkingSession(vehicle_id=vehicle.id, invoice_id=invoice.id, entry_time=now, amount=0, minutes=0)
+    db.add(session)
+    await apply_rollup_delta(db, RollupDelta().entry(now.date(), vehicle.vehicle_type))
+    await db.flush()
+    await record_changes(db, [(SESSION, session.id), (INVOICE, invoice.id)])
+    occupancy = await record_occupancy(db, now)
+
+    return VehicleEntryResponseMessage(
+        success=True,
+        message="Vehículo registrado con éxito",
+        id=vehicle.id,
+        license_plate=vehicle.license_plate,
+        vehicle_type=vehicle.vehicle_type,
+        status=vehicle.status,
+        entry_time=vehicle.entry_time,
+        invoice_number=invoice.invoice_number,
+        registration_value=vehicle.registration_value,
+        total_amount=invoice.total_amount,
+        parking_time=invoice.parking_time,
+        session_id=session.id,
+        occupancy=occupancy
+    )
+
+
+# 🚙 Registrar salida: cerrar la visita abierta y su factura
+async def apply_exit(db: AsyncSession, license_plate: str, now: datetime) -> VehicleExitResponseMessage:
+    active = occupancy_index.get(license_plate) if occupancy_index.ready else None
+    if active:
+        # Acceso por clave primaria; si el índice quedó desactualizado se descarta la entrada
+        vehicle = await db.get(Vehicle, active.vehicle_id)
+        if vehicle is None or not vehicle.is_inside:
+            occupancy_index.remove(license_plate)
+            vehicle = None
+    else:
+        # Relajar filtro: placa y que esté En parqueadero o dentro
+        result = await db.execute(
+            select(Vehicle)
+            .where(Vehicle.license_plate == license_plate)
+            .where((Vehicle.is_inside == True) | (Vehicle.status == "En Parqueadero"))
+            .order_by(Vehicle.id)
+            .limit(1)
+        )
+        vehicle = result.scalars().first()
+
+    if not vehicle:
+        raise HTTPException(status_code=404, detail="Vehículo no encontrado o no está En parqueadero.")
+
+    if not vehicle.entry_time:
+        raise HTTPException(status_code=400, detail="El vehículo no tiene hora de entrada registrada.")
+
+    # Visita abierta (índice parcial ix_parking_sessions_open); se lee antes de modificar nada
+    session = None
+    if active and active.session_id:
+        session = await db.get(ParkingSession, active.session_id)
+    if session is None or session.exit_time is not None:
+        result = await db.execute(
+            select(ParkingSession)
+            .where(ParkingSession.vehicle_id == vehicle.id, ParkingSession.exit_time.is_(None))
+            .order_by(ParkingSession.id.desc())
+            .limit(1)
+        )
+        session = result.scalars().first()
+    invoice = await db.get(Invoice, session.invoice_id) if session and session.invoice_id else None
+
+    parking_time_minutes, total_amount = calculate_parking_charge(vehicle, now)
+
+    # Actualizar vehículo, visita y factura
+    vehicle.exit_time = now
+    vehicle.is_inside = False
+    vehicle.status = "Fuera"
+    if session is None:
+        # Vehículo marcado dentro sin visita abierta (datos previos a parking_sessions)
+        session = ParkingSession(vehicle_id=vehicle.id, entry_time=vehicle.entry_time)
+        db.add(session)
+    session.exit_time = now
+    session.minutes = parking_time_minutes
+    session.amount = total_amount
+    if invoice:
+        invoice.parking_time = parking_time_minutes
+        invoice.total_amount = total_amount
+    await apply_rollup_delta(
+        db, RollupDelta().exit(now.date(), vehicle.vehicle_type, total_amount, parking_time_minutes)
+    )
+    await db.flush()
+    await record_changes(db, [(SESSION, session.id)] + ([(INVOICE, invoice.id)] if invoice else []))
+    occupancy = await record_occupancy(db, now)
+
+    return VehicleExitResponseMessage(
+        success=True,
+        message="Salida registrada y factura actualizada correctamente",
+        id=vehicle.id,
+        license_plate=vehicle.license_plate,
+        vehicle_type=vehicle.vehicle_type,
+        entry_time=vehicle.entry_time,
+        exit_time=vehicle.exit_time,
+        status=vehicle.status,
+        invoice_number=invoice.invoice_number if invoice else None,
+        total_amount=session.amount,
+        parking_time=session.minutes,
+        session_id=session.id,
+        occupancy=occupancy
+    )
+
+
+# 🅿️ Reflejar en el índice de ocupación una entrada/salida aplicada
+def update_occupancy(kind: str, response) -> None:
+    if not response.success:
+        return
+    if kind == "entry":
+        occupancy_index.add(OccupancyEntry(
+            vehicle_id=response.id,
+            license_plate=response.license_plate,
+            vehicle_type=response.vehicle_type,
+            entry_time=response.entry_time,
+            registration_value=response.registration_value,
+            status=response.status,
+            invoice_number=response.invoice_number,
+            session_id=response.session_id,
+        ))
+    else:
+        occupancy_index.remove(response.license_plate)
+
+
+# ✅ Efectos en memoria de una entrada/salida ya confirmada (commit hecho)
+def on_committed(kind: str, response) -> None:
+    update_occupancy(kind, response)
+    if response.success and response.occupancy is not None:
+        at = response.entry_time if kind == "entry" else response.exit_time
+        occupancy_ring.record(minute_of(at), response.occupancy, response.occupancy)
+    parking_stats.record(kind, response)
+    publish_gate_event(kind, response)
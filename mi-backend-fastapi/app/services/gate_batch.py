@@ -0,0 +1,300 @@
+from collections import defaultdict
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.vehicle import Vehicle
+from app.models.invoice import Invoice
+from app.models.parking_session import ParkingSession
+from app.core.timezone import lot_now, to_lot_time
+from app.utils import allocate_invoice_numbers
+from app.services.change_log import INVOICE, SESSION, record_changes
+from app.services.gate import calculate_parking_charge
+from app.services.occupancy import OccupancyEntry, occupancy_index
+from app.services.occupancy_series import OccupancyDelta, apply_occupancy_delta, count_open_sessions
+from app.services.rollups import RollupDelta, apply_rollup_delta
+from app.services.tariffs import current_tariff, vehicle_label
+from app.services.vehicle_projection import STATUS_INSIDE
+from app.schemas.vehicle import GateEventIn, GateEventResult, GateEventType
+
+
+VEHICLE_COLUMNS = (
+    "license_plate", "owner_name", "phone", "vehicle_type", "is_inside",
+    "status", "entry_time", "exit_time", "registration_value",
+)
+
+
+# INSERT múltiple que devuelve los ids en el orden de `rows`. En PostgreSQL lo garantiza
+# sort_by_parameter_order. SQLite no tiene centinela implícito y SQLAlchemy bajaría a una
+# sentencia por fila; como SQLite asigna los rowid de un INSERT en orden creciente
+# (máximo + 1 por fila), basta con ordenar los ids devueltos.
+async def insert_ids(db: AsyncSession, model, rows: list[dict]) -> list[int]:
+    if db.get_bind().dialect.name == "sqlite":
+        return sorted(await db.scalars(insert(model).returning(model.id), rows))
+    return list(await db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows))
+
+
+# 📦 Lote de eventos de cámaras en una sola transacción y con SQL por conjuntos:
+#   1 consulta de vehículos por placa, 1 de visitas abiertas (con su factura),
+#   1 flush de vehículos modificados, 1 INSERT múltiple de vehículos nuevos, 1 reserva
+#   de consecutivos por día, 1 INSERT múltiple de facturas, 1 de visitas y 1 UPDATE
+#   múltiple de visitas y facturas cerradas.
+#   Cada evento usa su propio timestamp.
+async def apply_gate_batch(
+    db: AsyncSession, events: list[GateEventIn]
+) -> tuple[list[GateEventResult], list[tuple[str, OccupancyEntry | None]], list[tuple]]:
+    plates = {event.license_plate for event in events}
+    # Ocupación antes del lote; se recorre en orden de timestamps
+    level = await count_open_sessions(db)
+
+    # 🔎 Vehículos del lote (si hay duplicados por placa, gana el de menor id)
+    result = await db.execute(
+        select(Vehicle).where(Vehicle.license_plate.in_(plates)).order_by(Vehicle.id.desc())
+    )
+    vehicles = {vehicle.license_plate: vehicle for vehicle in result.scalars()}
+
+    # 🅿️ Visitas abiertas de esos vehículos. Por placa: ORM (ya en la BD) o dict (nueva en el lote)
+    plate_by_vehicle_id = {v.id: plate for plate, v in vehicles.items()}
+    result = await db.execute(
+        select(ParkingSession, Invoice.invoice_number)
+        .outerjoin(Invoice, Invoice.id == ParkingSession.invoice_id)
+        .where(
+            ParkingSession.vehicle_id.in_(plate_by_vehicle_id.keys()),
+            ParkingSession.exit_time.is_(None),
+        )
+        .order_by(ParkingSession.id)
+    )
+    open_visit = {}
+    invoice_numbers = {}  # id de visita existente -> número de factura
+    for session, invoice_number in result:
+        open_visit[plate_by_vehicle_id[session.vehicle_id]] = session
+        invoice_numbers[session.id] = invoice_number
+
+    new_vehicles = []     # se insertan juntos después del recorrido, con su estado final
+    new_visits = []       # dicts a insertar (ids y números se completan al final)
+    closed_sessions = {}  # id -> cambios para el UPDATE múltiple
+    closed_invoices = {}
+    results: dict[int, GateEventResult] = {}
+    pending = []          # (resultado, vehículo, visita) a completar tras los INSERT
+    rollups = RollupDelta()
+    occupancy = OccupancyDelta()
+
+    def fail(index, event, message, vehicle=None):
+        results[index] = GateEventResult(
+            index=index,
+            type=event.type,
+            license_plate=event.license_plate,
+            success=False,
+            message=message,
+            id=vehicle.id if vehicle else None,
+        )
+
+    # El orden de aplicación es el de los timestamps (estable para empates)
+    ordered = sorted(enumerate(events), key=lambda item: to_lot_time(item[1].timestamp))
+    for index, event in ordered:
+        plate = event.license_plate
+        vehicle = vehicles.get(plate)
+        now = to_lot_time(event.timestamp)
+
+        if event.type == GateEventType.entry:
+            if vehicle and vehicle.is_inside:
+                fail(index, event, "El vehículo ya está registrado 'en parqueadero'.", vehicle)
+                continue
+
+            try:
+                tipo_label = vehicle_label(event.vehicle_type)
+            except ValueError as exc:
+                fail(index, event, str(exc), vehicle)
+                continue
+            if not vehicle:
+                vehicle = Vehicle(license_plate=plate, owner_name=event.owner_name, phone=event.phone)
+                new_vehicles.append(vehicle)
+                vehicles[plate] = vehicle
+            else:
+                vehicle.owner_name = event.owner_name or vehicle.owner_name
+                vehicle.phone = event.phone or vehicle.phone
+            vehicle.vehicle_type = tipo_label
+            vehicle.status = STATUS_INSIDE
+            vehicle.is_inside = True
+            vehicle.entry_time = now
+            vehicle.registration_value = current_tariff.registration_value(tipo_label)
+
+            visit = {"vehicle": vehicle, "entry_time": now, "exit_time": None, "amount": 0, "minutes": 0, "with_invoice": True}
+            new_visits.append(visit)
+            open_visit[plate] = visit
+            rollups.entry(now.date(), tipo_label)
+            level += 1
+            occupancy.record(now, level)
+            results[index] = GateEventResult(
+                index=index,
+                type=event.type,
+                license_plate=plate,
+                success=True,
+                message="Vehículo registrado con éxito",
+                vehicle_type=tipo_label,
+                status=STATUS_INSIDE,
+                registration_value=vehicle.registration_value,
+                entry_time=now,
+                occupancy=level,
+            )
+        else:
+            if not vehicle or not vehicle.is_inside:
+                fail(index, event, "Vehículo no encontrado o no está En parqueadero.", vehicle)
+                continue
+            if not vehicle.entry_time:
+                fail(index, event, "El vehículo no tiene hora de entrada registrada.", vehicle)
+                continue
+            if now < vehicle.entry_time:
+                fail(index, event, "La hora de salida es anterior a la hora de entrada.", vehicle)
+                continue
+
+            minutes, amount = calculate_parking_charge(vehicle, now)
+            rollups.exit(now.date(), vehicle.vehicle_type, amount, minutes)
+            vehicle.exit_time = now
+            vehicle.is_inside = False
+            vehicle.status = "Fuera"
+
+            visit = open_visit.pop(plate, None)
+            if visit is None:
+                # Vehículo marcado dentro sin visita abierta (datos previos a parking_sessions)
+                visit = {"vehicle": vehicle, "entry_time": vehicle.entry_time, "with_invoice": False}
+                new_visits.append(visit)
+            else:
+                level -= 1
+            occupancy.record(now, level)
+            if isinstance(visit, dict):
+                visit.update(exit_time=now, amount=amount, minutes=minutes)
+            else:
+                closed_sessions[visit.id] = {"id": visit.id, "exit_time": now, "amount": amount, "minutes": minutes}
+                if visit.invoice_id:
+                    closed_invoices[visit.invoice_id] = {"id": visit.invoice_id, "total_amount": amount, "parking_time": minutes}
+            results[index] = GateEventResult(
+                index=index,
+                type=event.type,
+                license_plate=plate,
+                success=True,
+                message="Salida registrada y factura actualizada correctamente",
+                vehicle_type=vehicle.vehicle_type,
+                status=vehicle.status,
+                registration_value=vehicle.registration_value,
+                entry_time=vehicle.entry_time,
+                exit_time=now,
+                total_amount=amount,
+                parking_time=minutes,
+                occupancy=level,
+            )
+        pending.append((results[index], vehicle, visit))
+
+    # Ocupación real al confirmar: los minutos posteriores a un evento atrasado quedan
+    # aproximados, pero el minuto actual siempre refleja el total
+    if occupancy:
+        occupancy.record(max(lot_now(), occupancy.points()[-1][0]), level)
+
+    # 💾 Vehículos modificados en un solo flush; los nuevos en un INSERT múltiple
+    await db.flush()
+    if new_vehicles:
+        vehicle_ids = await insert_ids(
+            db, Vehicle, [{column: getattr(vehicle, column) for column in VEHICLE_COLUMNS} for vehicle in new_vehicles]
+        )
+        for vehicle, vehicle_id in zip(new_vehicles, vehicle_ids):
+            vehicle.id = vehicle_id
+
+    # Consecutivos: una reserva por día en lugar de una por factura
+    invoiced = [visit for visit in new_visits if visit["with_invoice"]]
+    by_day = defaultdict(list)
+    for visit in invoiced:
+        by_day[visit["entry_time"].strftime("%Y%m%d")].append(visit)
+    for day_visits in by_day.values():
+        numbers = await allocate_invoice_numbers(db, len(day_visits), day_visits[0]["entry_time"])
+        for visit, number in zip(day_visits, numbers):
+            visit["invoice_number"] = number
+
+    if invoiced:
+        invoice_ids = await insert_ids(
+            db,
+            Invoice,
+            [
+                {
+                    "invoice_number": visit["invoice_number"],
+                    "vehicle_id": visit["vehicle"].id,
+                    "date": visit["entry_time"],
+                    "total_amount": visit["amount"],
+                    "parking_time": visit["minutes"],
+                }
+                for visit in invoiced
+            ],
+        )
+        for visit, invoice_id in zip(invoiced, invoice_ids):
+            visit["invoice_id"] = invoice_id
+
+    if new_visits:
+        session_ids = await insert_ids(
+            db,
+            ParkingSession,
+            [
+                {
+                    "vehicle_id": visit["vehicle"].id,
+                    "invoice_id": visit.get("invoice_id"),
+                    "entry_time": visit["entry_time"],
+                    "exit_time": visit["exit_time"],
+                    "amount": visit["amount"],
+                    "minutes": visit["minutes"],
+                }
+                for visit in new_visits
+            ],
+        )
+        for visit, session_id in zip(new_visits, session_ids):
+            visit["id"] = session_id
+
+    if closed_sessions:
+        await db.execute(update(ParkingSession), list(closed_sessions.values()))
+    if closed_invoices:
+        await db.execute(update(Invoice), list(closed_invoices.values()))
+    await apply_rollup_delta(db, rollups)
+    await apply_occupancy_delta(db, occupancy)
+    await record_changes(
+        db,
+        [(SESSION, visit["id"]) for visit in new_visits]
+        + [(INVOICE, visit["invoice_id"]) for visit in invoiced]
+        + [(SESSION, session_id) for session_id in closed_sessions]
+        + [(INVOICE, invoice_id) for invoice_id in closed_invoices],
+    )
+
+    # Completar ids, visitas y números de factura en los resultados
+    def visit_info(visit):
+        if isinstance(visit, dict):
+            return visit["id"], visit.get("invoice_number")
+        return visit.id, invoice_numbers.get(visit.id)
+
+    for item, vehicle, visit in pending:
+        item.id = vehicle.id
+        item.session_id, item.invoice_number = visit_info(visit)
+
+    # Estado final de cada placa para el índice de ocupación (se aplica tras el commit)
+    occupancy_updates = []
+    for plate, vehicle in vehicles.items():
+        visit = open_visit.get(plate)
+        if not vehicle.is_inside or visit is None:
+            occupancy_updates.append((plate, None))
+            continue
+        session_id, invoice_number = visit_info(visit)
+        occupancy_updates.append((plate, OccupancyEntry(
+            vehicle_id=vehicle.id,
+            license_plate=vehicle.license_plate,
+            vehicle_type=vehicle.vehicle_type,
+            entry_time=vehicle.entry_time,
+            registration_value=vehicle.registration_value,
+            status=STATUS_INSIDE,
+            invoice_number=invoice_number,
+            session_id=session_id,
+        )))
+
+    return [results[index] for index in range(len(events))], occupancy_updates, occupancy.points()
+
+
+def apply_occupancy_updates(updates: list[tuple[str, OccupancyEntry | None]]) -> None:
+    for plate, entry in updates:
+        if entry is None:
+            occupancy_index.remove(plate)
+        else:
+            occupancy_index.add(entry)
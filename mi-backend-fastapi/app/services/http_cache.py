@@ -0,0 +1,96 @@
+import hashlib
+import os
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.change_log import ChangeVersion
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 256))
+
+# Identifica este proceso en ETags que dependen de estado en memoria (índice de ocupación)
+PROCESS_ID = uuid.uuid4().hex
+
+
+# 🗃️ Cuerpos JSON ya serializados, por URL y ETag (LRU). Es por proceso; como las
+# versiones salen de la BD, todos los procesos coinciden en cuándo una respuesta quedó vieja.
+class ResponseCache:
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[str, bytes, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: str, etag: str) -> tuple[bytes, dict] | None:
+        cached = self._entries.get(key)
+        if cached is None or cached[0] != etag:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return cached[1], cached[2]
+
+    def put(self, key: str, etag: str, body: bytes, headers: dict | None = None) -> None:
+        self._entries[key] = (etag, body, headers or {})
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+
+response_cache = ResponseCache()
+
+
+# Versión de los datos = contador global de change_versions. Solo sube: el máximo de
+# change_log no sirve porque la retención borra filas y podría repetir un ETag viejo.
+async def resource_version(db: AsyncSession) -> int:
+    return await db.scalar(select(ChangeVersion.last_value).where(ChangeVersion.id == 1)) or 0
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+# ⚡ GET condicional: 304 si el cliente ya tiene la versión; si no, cuerpo desde la
+# caché o construido con `build` (que devuelve el JSON ya serializado, o una tupla
+# (JSON, headers) si la respuesta lleva headers propios, p. ej. el cursor siguiente).
+# `version` identifica el estado de los datos: versión de change_log del recurso más lo
+# que no pasa por allí (p. ej. el día para /today).
+async def conditional_json(
+    request: Request, build: Callable[[], Awaitable[bytes | tuple[bytes, dict]]], *version
+) -> Response:
+    key = f"{request.url.path}?{request.url.query}"
+    digest = hashlib.blake2b(f"{key}|{version}".encode(), digest_size=16).hexdigest()
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if _matches(request.headers.get("if-none-match"), etag):
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers=headers)
+
+    cached = response_cache.get(key, etag)
+    if cached is None:
+        built = await build()
+        body, extra_headers = built if isinstance(built, tuple) else (built, {})
+        response_cache.put(key, etag, body, extra_headers)
+    else:
+        body, extra_headers = cached
+    return Response(content=body, media_type="application/json", headers={**headers, **extra_headers})
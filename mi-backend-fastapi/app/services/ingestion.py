@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from fastapi import HTTPException
+
+from app.core.timezone import lot_now
+from app.database.connection import AsyncSessionLocal
+from app.services.gate import apply_entry, apply_exit, on_committed, update_occupancy
+from app.services.occupancy import occupancy_index
+
+logger = logging.getLogger(__name__)
+
+# "direct": un commit por petición; "batched": commits agrupados por el batcher
+GATE_INGESTION_MODE = os.getenv("GATE_INGESTION_MODE", "direct")
+GATE_BATCH_MAX_SIZE = int(os.getenv("GATE_BATCH_MAX_SIZE", 64))
+GATE_BATCH_MAX_LATENCY_MS = float(os.getenv("GATE_BATCH_MAX_LATENCY_MS", 5))
+
+
+@dataclass
+class GateEvent:
+    kind: str  # "entry" | "exit"
+    license_plate: str
+    payload: dict | None
+    received_at: datetime
+    future: asyncio.Future = field(repr=False)
+
+
+# 🚦 Group commit: junta las entradas/salidas que llegan en una ventana corta y las
+# confirma en una sola transacción. Un único consumidor procesa la cola en orden de
+# llegada, así que el orden por placa se mantiene.
+class GateBatcher:
+    def __init__(self, session_factory, max_size: int = GATE_BATCH_MAX_SIZE, max_latency_ms: float = GATE_BATCH_MAX_LATENCY_MS):
+        self.session_factory = session_factory
+        self.max_size = max_size
+        self.max_latency = max_latency_ms / 1000
+        self._queue: asyncio.Queue[GateEvent] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self.batches = 0
+        self.events = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def submit(self, kind: str, license_plate: str, payload: dict | None = None):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(GateEvent(kind, license_plate, payload, lot_now(), future))
+        return await future
+
+    async def _collect(self) -> list[GateEvent]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_latency
+        while len(batch) < self.max_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            try:
+                await self._process(batch)
+            except Exception as exc:  # no debe morir el consumidor
+                logger.exception("Fallo procesando lote de portería")
+                for event in batch:
+                    if not event.future.done():
+                        event.future.set_exception(exc)
+
+    @staticmethod
+    async def _apply(db, event: GateEvent):
+        if event.kind == "entry":
+            return await apply_entry(db, event.license_plate, event.payload, event.received_at)
+        return await apply_exit(db, event.license_plate, event.received_at)
+
+    async def _process(self, batch: list[GateEvent]) -> None:
+        outcomes = []
+        try:
+            async with self.session_factory() as db:
+                for event in batch:
+                    try:
+                        response = await self._apply(db, event)
+                    except HTTPException as exc:
+                        # Rechazo de negocio: no modificó nada, el resto del lote sigue
+                        outcomes.append((event, None, exc))
+                        continue
+                    # El índice se actualiza en el acto para que los eventos
+                    # siguientes del lote vean el estado correcto de la placa
+                    update_occupancy(event.kind, response)
+                    outcomes.append((event, response, None))
+                await db.commit()
+        except Exception:
+            # Un evento rompió la transacción: se reintenta cada uno por separado
+            logger.exception("Lote de %d eventos revertido; reintentando uno a uno", len(batch))
+            async with self.session_factory() as db:
+                await occupancy_index.rebuild(db)
+            for event in batch:
+                await self._process_single(event)
+            return
+
+        self.batches += 1
+        self.events += len(batch)
+        for event, response, error in outcomes:
+            # Confirmado en la BD: índice, serie, /stats y SSE se actualizan aunque el
+            # cliente ya no espere la respuesta
+            if error is None:
+                on_committed(event.kind, response)
+            if event.future.done():
+                continue  # el cliente ya se desconectó
+            if error is not None:
+                event.future.set_exception(error)
+            else:
+                event.future.set_result(response)
+
+    async def _process_single(self, event: GateEvent) -> None:
+        try:
+            async with self.session_factory() as db:
+                response = await self._apply(db, event)
+                await db.commit()
+            on_committed(event.kind, response)
+            if not event.future.done():
+                event.future.set_result(response)
+        except Exception as exc:
+            if not event.future.done():
+                event.future.set_exception(exc)
+
+    def stats(self) -> dict:
+        return {
+            "mode": GATE_INGESTION_MODE,
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "events": self.events,
+            "avg_batch_size": round(self.events / self.batches, 2) if self.batches else 0,
+            "max_size": self.max_size,
+            "max_latency_ms": self.max_latency * 1000,
+        }
+
+
+gate_batcher = GateBatcher(AsyncSessionLocal)
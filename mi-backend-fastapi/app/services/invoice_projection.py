@@ -0,0 +1,79 @@
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.timezone import date_range
+from app.models.invoice import Invoice
+from app.models.vehicle import Vehicle
+from app.utils import normalize_plate
+
+
+# 🧩 Factura + placa/tipo del vehículo en una sola consulta (sin cargar objetos ORM)
+def invoice_rows_query(*criteria):
+    stmt = (
+        select(
+            Invoice.id,
+            Invoice.invoice_number,
+            Invoice.date,
+            Invoice.total_amount,
+            Invoice.parking_time,
+            Vehicle.license_plate,
+            Vehicle.vehicle_type,
+        )
+        .join(Vehicle, Vehicle.id == Invoice.vehicle_id)
+        .order_by(Invoice.id)
+    )
+    if criteria:
+        stmt = stmt.where(*criteria)
+    return stmt
+
+
+# 🧾 Fila SQL -> dict con la forma de InvoiceResponse (lista para serializar)
+def invoice_row_to_dict(row) -> dict:
+    return {
+        "id": row.id,
+        "invoice_number": row.invoice_number,
+        "date": row.date.isoformat() if row.date else None,
+        "total_amount": float(row.total_amount or 0),
+        "parking_time": row.parking_time or 0,
+        "vehicle": {"license_plate": row.license_plate, "vehicle_type": row.vehicle_type},
+    }
+
+
+async def fetch_invoice_rows(
+    db: AsyncSession,
+    *criteria,
+    after_id: int | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    stmt = invoice_rows_query(*criteria)
+    if after_id is not None:
+        stmt = stmt.where(Invoice.id > after_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    result = await db.execute(stmt)
+    return [invoice_row_to_dict(row) for row in result]
+
+
+# 🔍 Filtros de facturas (todos opcionales; usan los índices de date, vehicle_id y user_id)
+def invoice_criteria(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    plate: str | None = None,
+    vehicle_id: int | None = None,
+    user_id: int | None = None,
+) -> list:
+    criteria = []
+    start, end = date_range(date_from, date_to)
+    if start:
+        criteria.append(Invoice.date >= start)
+    if end:
+        criteria.append(Invoice.date < end)
+    if plate:
+        criteria.append(Vehicle.license_plate == normalize_plate(plate))
+    if vehicle_id is not None:
+        criteria.append(Invoice.vehicle_id == vehicle_id)
+    if user_id is not None:
+        criteria.append(Invoice.user_id == user_id)
+    return criteria
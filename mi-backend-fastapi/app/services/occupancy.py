@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.parking_session import ParkingSession
+from app.utils import normalize_plate
+from app.services.vehicle_projection import STATUS_INSIDE, vehicle_rows_query, vehicle_type_labels
+
+
+@dataclass
+class OccupancyEntry:
+    vehicle_id: int
+    license_plate: str
+    vehicle_type: str
+    entry_time: datetime | None
+    registration_value: float
+    status: str
+    invoice_number: str | None
+    session_id: int | None = None
+
+    def as_row(self) -> dict:
+        # Misma forma que vehicle_projection.row_to_dict para un vehículo dentro
+        return {
+            "id": self.vehicle_id,
+            "session_id": self.session_id,
+            "license_plate": self.license_plate,
+            "vehicle_type": vehicle_type_labels.get(self.vehicle_type, self.vehicle_type),
+            "entry_time": self.entry_time.isoformat() if self.entry_time else None,
+            "registration_value": float(self.registration_value or 0),
+            "status": self.status or "N/A",
+            "exit_time": None,
+            "invoice_number": self.invoice_number,
+            "total_amount": 0.0,
+            "parking_time": 0,
+        }
+
+
+# 🅿️ Índice en memoria de los vehículos dentro del parqueadero, por placa normalizada.
+# Se construye desde la BD al arrancar y se actualiza después de cada commit de
+# entrada/salida. Es por proceso: si la BD se modifica por fuera, usar check/rebuild.
+class OccupancyIndex:
+    def __init__(self):
+        self._entries: dict[str, OccupancyEntry] = {}
+        self.ready = False
+        self.built_at: datetime | None = None
+        self.version = 0  # cambia con cada modificación (ETag de /active)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, plate: str) -> OccupancyEntry | None:
+        return self._entries.get(normalize_plate(plate))
+
+    def add(self, entry: OccupancyEntry) -> None:
+        self._entries[normalize_plate(entry.license_plate)] = entry
+        self.version += 1
+
+    def remove(self, plate: str) -> None:
+        if self._entries.pop(normalize_plate(plate), None) is not None:
+            self.version += 1
+
+    def as_rows(self) -> list[dict]:
+        return [e.as_row() for e in sorted(self._entries.values(), key=lambda e: e.session_id or 0)]
+
+    async def _load(self, db: AsyncSession) -> dict[str, OccupancyEntry]:
+        result = await db.execute(vehicle_rows_query(ParkingSession.exit_time.is_(None)))
+        return {
+            normalize_plate(row.license_plate): OccupancyEntry(
+                vehicle_id=row.id,
+                license_plate=row.license_plate,
+                vehicle_type=row.vehicle_type,
+                entry_time=row.entry_time,
+                registration_value=row.registration_value or 0,
+                status=STATUS_INSIDE,
+                invoice_number=row.invoice_number,
+                session_id=row.session_id,
+            )
+            for row in result
+        }
+
+    @staticmethod
+    def _key(entry: OccupancyEntry) -> tuple:
+        return entry.vehicle_id, entry.session_id, entry.invoice_number
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        self._entries = await self._load(db)
+        self.version += 1
+        self.ready = True
+        self.built_at = datetime.now()
+        return len(self._entries)
+
+    # 🔍 Compara el índice con la BD sin modificarlo
+    async def check(self, db: AsyncSession) -> dict:
+        expected = await self._load(db)
+        missing = sorted(set(expected) - set(self._entries))
+        stale = sorted(set(self._entries) - set(expected))
+        mismatched = sorted(
+            plate
+            for plate in set(expected) & set(self._entries)
+            if self._key(expected[plate]) != self._key(self._entries[plate])
+        )
+        return {
+            "consistent": not (missing or stale or mismatched),
+            "indexed": len(self._entries),
+            "in_database": len(expected),
+            "missing": missing,
+            "stale": stale,
+            "mismatched": mismatched,
+        }
+
+
+occupancy_index = OccupancyIndex()
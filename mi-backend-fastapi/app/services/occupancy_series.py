@@ -0,0 +1,224 @@
+import math
+import os
+from array import array
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.timezone import lot_now
+from app.models.occupancy_minute import OccupancyMinute
+from app.models.parking_session import ParkingSession
+from app.utils import upsert_insert
+
+OCCUPANCY_HOT_MINUTES = int(os.getenv("OCCUPANCY_HOT_MINUTES", 1440))
+OCCUPANCY_MAX_POINTS = int(os.getenv("OCCUPANCY_MAX_POINTS", 500))
+
+MINUTE = timedelta(minutes=1)
+EPOCH = datetime(2000, 1, 1)
+
+
+def minute_of(value: datetime) -> datetime:
+    return value.replace(second=0, microsecond=0)
+
+
+async def count_open_sessions(db: AsyncSession) -> int:
+    # Usa el índice parcial ix_parking_sessions_open: recorre solo los vehículos dentro
+    return await db.scalar(select(func.count()).select_from(ParkingSession).where(ParkingSession.exit_time.is_(None)))
+
+
+# Minutos tocados por una transacción: ocupación al final del minuto y máximo dentro de él
+class OccupancyDelta:
+    def __init__(self):
+        self._points: dict[datetime, list[int]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self._points)
+
+    def record(self, at: datetime, level: int) -> "OccupancyDelta":
+        point = self._points.setdefault(minute_of(at), [level, level])
+        point[0] = level
+        point[1] = max(point[1], level)
+        return self
+
+    def points(self) -> list[tuple[datetime, int, int]]:
+        return sorted((minute, level, peak) for minute, (level, peak) in self._points.items())
+
+
+# 📈 Guardar los minutos tocados dentro de la transacción del llamador (un UPSERT para todos)
+async def apply_occupancy_delta(db: AsyncSession, delta: OccupancyDelta) -> None:
+    if not delta:
+        return
+    params = [{"minute": minute, "occupancy": level, "peak": peak} for minute, level, peak in delta.points()]
+    dialect = db.get_bind().dialect.name
+    insert = upsert_insert(db)
+    if insert is not None:
+        greatest = func.greatest if dialect == "postgresql" else func.max
+        stmt = insert(OccupancyMinute)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["minute"],
+                set_={"occupancy": stmt.excluded.occupancy, "peak": greatest(OccupancyMinute.peak, stmt.excluded.peak)},
+            ),
+            params,
+        )
+        return
+
+    for row in params:
+        existing = await db.get(OccupancyMinute, row["minute"])
+        if existing is None:
+            db.add(OccupancyMinute(**row))
+        else:
+            existing.occupancy = row["occupancy"]
+            existing.peak = max(existing.peak, row["peak"])
+    await db.flush()
+
+
+# 🔁 Ventana caliente en memoria: los últimos OCCUPANCY_HOT_MINUTES minutos en dos
+# array('i') circulares (ocupación y máximo), una posición por minuto. Se carga desde la
+# BD al arrancar y se actualiza después de cada commit. Es por proceso, como el índice.
+class OccupancyRing:
+    def __init__(self, size: int = OCCUPANCY_HOT_MINUTES):
+        self.size = size
+        self.levels = array("i", bytes(4 * size))
+        self.peaks = array("i", bytes(4 * size))
+        self.marks = bytearray(size)  # 1 = minuto con eventos; 0 = valor repetido del anterior
+        self.last_minute: datetime | None = None
+        self.ready = False
+
+    def _slot(self, minute: datetime) -> int:
+        return ((minute - EPOCH) // MINUTE) % self.size
+
+    @property
+    def window_start(self) -> datetime | None:
+        return self.last_minute - (self.size - 1) * MINUTE if self.last_minute else None
+
+    # Llevar la ventana hasta `minute` repitiendo la última ocupación (minutos sin eventos)
+    def advance(self, minute: datetime) -> None:
+        if not self.ready or minute <= self.last_minute:
+            return
+        carry = self.levels[self._slot(self.last_minute)]
+        steps = min(int((minute - self.last_minute) / MINUTE), self.size)
+        for k in range(steps):
+            slot = self._slot(minute - k * MINUTE)
+            self.levels[slot] = carry
+            self.peaks[slot] = carry
+            self.marks[slot] = 0
+        self.last_minute = minute
+
+    def record(self, minute: datetime, level: int, peak: int) -> None:
+        if not self.ready or minute < self.window_start:
+            return
+        self.advance(minute)
+        slot = self._slot(minute)
+        self.levels[slot] = level
+        self.peaks[slot] = max(self.peaks[slot], peak) if self.marks[slot] else peak
+        self.marks[slot] = 1
+        # Evento atrasado: los minutos repetidos que siguen toman el nuevo valor, como en la BD
+        following = minute + MINUTE
+        while following <= self.last_minute:
+            slot = self._slot(following)
+            if self.marks[slot]:
+                break
+            self.levels[slot] = level
+            self.peaks[slot] = level
+            following += MINUTE
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        return self.ready and start >= self.window_start and end <= self.last_minute + MINUTE
+
+    def points(self, start: datetime, end: datetime) -> list[tuple[datetime, int, int]]:
+        minutes = int((end - start) / MINUTE)
+        return [
+            (minute, self.levels[slot], self.peaks[slot])
+            for minute in (start + k * MINUTE for k in range(minutes))
+            for slot in (self._slot(minute),)
+        ]
+
+    async def load(self, db: AsyncSession) -> None:
+        now = minute_of(lot_now())
+        start = now - (self.size - 1) * MINUTE
+        initial, points = await fetch_points(db, start, now + MINUTE)
+        self.last_minute = now
+        level, index = initial, 0
+        for k in range(self.size):
+            minute = start + k * MINUTE
+            peak, mark = level, 0
+            if index < len(points) and points[index][0] == minute:
+                _, level, peak = points[index]
+                mark = 1
+                index += 1
+            slot = self._slot(minute)
+            self.levels[slot] = level
+            self.peaks[slot] = peak
+            self.marks[slot] = mark
+        self.ready = True
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "minutes": self.size,
+            "window_start": self.window_start,
+            "last_minute": self.last_minute,
+        }
+
+
+occupancy_ring = OccupancyRing()
+
+
+# Ocupación antes de `start` (último minuto registrado) y minutos con eventos en [start, end)
+async def fetch_points(db: AsyncSession, start: datetime, end: datetime) -> tuple[int, list[tuple[datetime, int, int]]]:
+    initial = await db.scalar(
+        select(OccupancyMinute.occupancy)
+        .where(OccupancyMinute.minute < start)
+        .order_by(OccupancyMinute.minute.desc())
+        .limit(1)
+    )
+    result = await db.execute(
+        select(OccupancyMinute.minute, OccupancyMinute.occupancy, OccupancyMinute.peak)
+        .where(OccupancyMinute.minute >= start, OccupancyMinute.minute < end)
+        .order_by(OccupancyMinute.minute)
+    )
+    return initial or 0, [tuple(row) for row in result]
+
+
+# 📉 Reducir a un punto por `step` minutos: máximo y promedio ponderado por tiempo,
+# repitiendo la última ocupación conocida en los minutos sin eventos
+def downsample(
+    start: datetime, end: datetime, step: int, initial: int, points: list[tuple[datetime, int, int]]
+) -> list[dict]:
+    width = step * MINUTE
+    buckets = math.ceil((end - start) / width)
+    level, index, series = initial, 0, []
+    for b in range(buckets):
+        bucket_start = start + b * width
+        bucket_end = min(bucket_start + width, end)
+        peak, area, cursor = level, 0.0, bucket_start
+        while index < len(points) and points[index][0] < bucket_end:
+            minute, new_level, new_peak = points[index]
+            area += level * ((minute - cursor) / MINUTE)
+            level, cursor = new_level, minute
+            peak = max(peak, new_peak)
+            index += 1
+        area += level * ((bucket_end - cursor) / MINUTE)
+        series.append({
+            "time": bucket_start,
+            "max": peak,
+            "avg": round(area / ((bucket_end - bucket_start) / MINUTE), 2),
+            "last": level,
+        })
+    return series
+
+
+def auto_step(start: datetime, end: datetime, max_points: int = OCCUPANCY_MAX_POINTS) -> int:
+    return max(1, math.ceil((end - start) / MINUTE / max_points))
+
+
+async def occupancy_series(db: AsyncSession, start: datetime, end: datetime, step: int) -> tuple[list[dict], str]:
+    occupancy_ring.advance(minute_of(lot_now()))
+    if occupancy_ring.covers(start, end):
+        points = occupancy_ring.points(start, end)
+        initial, source = (points[0][1] if points else 0), "memory"
+    else:
+        (initial, points), source = await fetch_points(db, start, end), "database"
+    return downsample(start, end, step, initial, points), source
@@ -0,0 +1,201 @@
+import os
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Date, cast, func, literal_column, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.timezone import lot_today
+from app.models.invoice import Invoice
+from app.models.parking_session import ParkingSession
+from app.models.vehicle import Vehicle
+
+BUCKETS = ("day", "week", "month")
+# Rango por defecto si no se envía date_from: cantidad de periodos hacia atrás
+DEFAULT_PERIODS = {"day": 30, "week": 12, "month": 12}
+MAX_PERIODS = 3660
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", 1))
+
+
+# 🗓️ Inicio del periodo que contiene `day` (semanas de lunes a domingo)
+def bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start: date, bucket: str) -> date:
+    if bucket == "week":
+        return start + timedelta(days=7)
+    if bucket == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_starts(date_from: date, date_to: date, bucket: str) -> list[date]:
+    starts, current = [], bucket_start(date_from, bucket)
+    while current <= date_to:
+        starts.append(current)
+        current = next_bucket(current, bucket)
+    return starts
+
+
+def default_range(bucket: str, date_from: date | None, date_to: date | None) -> tuple[date, date]:
+    date_to = date_to or lot_today()
+    if date_from is None:
+        date_from = bucket_start(date_to, bucket)
+        for _ in range(DEFAULT_PERIODS[bucket] - 1):
+            date_from = bucket_start(date_from - timedelta(days=1), bucket)
+    return date_from, date_to
+
+
+# Expresión SQL del inicio de periodo: date_trunc en PostgreSQL, date()/strftime en SQLite
+def bucket_expression(column, bucket: str, dialect: str):
+    if dialect == "postgresql":
+        return cast(func.date_trunc(bucket, column), Date)
+    if bucket == "week":
+        return func.date(column, literal_column("'weekday 0'"), literal_column("'-6 days'"))
+    if bucket == "month":
+        return func.strftime("%Y-%m-01", column)
+    return func.date(column)
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) and not isinstance(value, datetime) else date.fromisoformat(str(value)[:10])
+
+
+# 📊 Consultas agregadas. Ambas agrupan por fecha de cierre (salida de la estadía; para
+# facturas manuales sin visita, su fecha), así un periodo cerrado ya no cambia.
+def revenue_query(bucket: str, start: datetime, end: datetime, dialect: str):
+    # Dos ramas con su propio índice (salida de la estadía / fecha de la factura manual)
+    # en vez de filtrar sobre coalesce(), que ningún índice cubre.
+    # Facturas de visitas abiertas aún no tienen valor: entran cuando el vehículo sale.
+    from_sessions = (
+        select(ParkingSession.exit_time.label("closed_at"), Invoice.id, Invoice.vehicle_id, Invoice.total_amount)
+        .join(Invoice, Invoice.id == ParkingSession.invoice_id)
+        .where(ParkingSession.exit_time >= start, ParkingSession.exit_time < end)
+    )
+    manual = (
+        select(Invoice.date.label("closed_at"), Invoice.id, Invoice.vehicle_id, Invoice.total_amount)
+        .where(Invoice.date >= start, Invoice.date < end)
+        .where(~select(ParkingSession.id).where(ParkingSession.invoice_id == Invoice.id).exists())
+    )
+    closed = union_all(from_sessions, manual).subquery()
+    period = bucket_expression(closed.c.closed_at, bucket, dialect)
+    return (
+        select(
+            period.label("period"),
+            Vehicle.vehicle_type,
+            func.count(closed.c.id).label("invoices"),
+            func.coalesce(func.sum(closed.c.total_amount), 0).label("revenue"),
+        )
+        .select_from(closed)
+        .join(Vehicle, Vehicle.id == closed.c.vehicle_id)
+        .group_by(period, Vehicle.vehicle_type)
+    )
+
+
+async def _revenue_rows(db: AsyncSession, bucket: str, start: datetime, end: datetime) -> list[dict]:
+    stmt = revenue_query(bucket, start, end, db.get_bind().dialect.name)
+    return [
+        {
+            "period": _as_date(row.period),
+            "vehicle_type": row.vehicle_type,
+            "invoices": row.invoices,
+            "revenue": float(row.revenue),
+        }
+        for row in await db.execute(stmt)
+    ]
+
+
+async def _stay_rows(db: AsyncSession, bucket: str, start: datetime, end: datetime) -> list[dict]:
+    period = bucket_expression(ParkingSession.exit_time, bucket, db.get_bind().dialect.name)
+    stmt = (
+        select(
+            period.label("period"),
+            Vehicle.vehicle_type,
+            func.count(ParkingSession.id).label("stays"),
+            func.coalesce(func.sum(ParkingSession.minutes), 0).label("total_minutes"),
+            func.min(ParkingSession.minutes).label("min_minutes"),
+            func.max(ParkingSession.minutes).label("max_minutes"),
+        )
+        .join(Vehicle, Vehicle.id == ParkingSession.vehicle_id)
+        .where(ParkingSession.exit_time >= start, ParkingSession.exit_time < end)
+        .group_by(period, Vehicle.vehicle_type)
+    )
+    return [
+        {
+            "period": _as_date(row.period),
+            "vehicle_type": row.vehicle_type,
+            "stays": row.stays,
+            "total_minutes": row.total_minutes,
+            "min_minutes": row.min_minutes,
+            "max_minutes": row.max_minutes,
+        }
+        for row in await db.execute(stmt)
+    ]
+
+
+REPORTS = {"revenue": _revenue_rows, "stays": _stay_rows}
+
+
+# 🗃️ Los periodos que ya terminaron no cambian: se guardan en memoria por
+# (reporte, tipo de periodo, inicio). El periodo abierto (el de hoy) se recalcula
+# siempre, pero consultando solo su propio rango. Con varios workers cada proceso
+# tendría su copia y solo el que atiende un /batch atrasado la limpiaría: se desactiva.
+class ReportCache:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._closed: dict[tuple[str, str, date], list[dict]] = {}
+        self.hits = 0
+        self.computed = 0
+
+    def clear(self) -> None:
+        self._closed.clear()
+
+    async def rows(self, db: AsyncSession, report: str, bucket: str, date_from: date, date_to: date) -> list[dict]:
+        query = REPORTS[report]
+        starts = bucket_starts(date_from, date_to, bucket)
+        open_start = bucket_start(lot_today(), bucket)
+
+        closed = [s for s in starts if s < open_start]
+        cached = {s: self._closed[(report, bucket, s)] for s in closed if (report, bucket, s) in self._closed}
+        missing = [s for s in closed if s not in cached]
+        self.hits += len(cached)
+        if missing:
+            # Una sola consulta para el tramo de periodos faltantes; los vacíos también se guardan
+            found = await query(
+                db, bucket,
+                datetime.combine(missing[0], datetime.min.time()),
+                datetime.combine(next_bucket(missing[-1], bucket), datetime.min.time()),
+            )
+            by_start = {s: [] for s in missing}
+            for row in found:
+                if row["period"] in by_start:
+                    by_start[row["period"]].append(row)
+            cached.update(by_start)
+            if self.enabled:
+                for s, rows in by_start.items():
+                    self._closed[(report, bucket, s)] = rows
+            self.computed += len(missing)
+
+        result = [row for s in closed for row in cached[s]]
+        if open_start in starts:
+            result += await query(
+                db, bucket,
+                datetime.combine(open_start, datetime.min.time()),
+                datetime.combine(next_bucket(open_start, bucket), datetime.min.time()),
+            )
+        return sorted(result, key=lambda row: (row["period"], row["vehicle_type"] or ""))
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "closed_periods": len(self._closed),
+            "hits": self.hits,
+            "computed": self.computed,
+        }
+
+
+report_cache = ReportCache(enabled=WEB_WORKERS == 1)
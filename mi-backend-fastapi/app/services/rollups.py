@@ -0,0 +1,79 @@
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.daily_rollup import DailyRollup
+from app.utils import upsert_insert
+
+
+# Acumula cambios por (día, tipo) antes de escribirlos: un solo UPSERT por lote
+class RollupDelta:
+    def __init__(self):
+        self._rows = defaultdict(lambda: {"entries": 0, "exits": 0, "revenue": 0.0, "total_minutes": 0})
+
+    def __bool__(self) -> bool:
+        return bool(self._rows)
+
+    def entry(self, day: date, vehicle_type: str) -> "RollupDelta":
+        self._rows[(day, vehicle_type)]["entries"] += 1
+        return self
+
+    def exit(self, day: date, vehicle_type: str, revenue: float, minutes: int) -> "RollupDelta":
+        row = self._rows[(day, vehicle_type)]
+        row["exits"] += 1
+        row["revenue"] += revenue
+        row["total_minutes"] += minutes
+        return self
+
+    def params(self) -> list[dict]:
+        return [
+            {"day": day, "vehicle_type": vehicle_type, **counts}
+            for (day, vehicle_type), counts in self._rows.items()
+        ]
+
+
+# 📊 Sumar el delta a daily_rollups dentro de la transacción del llamador
+async def apply_rollup_delta(db: AsyncSession, delta: RollupDelta) -> None:
+    if not delta:
+        return
+    params = delta.params()
+    insert = upsert_insert(db)
+    if insert is not None:
+        stmt = insert(DailyRollup)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["day", "vehicle_type"],
+                set_={
+                    "entries": DailyRollup.entries + stmt.excluded.entries,
+                    "exits": DailyRollup.exits + stmt.excluded.exits,
+                    "revenue": DailyRollup.revenue + stmt.excluded.revenue,
+                    "total_minutes": DailyRollup.total_minutes + stmt.excluded.total_minutes,
+                },
+            ),
+            params,
+        )
+        return
+
+    for row in params:
+        result = await db.execute(
+            update(DailyRollup)
+            .where(DailyRollup.day == row["day"], DailyRollup.vehicle_type == row["vehicle_type"])
+            .values(
+                entries=DailyRollup.entries + row["entries"],
+                exits=DailyRollup.exits + row["exits"],
+                revenue=DailyRollup.revenue + row["revenue"],
+                total_minutes=DailyRollup.total_minutes + row["total_minutes"],
+            )
+        )
+        if result.rowcount == 0:
+            db.add(DailyRollup(**row))
+    await db.flush()
+
+
+async def fetch_daily_rollups(db: AsyncSession, day: date) -> list[DailyRollup]:
+    result = await db.execute(
+        select(DailyRollup).where(DailyRollup.day == day).order_by(DailyRollup.vehicle_type)
+    )
+    return list(result.scalars())
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import os
+from datetime import date, datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.timezone import lot_now, lot_today
+from app.models.daily_rollup import DailyRollup
+from app.services.occupancy import occupancy_index
+from app.services.occupancy_series import count_open_sessions
+from app.services.rollups import fetch_daily_rollups
+
+logger = logging.getLogger(__name__)
+
+STATS_RECONCILE_SECONDS = float(os.getenv("STATS_RECONCILE_SECONDS", 60))
+# Procesos que atienden la misma BD (lo fija serve.py)
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", 1))
+
+
+# 📈 Contadores del tablero mantenidos en memoria: se suman después de cada commit de
+# entrada/salida y se corrigen contra la BD (daily_rollups + visitas abiertas) cada
+# STATS_RECONCILE_SECONDS. La ocupación sale del índice de ocupación. Son por proceso:
+# con varios workers (from_database=True) cada lectura se responde desde la BD, si no
+# dos sondeos atendidos por workers distintos mostrarían números distintos.
+class ParkingStats:
+    def __init__(self, reconcile_seconds: float = STATS_RECONCILE_SECONDS, from_database: bool = False):
+        self.reconcile_seconds = reconcile_seconds
+        self.from_database = from_database
+        self.day: date = lot_today()
+        self.entries_today = 0
+        self.exits_today = 0
+        self.revenue_today = 0.0
+        self.total_visits = 0
+        self.occupancy = 0  # solo se usa si el índice de ocupación no está listo
+        self.reconciled_at: datetime | None = None
+        self.last_drift: dict = {}
+        self._recorded = 0  # eventos registrados; detecta carreras con reconcile
+        self._task: asyncio.Task | None = None
+
+    def _roll(self) -> None:
+        # Cambio de día: los contadores de "hoy" arrancan en cero
+        today = lot_today()
+        if today != self.day:
+            self.day = today
+            self.entries_today = 0
+            self.exits_today = 0
+            self.revenue_today = 0.0
+
+    # Registrar una entrada/salida ya confirmada (respuesta del gate o resultado de lote)
+    def record(self, kind: str, response) -> None:
+        if not response.success:
+            return
+        self._roll()
+        self._recorded += 1
+        if kind == "entry":
+            self.total_visits += 1
+            if response.entry_time and response.entry_time.date() == self.day:
+                self.entries_today += 1
+        elif response.exit_time and response.exit_time.date() == self.day:
+            self.exits_today += 1
+            self.revenue_today += response.total_amount or 0
+
+    def snapshot(self) -> dict:
+        self._roll()
+        return {
+            "day": self.day,
+            "occupancy": len(occupancy_index) if occupancy_index.ready else self.occupancy,
+            "entries_today": self.entries_today,
+            "exits_today": self.exits_today,
+            "revenue_today": self.revenue_today,
+            "total_visits": self.total_visits,
+            "reconciled_at": self.reconciled_at,
+        }
+
+    # Contadores según la BD: acumulados del día, visitas (entradas de todos los días en
+    # daily_rollups, una tabla pequeña) y visitas abiertas (índice parcial)
+    async def _expected(self, db: AsyncSession, day: date) -> tuple[dict, int]:
+        rollups = await fetch_daily_rollups(db, day)
+        total = await db.scalar(select(func.coalesce(func.sum(DailyRollup.entries), 0)))
+        expected = {
+            "entries_today": sum(r.entries for r in rollups),
+            "exits_today": sum(r.exits for r in rollups),
+            "revenue_today": float(sum(r.revenue for r in rollups)),
+            "total_visits": int(total),
+        }
+        return expected, await count_open_sessions(db)
+
+    # 📊 Respuesta de /stats: de memoria, o de la BD si hay varios workers
+    async def read(self, db: AsyncSession) -> dict:
+        if not self.from_database:
+            return self.snapshot()
+        day = lot_today()
+        expected, open_visits = await self._expected(db, day)
+        return {"day": day, "occupancy": open_visits, **expected, "reconciled_at": lot_now()}
+
+    # 🔍 Recalcular desde la BD; guarda la diferencia encontrada para /metrics
+    async def reconcile(self, db: AsyncSession) -> dict:
+        self._roll()
+        day, recorded = self.day, self._recorded
+        expected, open_visits = await self._expected(db, day)
+        self.last_drift = {
+            key: value - getattr(self, key)
+            for key, value in expected.items()
+            if value != getattr(self, key)
+        }
+        # Si llegaron eventos mientras se consultaba, la foto ya está vieja: se corrige en la próxima
+        if self.day == day and self._recorded == recorded:
+            for key, value in expected.items():
+                setattr(self, key, value)
+        self.occupancy = open_visits
+        self.reconciled_at = lot_now()
+        return self.last_drift
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, session_factory) -> None:
+        if not self.running and self.reconcile_seconds > 0:
+            self._task = asyncio.create_task(self._run(session_factory))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self, session_factory) -> None:
+        while True:
+            await asyncio.sleep(self.reconcile_seconds)
+            try:
+                async with session_factory() as db:
+                    drift = await self.reconcile(db)
+                if drift:
+                    logger.warning("Estadísticas corregidas contra la BD: %s", drift)
+            except Exception:
+                logger.exception("Fallo reconciliando estadísticas")
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "reconcile_seconds": self.reconcile_seconds,
+            "from_database": self.from_database,
+            "reconciled_at": self.reconciled_at,
+            "last_drift": self.last_drift,
+        }
+
+
+parking_stats = ParkingStats(from_database=WEB_WORKERS > 1)
@@ -0,0 +1,285 @@
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.timezone import date_range, to_lot_time
+from app.models.parking_session import ParkingSession
+from app.models.vehicle import Vehicle
+from app.services.vehicle_projection import vehicle_type_labels
+
+logger = logging.getLogger(__name__)
+
+TARIFFS_FILE = os.getenv("TARIFFS_FILE")
+TARIFF_BATCH_SIZE = int(os.getenv("TARIFF_BATCH_SIZE", 50000))
+
+DAY_MINUTES = 1440
+MINUTE_US = 60_000_000
+DAY_US = DAY_MINUTES * MINUTE_US
+DEFAULT_VEHICLE_TYPE = "carro"
+
+# Tarifa vigente por defecto: valor por hora prorrateado por minuto; una visita de
+# menos de un minuto paga la hora completa. TARIFFS_FILE (JSON, mismo formato) la reemplaza.
+DEFAULT_TARIFF = {
+    "carro": {"hourly_rate": 3000},
+    "moto": {"hourly_rate": 2000},
+}
+
+
+def vehicle_label(vehicle_type: str | None) -> str:
+    # "car"/"motorcycle" -> "carro"/"moto"; sin tipo es carro y un tipo desconocido se
+    # rechaza (ValueError) en vez de cobrarlo con otra tabla
+    if not vehicle_type:
+        return DEFAULT_VEHICLE_TYPE
+    label = vehicle_type_labels.get(vehicle_type.lower())
+    if label is None:
+        raise ValueError(f"Tipo de vehículo desconocido: {vehicle_type}")
+    return label
+
+
+def _minute_of_day(value: str) -> int:
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+@dataclass(frozen=True)
+class TimeBand:
+    start: int  # minuto del día en que empieza
+    end: int    # minuto del día en que termina; si end <= start la franja cruza la medianoche
+    hourly_rate: float
+
+    def minutes(self) -> list[int]:
+        if self.end > self.start:
+            return list(range(self.start, self.end))
+        return list(range(self.start, DAY_MINUTES)) + list(range(0, self.end))
+
+
+# 💲 Tabla de un tipo de vehículo: valor por hora, franjas con otro valor (p. ej. nocturna),
+# tope por día calendario y cobro mínimo. `prefix[m]` es el valor acumulado (en
+# valor-hora × minutos) desde la medianoche hasta el minuto m: cualquier tramo del día
+# se cobra con una resta, sin recorrer la estadía minuto a minuto.
+@dataclass
+class RateTable:
+    hourly_rate: float
+    bands: tuple[TimeBand, ...] = ()
+    daily_cap: float | None = None
+    minimum_charge: float = 0
+    short_stay_charge: float | None = None  # visitas de menos de un minuto; None = una hora
+    prefix: list[float] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        rates = [float(self.hourly_rate)] * DAY_MINUTES
+        for band in self.bands:
+            for minute in band.minutes():
+                rates[minute] = float(band.hourly_rate)
+        prefix = [0.0]
+        for rate in rates:
+            prefix.append(prefix[-1] + rate)
+        self.prefix = prefix
+
+    @property
+    def cap_value(self) -> float:
+        return self.daily_cap * 60 if self.daily_cap is not None else math.inf
+
+    @property
+    def short_stay(self) -> int:
+        return int(self.hourly_rate if self.short_stay_charge is None else self.short_stay_charge)
+
+    # Valor de `minutes` minutos que empiezan en el minuto del día `start`, con tope por día
+    def span_value(self, start: int, minutes: int) -> float:
+        prefix, cap = self.prefix, self.cap_value
+        end = start + minutes
+        last_day = (end - 1) // DAY_MINUTES
+        if last_day == 0:
+            return min(cap, prefix[end] - prefix[start])
+        first = min(cap, prefix[DAY_MINUTES] - prefix[start])
+        middle = (last_day - 1) * min(cap, prefix[DAY_MINUTES])
+        last = min(cap, prefix[end - last_day * DAY_MINUTES])
+        return first + middle + last
+
+    def charge(self, start: int, minutes: int) -> int:
+        if minutes <= 0:
+            return self.short_stay
+        return max(int(self.span_value(start, minutes) / 60), int(self.minimum_charge))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RateTable":
+        return cls(
+            hourly_rate=data["hourly_rate"],
+            bands=tuple(
+                TimeBand(_minute_of_day(band["start"]), _minute_of_day(band["end"]), band["hourly_rate"])
+                for band in data.get("bands") or ()
+            ),
+            daily_cap=data.get("daily_cap"),
+            minimum_charge=data.get("minimum_charge") or 0,
+            short_stay_charge=data.get("short_stay_charge"),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "hourly_rate": self.hourly_rate,
+            "bands": [
+                {"start": f"{b.start // 60:02d}:{b.start % 60:02d}", "end": f"{b.end // 60:02d}:{b.end % 60:02d}", "hourly_rate": b.hourly_rate}
+                for b in self.bands
+            ],
+            "daily_cap": self.daily_cap,
+            "minimum_charge": self.minimum_charge,
+            "short_stay_charge": self.short_stay_charge,
+        }
+
+
+# 🧮 Motor de tarifas: única fuente de precios para la portería, los lotes y las simulaciones
+class Tariff:
+    def __init__(self, tables: dict[str, RateTable]):
+        self.tables = {vehicle_label(name): table for name, table in tables.items()}
+        missing = sorted(set(vehicle_type_labels.values()) - set(self.tables))
+        if missing:
+            raise ValueError(f"La tarifa no tiene tabla para: {', '.join(missing)}")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Tariff":
+        return cls({name: RateTable.from_dict(table) for name, table in data.items()})
+
+    def to_dict(self) -> dict:
+        return {name: table.to_dict() for name, table in self.tables.items()}
+
+    # Tabla con la que se cobra un tipo (toda tarifa tiene una por cada tipo conocido)
+    def table_name(self, vehicle_type: str | None) -> str:
+        return vehicle_label(vehicle_type)
+
+    def table(self, vehicle_type: str | None) -> RateTable:
+        return self.tables[self.table_name(vehicle_type)]
+
+    # Valor de referencia que se guarda en el vehículo al entrar (registration_value)
+    def registration_value(self, vehicle_type: str | None) -> int:
+        return int(self.table(vehicle_type).hourly_rate)
+
+    # 💰 Minutos y valor a cobrar por una estadía
+    def fare(self, vehicle_type: str | None, entry_time: datetime, exit_time: datetime) -> tuple[int, int]:
+        minutes = int((exit_time - entry_time).total_seconds() // 60)
+        start = entry_time.hour * 60 + entry_time.minute
+        return minutes, self.table(vehicle_type).charge(start, minutes)
+
+    # ⚡ Modo lote: las mismas reglas que fare() sobre arreglos de NumPy, sin bucle por fila.
+    # Acepta listas de datetime o arreglos datetime64. NumPy se importa aquí para no
+    # cargarlo en el camino de la portería.
+    def fares(self, vehicle_types, entry_times, exit_times):
+        import numpy as np
+
+        names = list(self.tables)
+        codes_by_type = {}
+        for vehicle_type in set(vehicle_types):
+            codes_by_type[vehicle_type] = names.index(self.table_name(vehicle_type))
+        codes = np.fromiter(map(codes_by_type.__getitem__, vehicle_types), dtype=np.int64, count=len(vehicle_types))
+        entries = _micros(entry_times, np)
+
+        tables = [self.tables[name] for name in names]
+        prefix = np.array([table.prefix for table in tables])
+        caps = np.array([table.cap_value for table in tables])[codes]
+        full_day = np.minimum(prefix[codes, DAY_MINUTES], caps)
+        minimums = np.array([int(table.minimum_charge) for table in tables])[codes]
+        short_stays = np.array([table.short_stay for table in tables])[codes]
+
+        minutes = (_micros(exit_times, np) - entries) // MINUTE_US
+        start = (entries // MINUTE_US) % DAY_MINUTES
+        end = start + np.maximum(minutes, 1)
+        last_day = (end - 1) // DAY_MINUTES
+
+        same_day = last_day == 0
+        first = np.where(same_day, prefix[codes, np.minimum(end, DAY_MINUTES)], prefix[codes, DAY_MINUTES])
+        first = np.minimum(caps, first - prefix[codes, start])
+        middle = np.maximum(last_day - 1, 0) * full_day
+        last = np.where(same_day, 0, np.minimum(caps, prefix[codes, end - last_day * DAY_MINUTES]))
+
+        amounts = np.maximum(((first + middle + last) / 60).astype(np.int64), minimums)
+        amounts = np.where(minutes <= 0, short_stays, amounts)
+        return minutes, amounts
+
+
+# Microsegundos desde una medianoche (la conversión de datetime64 de NumPy es lenta con
+# listas de datetime; con los campos enteros es varias veces más rápida)
+def _micros(values, np):
+    if isinstance(values, np.ndarray):
+        return values.astype("datetime64[us]").astype(np.int64)
+    return np.fromiter(
+        (
+            v.toordinal() * DAY_US + (v.hour * 3600 + v.minute * 60 + v.second) * 1_000_000 + v.microsecond
+            for v in values
+        ),
+        dtype=np.int64,
+        count=len(values),
+    )
+
+
+def load_tariff() -> Tariff:
+    if TARIFFS_FILE:
+        try:
+            with open(TARIFFS_FILE, encoding="utf-8") as handle:
+                return Tariff.from_dict(json.load(handle))
+        except (OSError, ValueError, KeyError):
+            logger.exception("No se pudo leer TARIFFS_FILE=%s; se usa la tarifa por defecto", TARIFFS_FILE)
+    return Tariff.from_dict(DEFAULT_TARIFF)
+
+
+current_tariff = load_tariff()
+
+
+# 🔁 Recalcular visitas cerradas (salida en el rango) con `tariff` y compararlas con lo
+# cobrado. Las filas llegan por bloques de TARIFF_BATCH_SIZE y cada bloque se tarifica
+# y se acumula con NumPy.
+async def simulate_tariff(
+    db: AsyncSession,
+    tariff: Tariff,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    vehicle_type: str | None = None,
+) -> list[dict]:
+    import numpy as np
+
+    stmt = (
+        select(Vehicle.vehicle_type, ParkingSession.entry_time, ParkingSession.exit_time, ParkingSession.amount)
+        .join(Vehicle, Vehicle.id == ParkingSession.vehicle_id)
+        .where(ParkingSession.exit_time.is_not(None))
+    )
+    start, end = date_range(date_from, date_to)
+    if start:
+        stmt = stmt.where(ParkingSession.exit_time >= start)
+    if end:
+        stmt = stmt.where(ParkingSession.exit_time < end)
+
+    names = list(tariff.tables)
+    totals = {name: {"sessions": 0, "minutes": 0, "current": 0.0, "simulated": 0.0, "changed": 0} for name in names}
+    wanted = vehicle_label(vehicle_type) if vehicle_type else None
+
+    result = await db.stream(stmt.execution_options(yield_per=TARIFF_BATCH_SIZE))
+    async for rows in result.partitions():
+        types, entries, exits, current = zip(*rows)
+        labels = [tariff.table_name(t) for t in types]
+        minutes, simulated = tariff.fares(
+            labels, [to_lot_time(v) for v in entries], [to_lot_time(v) for v in exits]
+        )
+        current = np.array(current, dtype=np.float64)
+        groups = np.array([names.index(label) for label in labels])
+        for code, name in enumerate(names):
+            if wanted and name != wanted:
+                continue
+            mask = groups == code
+            if not mask.any():
+                continue
+            bucket = totals[name]
+            bucket["sessions"] += int(mask.sum())
+            bucket["minutes"] += int(minutes[mask].sum())
+            bucket["current"] += float(current[mask].sum())
+            bucket["simulated"] += float(simulated[mask].sum())
+            bucket["changed"] += int((current[mask] != simulated[mask]).sum())
+
+    return [
+        {"vehicle_type": name, **bucket, "difference": bucket["simulated"] - bucket["current"]}
+        for name, bucket in totals.items()
+        if bucket["sessions"]
+    ]
@@ -0,0 +1,119 @@
+from datetime import date
+
+from sqlalchemy import false, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.serialization import dumps_line
+from app.core.timezone import date_range
+from app.models.vehicle import Vehicle
+from app.models.invoice import Invoice
+from app.models.parking_session import ParkingSession
+from app.utils import normalize_plate
+
+# Etiquetas de tipo de vehículo (soporte EN/ES)
+vehicle_type_labels = {
+    "carro": "carro",
+    "moto": "moto",
+    "car": "carro",
+    "motorcycle": "moto",
+}
+
+
+STATUS_INSIDE = "en parqueadero"
+STATUS_OUTSIDE = "Fuera"
+
+
+# 🧩 Una fila por visita: sesión + vehículo + su factura, en una sola consulta
+def vehicle_rows_query(*criteria):
+    stmt = (
+        select(
+            ParkingSession.id.label("session_id"),
+            Vehicle.id,
+            Vehicle.license_plate,
+            Vehicle.vehicle_type,
+            ParkingSession.entry_time,
+            ParkingSession.exit_time,
+            Vehicle.registration_value,
+            Invoice.invoice_number,
+            ParkingSession.amount.label("total_amount"),
+            ParkingSession.minutes.label("parking_time"),
+        )
+        .join(Vehicle, Vehicle.id == ParkingSession.vehicle_id)
+        .outerjoin(Invoice, Invoice.id == ParkingSession.invoice_id)
+        .order_by(ParkingSession.id)
+    )
+    if criteria:
+        stmt = stmt.where(*criteria)
+    return stmt
+
+
+# 🧾 Fila SQL -> dict con la forma que espera el frontend (la de VehicleResponse, ya
+# lista para serializar: los endpoints de listas no la vuelven a validar)
+def row_to_dict(row) -> dict:
+    return {
+        "id": row.id,
+        "session_id": row.session_id,
+        "license_plate": row.license_plate,
+        "vehicle_type": vehicle_type_labels.get(row.vehicle_type, row.vehicle_type),
+        "entry_time": row.entry_time.isoformat() if row.entry_time else None,
+        "registration_value": float(row.registration_value or 0),
+        "status": STATUS_INSIDE if row.exit_time is None else STATUS_OUTSIDE,
+        "exit_time": row.exit_time.isoformat() if row.exit_time else None,
+        "invoice_number": row.invoice_number,
+        "total_amount": float(row.total_amount or 0),
+        "parking_time": row.parking_time or 0,
+    }
+
+
+async def fetch_vehicle_rows(
+    db: AsyncSession,
+    *criteria,
+    after_id: int | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    stmt = vehicle_rows_query(*criteria)
+    if after_id is not None:
+        stmt = stmt.where(ParkingSession.id > after_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    result = await db.execute(stmt)
+    return [row_to_dict(row) for row in result]
+
+
+# 🔍 Filtros del historial (todos opcionales, se resuelven en SQL)
+def history_criteria(
+    plate: str | None = None,
+    vehicle_type: str | None = None,
+    status: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+) -> list:
+    criteria = []
+    if plate:
+        # Las placas se guardan normalizadas (routers de portería)
+        criteria.append(Vehicle.license_plate == normalize_plate(plate))
+    if vehicle_type:
+        criteria.append(Vehicle.vehicle_type == vehicle_type_labels.get(vehicle_type, vehicle_type))
+    if status:
+        # El estado se deriva de la sesión: abierta = dentro, cerrada = fuera
+        wanted = status.strip().lower()
+        if wanted == STATUS_INSIDE:
+            criteria.append(ParkingSession.exit_time.is_(None))
+        elif wanted == STATUS_OUTSIDE.lower():
+            criteria.append(ParkingSession.exit_time.is_not(None))
+        else:
+            criteria.append(false())
+    start, end = date_range(date_from, date_to)
+    if start:
+        criteria.append(ParkingSession.entry_time >= start)
+    if end:
+        criteria.append(ParkingSession.entry_time < end)
+    return criteria
+
+
+# 🌊 Exportación NDJSON: lee por bloques y serializa fila a fila
+async def stream_vehicle_rows_ndjson(db: AsyncSession, criteria: list, batch_size: int = 500):
+    stmt = vehicle_rows_query(*criteria).execution_options(yield_per=batch_size)
+    result = await db.stream(stmt)
+    async for row in result:
+        yield dumps_line(row_to_dict(row))
@@ -1,29 +1,91 @@
 from datetime import datetime
-from sqlalchemy.orm import Session
-from app.models.invoice import Invoice
-
-# ✅ Generar número de factura único (fecha + consecutivo)
-def generate_invoice_number(db: Session) -> str:
-    today_str = datetime.now().strftime("%Y%m%d")
-    # Buscar último consecutivo del día
-    last_invoice = (
-        db.query(Invoice)
-        .filter(Invoice.invoice_number.like(f"{today_str}%"))
-        .order_by(Invoice.id.desc())
-        .first()
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.timezone import lot_now
+from app.database.connection import AsyncCounterSessionLocal
+from app.models.invoice_sequence import InvoiceSequence
+
+_upsert_dialects = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+# 🔠 Forma única de una placa (" abc123" y "ABC123" son el mismo vehículo)
+def normalize_plate(plate: str) -> str:
+    return plate.strip().upper()
+
+
+# INSERT con soporte ON CONFLICT para el dialecto de la sesión (None si no lo tiene)
+def upsert_insert(db: AsyncSession):
+    return _upsert_dialects.get(db.get_bind().dialect.name)
+
+
+async def _ensure_sequence_row(db: AsyncSession, day_str: str) -> None:
+    insert = upsert_insert(db)
+    if insert is not None:
+        await db.execute(
+            insert(InvoiceSequence)
+            .values(day=day_str, last_value=0)
+            .on_conflict_do_nothing(index_elements=["day"])
+        )
+        return
+    try:
+        async with db.begin_nested():
+            db.add(InvoiceSequence(day=day_str, last_value=0))
+    except IntegrityError:
+        pass  # otra transacción creó la fila primero
+
+
+async def _bump_sequence(db: AsyncSession, day_str: str, count: int) -> int:
+    bump = (
+        update(InvoiceSequence)
+        .where(InvoiceSequence.day == day_str)
+        .values(last_value=InvoiceSequence.last_value + count)
     )
-    if last_invoice:
-        last_number = int(last_invoice.invoice_number[-4:])
-        new_number = str(last_number + 1).zfill(4)
+    returning = db.get_bind().dialect.update_returning
+    if returning:
+        bump = bump.returning(InvoiceSequence.last_value)
+
+    async def run_bump():
+        result = await db.execute(bump)
+        if returning:
+            return result.scalar_one_or_none()
+        if result.rowcount == 0:
+            return None
+        return (await db.get(InvoiceSequence, day_str, populate_existing=True)).last_value
+
+    last = await run_bump()
+    if last is None:
+        # Primera factura del día: crear la fila y repetir el incremento
+        await _ensure_sequence_row(db, day_str)
+        last = await run_bump()
+    return last
+
+
+# ✅ Reservar `count` consecutivos del día con un UPDATE atómico (O(1), sin escanear facturas).
+# Con escritores concurrentes (PostgreSQL) la reserva va en su propia transacción corta
+# (AsyncCounterSessionLocal): la fila del día no queda bloqueada hasta el commit de la
+# entrada/salida, que si no pondría en fila a toda la portería. Si la transacción de
+# quien llama falla después, el número queda sin usar (se admiten huecos). En SQLite
+# las escrituras ya van de a una (BEGIN IMMEDIATE) y una segunda transacción esperaría
+# el lock de la primera: ahí se reserva dentro de la transacción de quien llama.
+# ⚠️ Esto solo saca de la transacción el consecutivo. La entrada/salida sigue
+# actualizando change_versions (id=1, change_log) y las filas de daily_rollups y
+# occupancy_minutes hasta su commit, así que en PostgreSQL las salidas concurrentes
+# siguen en fila sobre esos locks. Esos contadores deben confirmarse junto con el
+# cambio (la versión de /sync no puede existir sin la fila que versiona).
+async def allocate_invoice_numbers(db: AsyncSession, count: int = 1, day: datetime | None = None) -> list[str]:
+    day_str = (day or lot_now()).strftime("%Y%m%d")
+    if AsyncCounterSessionLocal is None or db.get_bind().dialect.name == "sqlite":
+        last = await _bump_sequence(db, day_str, count)
     else:
-        new_number = "0001"
-    return f"{today_str}{new_number}"
-
-# ✅ Calcular valor base según tipo de vehículo
-def calculate_registration_value(vehicle_type: str) -> int:
-    vt = vehicle_type.lower()
-    if vt in ["carro", "car"]:
-        return 3000
-    elif vt in ["moto", "motorcycle"]:
-        return 2000
-    return 0
+        async with AsyncCounterSessionLocal() as counter_db:
+            last = await _bump_sequence(counter_db, day_str, count)
+            await counter_db.commit()
+
+    return [f"{day_str}-{n:04d}" for n in range(last - count + 1, last + 1)]
+
+
+# ✅ Generar número de factura único (fecha + consecutivo): YYYYMMDD-nnnn
+async def generate_invoice_number(db: AsyncSession, day: datetime | None = None) -> str:
+    return (await allocate_invoice_numbers(db, 1, day))[0]
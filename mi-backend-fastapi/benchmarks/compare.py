@@ -0,0 +1,68 @@
+"""Comparar dos corridas de benchmarks.load.
+
+Muestra, por fase y endpoint, p50/p95/p99, throughput y consultas SQL de la corrida base
+frente a la nueva. Es regresión si el p95 empeora más que --threshold por ciento o si
+sube el máximo de consultas por petición; en ese caso termina con código 1 (sirve en CI).
+
+Uso (desde mi-backend-fastapi/):
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/nueva.json
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def change(base: float, new: float) -> float:
+    return (new - base) / base * 100 if base else 0.0
+
+
+def compare(base: dict, new: dict, threshold: float) -> list[str]:
+    regressions = []
+    print(f"base:  {base['started_at']} ({base.get('commit')})  {base.get('database')}")
+    print(f"nueva: {new['started_at']} ({new.get('commit')})  {new.get('database')}")
+    if base.get("settings") != new.get("settings"):
+        print(f"⚠️  Parámetros distintos: {base.get('settings')} vs {new.get('settings')}")
+
+    for phase, new_phase in new["phases"].items():
+        base_phase = base["phases"].get(phase)
+        if base_phase is None:
+            continue
+        print(f"\n▶ {phase}: {base_phase['throughput']} → {new_phase['throughput']} req/s "
+              f"({change(base_phase['throughput'], new_phase['throughput']):+.1f}%)")
+        print(f"  {'endpoint':<22} {'p50 ms':>24} {'p95 ms':>24} {'p99 ms':>24} {'sql max':>9}")
+        for endpoint, s in new_phase["endpoints"].items():
+            b = base_phase["endpoints"].get(endpoint)
+            if b is None:
+                continue
+            cells = [f"{b[key]}→{s[key]} ({change(b[key], s[key]):+.0f}%)" for key in ("p50_ms", "p95_ms", "p99_ms")]
+            queries = f"{b.get('queries_max', '-')}→{s.get('queries_max', '-')}"
+            print(f"  {endpoint:<22} {cells[0]:>24} {cells[1]:>24} {cells[2]:>24} {queries:>9}")
+
+            if change(b["p95_ms"], s["p95_ms"]) > threshold:
+                regressions.append(f"{phase} {endpoint}: p95 {b['p95_ms']} → {s['p95_ms']} ms")
+            if "queries_max" in b and "queries_max" in s and s["queries_max"] > b["queries_max"]:
+                regressions.append(f"{phase} {endpoint}: consultas {b['queries_max']} → {s['queries_max']}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Comparar dos resultados de benchmarks.load")
+    parser.add_argument("base", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=10, help="empeoramiento de p95 tolerado (%%)")
+    args = parser.parse_args()
+
+    base = json.loads(args.base.read_text(encoding="utf-8"))
+    new = json.loads(args.new.read_text(encoding="utf-8"))
+    regressions = compare(base, new, args.threshold)
+    if regressions:
+        print("\n❌ Regresiones:")
+        for line in regressions:
+            print(f"  - {line}")
+        sys.exit(1)
+    print("\n✅ Sin regresiones")
+
+
+if __name__ == "__main__":
+    main()
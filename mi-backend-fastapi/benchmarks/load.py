@@ -0,0 +1,279 @@
+"""Prueba de carga de la API: ráfagas de portería y lecturas de tablero.
+
+Corre la app real (lifespan incluido) dentro del proceso con httpx.ASGITransport contra
+la BD de DATABASE_URL (llenarla antes con benchmarks.seed), o contra un servidor ya
+levantado con --url (p. ej. serve.py con varios workers). Fases:
+
+- entry:     ráfaga de entradas de placas nuevas (prefijo distinto en cada corrida)
+- dashboard: /active, /today, /history y /invoices/ como los piden los tableros
+- mixed:     las salidas de esas placas mientras los tableros siguen leyendo
+
+Por endpoint reporta p50/p95/p99, throughput, errores (HTTP >= 400, tiempo agotado o
+success=false en la portería) y consultas SQL por petición
+(cuántas y cuánto tiempo en la BD, de los headers X-DB-Queries / X-DB-Time-Ms que agrega
+la app). El resultado queda en un JSON para comparar corridas con benchmarks.compare.
+
+Uso (desde mi-backend-fastapi/):
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.load --concurrency 32
+    python -m benchmarks.load --url http://127.0.0.1:8000 --output resultados.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import secrets
+import subprocess
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# (nombre en el reporte, ruta) de las lecturas de tablero
+DASHBOARD_READS = [
+    ("GET /vehicles/active", "/api/v1/vehicles/active"),
+    ("GET /vehicles/today", "/api/v1/vehicles/today"),
+    ("GET /vehicles/history", "/api/v1/vehicles/history?limit=100"),
+    ("GET /invoices/", "/api/v1/invoices/invoices/?limit=100"),
+]
+
+
+@dataclass
+class Sample:
+    latency_ms: float
+    status: int
+    ok: bool
+    queries: int | None
+    db_ms: float | None
+
+
+# Peticiones que agotaron el tiempo y siguen corriendo (se esperan antes de cerrar la BD)
+_late: set[asyncio.Task] = set()
+
+
+# Consultas por petición: headers de app.database.instrumentation (si DB_QUERY_STATS está activo).
+# El tiempo límite se aplica con asyncio (ASGITransport no aplica los timeouts de httpx).
+# Una petición vencida cuenta como error pero no se cancela: cortarla a mitad de una
+# consulta deja conexiones de aiosqlite fuera del pool y el proceso no termina.
+async def timed_request(client: httpx.AsyncClient, method: str, url: str, body, timeout: float) -> Sample:
+    started = time.perf_counter()
+    request = asyncio.ensure_future(client.request(method, url, json=body))
+    try:
+        response = await asyncio.wait_for(asyncio.shield(request), timeout)
+    except (httpx.HTTPError, asyncio.TimeoutError, asyncio.CancelledError) as error:
+        if not request.done():
+            _late.add(request)
+            request.add_done_callback(_late.discard)
+        if isinstance(error, asyncio.CancelledError):
+            raise
+        return Sample((time.perf_counter() - started) * 1000, 0, False, None, None)
+    latency = (time.perf_counter() - started) * 1000
+    ok = 200 <= response.status_code < 400
+    if ok and method != "GET":
+        # La portería rechaza con 200 y success=false (placa ya dentro, no encontrada)
+        ok = response.json().get("success") is not False
+    queries = response.headers.get("X-DB-Queries")
+    db_ms = response.headers.get("X-DB-Time-Ms")
+    return Sample(
+        latency, response.status_code, ok, int(queries) if queries else None, float(db_ms) if db_ms else None
+    )
+
+
+# Reparte las peticiones entre `concurrency` clientes simultáneos; agrupa por endpoint
+async def run_phase(client, requests: list[tuple], concurrency: int, timeout: float) -> dict:
+    pending = iter(requests)
+    samples: dict[str, list[Sample]] = defaultdict(list)
+
+    async def worker():
+        for name, method, url, body in pending:
+            samples[name].append(await timed_request(client, method, url, body, timeout))
+
+    started = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        # Si un cliente falla (o se interrumpe la corrida) los demás no quedan sueltos
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+    seconds = time.perf_counter() - started
+    return {
+        "seconds": round(seconds, 3),
+        "requests": len(requests),
+        "throughput": round(len(requests) / seconds, 1),
+        "endpoints": {name: summarize(items, seconds) for name, items in samples.items()},
+    }
+
+
+def percentile(values: list[float], p: float) -> float:
+    # Rango más cercano sobre valores ya ordenados
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def summarize(samples: list[Sample], seconds: float) -> dict:
+    latencies = sorted(s.latency_ms for s in samples)
+    summary = {
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if not s.ok),
+        "throughput": round(len(samples) / seconds, 1),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2),
+    }
+    queries = [s.queries for s in samples if s.queries is not None]
+    if queries:
+        summary["queries_mean"] = round(sum(queries) / len(queries), 2)
+        summary["queries_max"] = max(queries)
+        summary["db_ms_mean"] = round(sum(s.db_ms for s in samples if s.db_ms is not None) / len(queries), 2)
+    return summary
+
+
+def gate_requests(count: int, kind: str, prefix: str) -> list[tuple]:
+    plates = [f"{prefix}{i:05d}" for i in range(count)]
+    if kind == "entry":
+        return [
+            ("POST /vehicles/entry", "POST", f"/api/v1/vehicles/entry/{plate}", {"vehicle_type": "moto" if i % 5 == 0 else "carro"})
+            for i, plate in enumerate(plates)
+        ]
+    return [("PUT /vehicles/exit", "PUT", f"/api/v1/vehicles/exit/{plate}", None) for plate in plates]
+
+
+def read_requests(count: int) -> list[tuple]:
+    return [(name, "GET", url, None) for name, url in (DASHBOARD_READS[i % len(DASHBOARD_READS)] for i in range(count))]
+
+
+# Lecturas y salidas intercaladas: los tableros leen mientras la portería escribe
+def interleave(*groups: list[tuple]) -> list[tuple]:
+    merged = [(i / len(group), item) for group in groups for i, item in enumerate(group)]
+    return [item for _, item in sorted(merged, key=lambda pair: pair[0])]
+
+
+def database_info() -> dict:
+    from sqlalchemy import func, select
+    from sqlalchemy.orm import Session
+
+    from app.database.connection import engine
+    from app.models.invoice import Invoice
+    from app.models.parking_session import ParkingSession
+    from app.models.vehicle import Vehicle
+
+    with Session(engine) as db:
+        return {
+            "dialect": engine.dialect.name,
+            "vehicles": db.scalar(select(func.count()).select_from(Vehicle)),
+            "invoices": db.scalar(select(func.count()).select_from(Invoice)),
+            "sessions": db.scalar(select(func.count()).select_from(ParkingSession)),
+        }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    phases = [
+        ("entry", gate_requests(args.gate_events, "entry", args.plate_prefix)),
+        ("dashboard", read_requests(args.reads)),
+        ("mixed", interleave(gate_requests(args.gate_events, "exit", args.plate_prefix), read_requests(args.reads))),
+    ]
+    results = {}
+
+    async def run_all(client):
+        try:
+            await run_phase(client, read_requests(args.warmup), args.concurrency, args.timeout)
+            for name, requests in phases:
+                results[name] = await run_phase(client, requests, args.concurrency, args.timeout)
+                print_phase(name, results[name])
+        finally:
+            if _late:
+                print(f"\n⏳ Esperando {len(_late)} peticiones vencidas")
+                await asyncio.gather(*_late, return_exceptions=True)
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+            await run_all(client)
+        return results
+
+    from app.database.connection import dispose_engines
+    from app.main import app, lifespan
+
+    try:
+        async with lifespan(app):
+            # Errores de la app como 500 (igual que un servidor real), no como excepción
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+                await run_all(client)
+    finally:
+        # Si la corrida se interrumpe, el cierre de lifespan no corre; los hilos de
+        # aiosqlite no son daemon y dejarían el proceso colgado sin reporte
+        await dispose_engines()
+    return results
+
+
+def print_phase(name: str, phase: dict) -> None:
+    print(f"\n▶ {name}: {phase['requests']} peticiones en {phase['seconds']} s ({phase['throughput']} req/s)")
+    print(f"  {'endpoint':<22} {'n':>6} {'err':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'sql':>6} {'sql max':>8} {'db ms':>7}")
+    for endpoint, s in phase["endpoints"].items():
+        print(
+            f"  {endpoint:<22} {s['requests']:>6} {s['errors']:>5} {s['throughput']:>8} {s['p50_ms']:>8} "
+            f"{s['p95_ms']:>8} {s['p99_ms']:>8} {s.get('queries_mean', '-'):>6} {s.get('queries_max', '-'):>8} "
+            f"{s.get('db_ms_mean', '-'):>7}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prueba de carga de portería y tableros")
+    parser.add_argument("--url", help="servidor ya levantado; sin esto la app corre dentro del proceso")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--gate-events", type=int, default=1000, help="entradas (y luego salidas) de placas nuevas")
+    parser.add_argument("--reads", type=int, default=400, help="lecturas de tablero por fase")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=60, help="segundos por petición")
+    parser.add_argument(
+        "--plate-prefix",
+        default=f"B{secrets.token_hex(2).upper()}",
+        help="prefijo de las placas de la corrida (por defecto uno al azar: repetir sobre la misma BD no choca)",
+    )
+    parser.add_argument("--output", type=Path, help=f"archivo JSON (por defecto en {RESULTS_DIR.name}/)")
+    args = parser.parse_args()
+
+    started_at = datetime.now()
+    results = asyncio.run(run(args))
+    report = {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "target": args.url or "in-process",
+        "database": None if args.url else database_info(),
+        "settings": {
+            "concurrency": args.concurrency,
+            "gate_events": args.gate_events,
+            "reads": args.reads,
+            "plate_prefix": args.plate_prefix,
+            "gate_ingestion_mode": os.getenv("GATE_INGESTION_MODE", "direct"),
+        },
+        "python": platform.python_version(),
+        "phases": results,
+    }
+
+    output = args.output or RESULTS_DIR / f"load_{started_at:%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\n📄 {output}")
+
+
+if __name__ == "__main__":
+    main()
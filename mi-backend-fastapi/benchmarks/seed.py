@@ -0,0 +1,162 @@
+"""Base de datos de prueba con volumen realista para las pruebas de carga.
+
+Crea el esquema (alembic upgrade head) en la BD de DATABASE_URL y la llena con vehículos,
+visitas y facturas repartidas en los últimos días, con los mismos formatos que la
+portería: una factura por visita (número YYYYMMDD-nnnn), la última visita de algunos
+vehículos sigue abierta, y los acumulados diarios y la ocupación por minuto se
+reconstruyen con los backfills de la app. Las filas se generan con semilla fija: dos
+corridas con los mismos parámetros dan la misma BD.
+
+Solo llena una BD vacía (no mezcla datos de prueba con datos reales).
+
+Uso (desde mi-backend-fastapi/):
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.seed --vehicles 200000 --visits 2
+"""
+import argparse
+import random
+import string
+import time
+from collections import Counter
+from datetime import timedelta
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.core.timezone import lot_now
+from app.database.backfill_change_log import backfill_change_log
+from app.database.backfill_occupancy import backfill_occupancy_minutes
+from app.database.backfill_rollups import backfill_daily_rollups
+from app.database.connection import engine
+from app.database.create_tables import create_tables
+from app.models.invoice import Invoice
+from app.models.invoice_sequence import InvoiceSequence
+from app.models.parking_session import ParkingSession
+from app.models.vehicle import Vehicle
+from app.services.tariffs import current_tariff
+
+BATCH_SIZE = 5000
+
+
+def make_plate(n: int) -> str:
+    # ABC123 (carros) con un prefijo distinto por cada 1000 vehículos: placas únicas
+    letters = string.ascii_uppercase
+    block, number = divmod(n, 1000)
+    return f"{letters[block // 676 % 26]}{letters[block // 26 % 26]}{letters[block % 26]}{number:03d}"
+
+
+# Visitas de un vehículo: entradas ordenadas dentro de la ventana, sin solaparse
+def make_visits(rng: random.Random, count: int, start, span_minutes: int, open_last: bool):
+    entries = sorted(rng.randrange(span_minutes) for _ in range(count))
+    visits = []
+    for i, offset in enumerate(entries):
+        limit = (entries[i + 1] if i + 1 < count else span_minutes) - offset - 1
+        # Estadías cortas la mayoría, algunas de medio día
+        minutes = min(int(rng.lognormvariate(4.3, 0.8)), max(limit, 0))
+        entry = start + timedelta(minutes=offset, seconds=rng.randrange(60))
+        exit_time = None if open_last and i == count - 1 else entry + timedelta(minutes=minutes, seconds=rng.randrange(60))
+        visits.append((entry, exit_time))
+    return visits
+
+
+def seed(vehicles: int, visits: int, days: int, inside: int, motos: float, seed_value: int) -> dict:
+    rng = random.Random(seed_value)
+    now = lot_now().replace(microsecond=0)
+    start = now - timedelta(days=days)
+    span_minutes = days * 1440 - 60  # la última hora queda libre para la prueba de carga
+
+    counters: Counter = Counter()
+    vehicle_rows, invoice_rows, session_rows = [], [], []
+    invoice_id = session_id = 0
+    totals = {"vehicles": 0, "invoices": 0, "sessions": 0}
+
+    def flush(db: Session, force: bool = False):
+        for model, rows, key in (
+            (Vehicle, vehicle_rows, "vehicles"),
+            (Invoice, invoice_rows, "invoices"),
+            (ParkingSession, session_rows, "sessions"),
+        ):
+            if rows and (force or len(rows) >= BATCH_SIZE):
+                db.execute(insert(model), rows)
+                totals[key] += len(rows)
+                rows.clear()
+
+    with Session(engine) as db:
+        if db.scalar(select(func.count()).select_from(Vehicle)):
+            raise SystemExit("La BD ya tiene vehículos: el seed solo llena una BD vacía")
+
+        for vehicle_id in range(1, vehicles + 1):
+            vehicle_type = "moto" if rng.random() < motos else "carro"
+            count = max(1, int(rng.expovariate(1 / visits) + 0.5))
+            is_inside = vehicle_id <= inside
+            history = make_visits(rng, count, start, span_minutes, open_last=is_inside)
+            last_entry, last_exit = history[-1]
+            vehicle_rows.append({
+                "id": vehicle_id,
+                "license_plate": make_plate(vehicle_id),
+                "vehicle_type": vehicle_type,
+                "is_inside": is_inside,
+                "status": "en parqueadero" if is_inside else "Fuera",
+                "entry_time": last_entry,
+                "exit_time": last_exit,
+                "created_at": history[0][0],
+                "registration_value": current_tariff.registration_value(vehicle_type),
+            })
+            for entry, exit_time in history:
+                minutes, amount = current_tariff.fare(vehicle_type, entry, exit_time) if exit_time else (0, 0)
+                day = entry.strftime("%Y%m%d")
+                counters[day] += 1
+                invoice_id += 1
+                session_id += 1
+                invoice_rows.append({
+                    "id": invoice_id,
+                    "invoice_number": f"{day}-{counters[day]:04d}",
+                    "date": entry,
+                    "vehicle_id": vehicle_id,
+                    "total_amount": amount,
+                    "parking_time": minutes,
+                })
+                session_rows.append({
+                    "id": session_id,
+                    "vehicle_id": vehicle_id,
+                    "invoice_id": invoice_id,
+                    "entry_time": entry,
+                    "exit_time": exit_time,
+                    "amount": amount,
+                    "minutes": minutes,
+                })
+            flush(db)
+        flush(db, force=True)
+
+        # Consecutivos del día para que la portería siga la numeración sin chocar
+        db.execute(insert(InvoiceSequence), [{"day": day, "last_value": value} for day, value in counters.items()])
+
+        if db.get_bind().dialect.name == "postgresql":
+            # Los ids se insertaron explícitos: llevar las secuencias al máximo
+            for table in ("vehicles", "invoices", "parking_sessions"):
+                db.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"))
+        db.commit()
+
+    totals["daily_rollups"] = backfill_daily_rollups(engine)
+    totals["occupancy_minutes"] = backfill_occupancy_minutes(engine)
+    totals["change_log_baseline"] = backfill_change_log(engine)
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Llena la BD de DATABASE_URL con datos de prueba")
+    parser.add_argument("--vehicles", type=int, default=200_000)
+    parser.add_argument("--visits", type=float, default=2, help="visitas promedio por vehículo")
+    parser.add_argument("--days", type=int, default=90, help="días de historial hacia atrás")
+    parser.add_argument("--inside", type=int, default=300, help="vehículos con la visita abierta")
+    parser.add_argument("--motos", type=float, default=0.2, help="fracción de motos")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    create_tables()
+    started = time.perf_counter()
+    totals = seed(args.vehicles, args.visits, args.days, args.inside, args.motos, args.seed)
+    print(f"✅ {totals} en {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Costo por fila de serializar listas de vehículos.
+
+Compara el camino anterior (model_validate por fila + validación y serialización de
+FastAPI con response_model + json.dumps) con el actual (dicts armados desde SQL y orjson).
+
+Uso (desde mi-backend-fastapi/):
+    python -m benchmarks.serialization [filas ...]
+"""
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.serialization import dumps
+from app.schemas.vehicle import VehicleListResponseMessage, VehicleResponse
+
+
+def make_rows(count: int) -> list[dict]:
+    start = datetime(2024, 1, 1, 7, 0)
+    rows = []
+    for i in range(count):
+        entry = start + timedelta(minutes=i)
+        closed = i % 3 != 0
+        rows.append({
+            "id": i + 1,
+            "session_id": i + 1,
+            "license_plate": f"ABC{i:05d}",
+            "vehicle_type": "carro" if i % 4 else "moto",
+            "entry_time": entry.isoformat(),
+            "registration_value": 3000.0,
+            "status": "Fuera" if closed else "en parqueadero",
+            "exit_time": (entry + timedelta(minutes=95)).isoformat() if closed else None,
+            "invoice_number": f"20240101-{i:04d}",
+            "total_amount": 4750.0 if closed else 0.0,
+            "parking_time": 95 if closed else 0,
+        })
+    return rows
+
+
+# Antes: validar cada fila, armar el dict de respuesta y dejar que FastAPI lo
+# valide contra response_model y lo serialice con jsonable_encoder + json.dumps
+def legacy(rows: list[dict]) -> bytes:
+    responses = [VehicleResponse.model_validate(row) for row in rows]
+    content = {"success": True, "message": "ok", "vehicles": responses}
+    validated = VehicleListResponseMessage.model_validate(
+        {**content, "vehicles": [r.model_dump() for r in responses]}
+    )
+    payload = jsonable_encoder(validated.model_dump(mode="json"))
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+# Intermedio: una sola validación y serialización nativa de Pydantic
+def validated_once(rows: list[dict]) -> bytes:
+    return VehicleListResponseMessage(success=True, message="ok", vehicles=rows).model_dump_json().encode()
+
+
+# Ahora: filas de confianza (armadas desde SQL) directo a orjson
+def fast_path(rows: list[dict]) -> bytes:
+    return dumps({"success": True, "message": "ok", "vehicles": rows})
+
+
+def measure(fn, rows: list[dict], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(sizes: list[int]) -> None:
+    print(f"{'filas':>8} {'camino':<16} {'total ms':>10} {'µs/fila':>9} {'x':>6}")
+    for size in sizes:
+        rows = make_rows(size)
+        repeat = max(3, 200_000 // size)
+        baseline = None
+        for name, fn in (("legacy", legacy), ("validated_once", validated_once), ("orjson", fast_path)):
+            seconds = measure(fn, rows, repeat)
+            baseline = baseline or seconds
+            print(f"{size:>8} {name:<16} {seconds * 1000:>10.2f} {seconds / size * 1e6:>9.2f} {baseline / seconds:>6.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000])
@@ -0,0 +1,73 @@
+"""Costo de tarificar visitas fila por fila frente al modo lote con NumPy.
+
+Todas las rutas aplican la misma tarifa (franja nocturna y tope diario) y deben dar
+exactamente los mismos valores; se verifica antes de medir. "numpy" recibe listas de
+datetime (como llegan de la BD); "numpy_arrays" ya recibe arreglos datetime64.
+
+Uso (desde mi-backend-fastapi/):
+    python -m benchmarks.tariffs [visitas ...]
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.services.tariffs import Tariff
+
+TARIFF = Tariff.from_dict({
+    "carro": {"hourly_rate": 3000, "bands": [{"start": "22:00", "end": "06:00", "hourly_rate": 1500}], "daily_cap": 30000},
+    "moto": {"hourly_rate": 2000, "daily_cap": 15000},
+})
+
+
+def make_sessions(count: int) -> tuple[list, list, list]:
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    types, entries, exits = [], [], []
+    for _ in range(count):
+        entry = start + timedelta(seconds=rng.randrange(365 * 86400))
+        types.append("carro" if rng.random() < 0.7 else "moto")
+        entries.append(entry)
+        exits.append(entry + timedelta(seconds=rng.randrange(30, 3 * 86400)))
+    return types, entries, exits
+
+
+def row_by_row(types, entries, exits) -> list[int]:
+    return [TARIFF.fare(t, entry, exit)[1] for t, entry, exit in zip(types, entries, exits)]
+
+
+def vectorized(types, entries, exits) -> list[int]:
+    return TARIFF.fares(types, entries, exits)[1].tolist()
+
+
+def measure(fn, sessions, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*sessions)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(sizes: list[int]) -> None:
+    print(f"{'visitas':>9} {'camino':<13} {'total ms':>10} {'µs/visita':>10} {'x':>6}")
+    for size in sizes:
+        sessions = make_sessions(size)
+        arrays = (sessions[0], np.array(sessions[1], dtype="datetime64[us]"), np.array(sessions[2], dtype="datetime64[us]"))
+        assert row_by_row(*sessions) == vectorized(*sessions) == vectorized(*arrays), "las rutas no coinciden"
+        repeat = max(3, 300_000 // size)
+        baseline = None
+        for name, fn, data in (
+            ("fila_a_fila", row_by_row, sessions),
+            ("numpy", vectorized, sessions),
+            ("numpy_arrays", vectorized, arrays),
+        ):
+            seconds = measure(fn, data, repeat)
+            baseline = baseline or seconds
+            print(f"{size:>9} {name:<13} {seconds * 1000:>10.2f} {seconds / size * 1e6:>10.2f} {baseline / seconds:>6.1f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 500_000])
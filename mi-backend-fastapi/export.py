@@ -0,0 +1,33 @@
+import argparse
+import sys
+from datetime import date
+
+from app.database.connection import SessionLocal
+from app.services.export import DATASETS, FORMATS, export_chunks, export_filename
+
+# 📤 Exportación para contabilidad desde la línea de comandos, p. ej.:
+#   python export.py invoices --from 2024-01-01 --to 2024-01-31
+#   python export.py sessions --format parquet --output visitas.parquet
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exportar facturas o visitas a CSV/Parquet")
+    parser.add_argument("dataset", choices=list(DATASETS))
+    parser.add_argument("--format", choices=list(FORMATS), default="csv")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat)
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat)
+    parser.add_argument("--output", help="Archivo de salida ('-' para stdout, solo CSV)")
+    args = parser.parse_args()
+
+    output = args.output or export_filename(args.dataset, args.format, args.date_from, args.date_to)
+    if output == "-" and args.format != "csv":
+        parser.error("Parquet no se puede escribir en stdout; usa --output")
+
+    with SessionLocal() as db:
+        target = sys.stdout.buffer if output == "-" else open(output, "wb")
+        try:
+            for chunk in export_chunks(db, args.dataset, args.format, args.date_from, args.date_to):
+                target.write(chunk)
+        finally:
+            if target is not sys.stdout.buffer:
+                target.close()
+    if output != "-":
+        print(f"✅ Exportado a {output}", file=sys.stderr)
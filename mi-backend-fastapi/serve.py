@@ -0,0 +1,106 @@
+import logging
+import os
+import time
+
+# 🚀 Arranque de producción: varios procesos (uno por núcleo por defecto) sobre el mismo
+# puerto. En Linux usa gunicorn con workers de uvicorn (reinicio gradual con SIGHUP,
+# reciclaje por max_requests); si gunicorn no está (p. ej. Windows) usa los workers de
+# uvicorn. No toca el esquema: `alembic upgrade head` se corre antes de desplegar.
+#
+#   python serve.py                     # WEB_WORKERS = núcleos de la máquina
+#   WEB_WORKERS=4 WEB_PRELOAD=true python serve.py
+#
+# run.py sigue siendo el arranque de desarrollo (un proceso con recarga).
+
+WEB_HOST = os.getenv("WEB_HOST", "0.0.0.0")
+WEB_PORT = int(os.getenv("WEB_PORT", 8000))
+WEB_WORKERS = int(os.getenv("WEB_WORKERS") or os.cpu_count() or 1)
+WEB_BACKLOG = int(os.getenv("WEB_BACKLOG", 2048))
+WEB_PRELOAD = os.getenv("WEB_PRELOAD", "false").lower() in ("1", "true", "yes")
+WEB_GRACEFUL_TIMEOUT = int(os.getenv("WEB_GRACEFUL_TIMEOUT", 30))
+WEB_TIMEOUT = int(os.getenv("WEB_TIMEOUT", 60))
+WEB_KEEPALIVE = int(os.getenv("WEB_KEEPALIVE", 5))
+WEB_MAX_REQUESTS = int(os.getenv("WEB_MAX_REQUESTS", 0))  # 0 = sin reciclaje de workers
+WEB_LOG_LEVEL = os.getenv("WEB_LOG_LEVEL", "info")
+
+APP = "app.main:app"
+
+logger = logging.getLogger("serve")
+
+
+# Conexiones creadas antes del fork (con WEB_PRELOAD el módulo se importa en el proceso
+# maestro) no se comparten: cada worker descarta el pool heredado sin cerrarlo y abre el suyo
+def post_fork(server, worker):
+    from app.database.connection import reset_engines_after_fork
+
+    reset_engines_after_fork()
+
+
+def gunicorn_options() -> dict:
+    return {
+        "bind": f"{WEB_HOST}:{WEB_PORT}",
+        "workers": WEB_WORKERS,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "backlog": WEB_BACKLOG,
+        "preload_app": WEB_PRELOAD,
+        "graceful_timeout": WEB_GRACEFUL_TIMEOUT,
+        "timeout": WEB_TIMEOUT,
+        "keepalive": WEB_KEEPALIVE,
+        "max_requests": WEB_MAX_REQUESTS,
+        "max_requests_jitter": WEB_MAX_REQUESTS // 10,
+        "loglevel": WEB_LOG_LEVEL,
+        "accesslog": "-",
+        "post_fork": post_fork,
+    }
+
+
+def run_gunicorn() -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class ParkingApplication(BaseApplication):
+        def load_config(self):
+            for key, value in gunicorn_options().items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+
+            return app
+
+    ParkingApplication().run()
+
+
+def run_uvicorn() -> None:
+    import uvicorn
+
+    # Con varios workers uvicorn importa la app en cada proceso hijo (no hay preload)
+    uvicorn.run(
+        APP,
+        host=WEB_HOST,
+        port=WEB_PORT,
+        workers=WEB_WORKERS,
+        backlog=WEB_BACKLOG,
+        timeout_keep_alive=WEB_KEEPALIVE,
+        timeout_graceful_shutdown=WEB_GRACEFUL_TIMEOUT,
+        limit_max_requests=WEB_MAX_REQUESTS or None,
+        log_level=WEB_LOG_LEVEL,
+    )
+
+
+def main() -> None:
+    logging.basicConfig(level=WEB_LOG_LEVEL.upper(), format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    # Los workers heredan el entorno: la app sabe si comparte la BD con otros procesos
+    os.environ["WEB_WORKERS"] = str(WEB_WORKERS)
+    os.environ.setdefault("WEB_LAUNCHED_AT", repr(time.time()))
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        logger.info("gunicorn no está instalado; se usan los workers de uvicorn (%s)", WEB_WORKERS)
+        run_uvicorn()
+        return
+    logger.info("gunicorn con %s workers en %s:%s (preload=%s)", WEB_WORKERS, WEB_HOST, WEB_PORT, WEB_PRELOAD)
+    run_gunicorn()
+
+
+if __name__ == "__main__":
+    main()
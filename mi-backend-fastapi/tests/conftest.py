@@ -0,0 +1,30 @@
+import os
+import tempfile
+from pathlib import Path
+
+# La BD de pruebas se fija antes de importar la app (connection.py lee el entorno al importar)
+TEST_DB = Path(tempfile.mkdtemp(prefix="parking-tests-")) / "parking.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DB}"
+for name in ("ASYNC_DATABASE_URL", "DATABASE_READ_URL", "ASYNC_DATABASE_READ_URL", "TARIFFS_FILE"):
+    os.environ.pop(name, None)
+os.environ.setdefault("SECRET_KEY", "pruebas")
+os.environ["DB_QUERY_STATS"] = "true"
+os.environ["GATE_INGESTION_MODE"] = "direct"
+os.environ["WEB_WORKERS"] = "1"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database.create_tables import create_tables
+from benchmarks.seed import seed
+
+
+@pytest.fixture(scope="session")
+def client():
+    create_tables()
+    seed(vehicles=400, visits=2, days=10, inside=25, motos=0.2, seed_value=7)
+
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,38 @@
+import pytest
+
+from app.core import security
+from app.database.connection import async_engine
+from app.routers import auth
+
+
+# bcrypt corre sin ninguna conexión de escritura tomada (en SQLite, sin el lock de la portería)
+@pytest.fixture
+def writer_checks(monkeypatch):
+    checked_out = []
+
+    def watch(fn):
+        async def wrapper(*args):
+            checked_out.append(async_engine.pool.checkedout())
+            return await fn(*args)
+        return wrapper
+
+    monkeypatch.setattr(auth, "hash_password_async", watch(security.hash_password_async))
+    monkeypatch.setattr(auth, "verify_password_async", watch(security.verify_password_async))
+    return checked_out
+
+
+def test_password_hashing_holds_no_writer(client, writer_checks):
+    user = {"username": "cajero1", "email": "cajero1@parking.test", "password": "secreta123"}
+    assert client.post("/api/v1/auth/auth/register", json=user).status_code == 201
+    assert client.post("/api/v1/auth/auth/register", json=user).status_code == 400
+
+    login = client.post("/api/v1/auth/auth/login", data={"username": "cajero1", "password": "secreta123"})
+    assert login.status_code == 200
+    wrong = client.post("/api/v1/auth/auth/login", data={"username": "cajero1", "password": "otra"})
+    assert wrong.status_code == 401
+
+    token = login.json()["access_token"]
+    me = client.get("/api/v1/auth/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert me.json()["username"] == "cajero1"
+
+    assert writer_checks == [0, 0, 0]
@@ -0,0 +1,19 @@
+from app.services.events import event_hub
+
+
+def published_since(last_id: int) -> list[dict]:
+    return [event.data for event in event_hub.replay(last_id) or []]
+
+
+# Los eventos de /batch traen los mismos campos de fila que los de una entrada directa
+def test_batch_events_carry_full_rows(client):
+    last_id = event_hub.last_id
+    client.post("/api/v1/vehicles/entry/EVD1", json={"vehicle_type": "moto"})
+    client.post(
+        "/api/v1/vehicles/batch",
+        json=[{"type": "entry", "license_plate": "EVB1", "timestamp": "2026-01-15T10:00:00", "vehicle_type": "moto"}],
+    )
+
+    direct, batched = published_since(last_id)
+    assert set(batched) >= set(direct)
+    assert (batched["vehicle_type"], batched["status"]) == (direct["vehicle_type"], direct["status"])
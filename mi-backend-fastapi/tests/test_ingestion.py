@@ -0,0 +1,44 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database.connection import ASYNC_DATABASE_URL, build_async_engine
+from app.services.events import event_hub
+from app.services.ingestion import GateBatcher
+from app.services.occupancy import occupancy_index
+from app.services.stats import parking_stats
+
+
+# Un cliente que se desconecta mientras su lote se confirma: la fila queda en la BD, así
+# que índice, /stats y eventos también deben reflejarla
+def test_committed_event_is_applied_after_client_disconnects(client):
+    entries_before = parking_stats.snapshot()["entries_today"]
+    last_id = event_hub.last_id
+
+    async def scenario():
+        async_engine = build_async_engine(ASYNC_DATABASE_URL)
+        batcher = GateBatcher(async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False))
+        submitter = None
+
+        async def apply_then_disconnect(db, event):
+            response = await GateBatcher._apply(db, event)
+            submitter.cancel()  # el cliente se va antes del commit del lote
+            return response
+
+        batcher._apply = apply_then_disconnect
+        batcher.start()
+        try:
+            submitter = asyncio.create_task(batcher.submit("entry", "CANC001", {}))
+            await asyncio.wait([submitter])
+            assert submitter.cancelled()
+            while batcher.events == 0:
+                await asyncio.sleep(0.01)
+        finally:
+            await batcher.stop()
+            await async_engine.dispose()
+
+    asyncio.run(scenario())
+
+    assert occupancy_index.get("CANC001") is not None
+    assert parking_stats.snapshot()["entries_today"] == entries_before + 1
+    assert [event.data["license_plate"] for event in event_hub.replay(last_id)] == ["CANC001"]
@@ -0,0 +1,54 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+def alembic(database: Path, *args: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{database}"}
+    return subprocess.run(
+        [sys.executable, "-m", "alembic", *args], cwd=BACKEND, env=env, capture_output=True, text=True
+    )
+
+
+# Una base del create_all viejo (parking.db) termina igual que los modelos tras migrar
+def test_legacy_database_has_no_drift(tmp_path):
+    database = tmp_path / "legacy.db"
+    shutil.copy(BACKEND / "parking.db", database)
+
+    upgrade = alembic(database, "upgrade", "head")
+    assert upgrade.returncode == 0, upgrade.stderr
+    check = alembic(database, "check")
+    assert check.returncode == 0, check.stderr
+
+
+# Placas que se vuelven iguales al normalizar: un solo vehículo (el de menor id) con
+# las visitas y facturas de todos, y el estado del que entró de último
+def test_plate_normalization_merges_vehicles(tmp_path):
+    database = tmp_path / "legacy.db"
+    shutil.copy(BACKEND / "parking.db", database)
+    with sqlite3.connect(database) as connection:
+        keeper = connection.execute("SELECT id FROM vehicles WHERE license_plate = 'ABC123'").fetchone()[0]
+        duplicate = connection.execute(
+            "INSERT INTO vehicles (license_plate, vehicle_type, is_inside, entry_time, status) "
+            "VALUES (' abc123', 'moto', 1, '2099-01-01 08:00:00', 'en parqueadero')"
+        ).lastrowid
+        connection.execute(
+            "INSERT INTO invoices (invoice_number, vehicle_id, total_amount, parking_time) "
+            "VALUES ('DUP-1', ?, 0, 0)", (duplicate,)
+        )
+
+    assert alembic(database, "upgrade", "head").returncode == 0
+
+    with sqlite3.connect(database) as connection:
+        rows = connection.execute(
+            "SELECT id, vehicle_type, is_inside FROM vehicles WHERE license_plate = 'ABC123'"
+        ).fetchall()
+        invoice_vehicle = connection.execute("SELECT vehicle_id FROM invoices WHERE invoice_number = 'DUP-1'")
+        assert rows == [(keeper, "moto", 1)]
+        assert invoice_vehicle.fetchone()[0] == keeper
+        assert connection.execute("SELECT COUNT(*) FROM parking_sessions WHERE vehicle_id = ?", (duplicate,)).fetchone()[0] == 0
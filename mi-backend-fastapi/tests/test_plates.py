@@ -0,0 +1,41 @@
+import pytest
+
+from app.services.occupancy import occupancy_index
+
+
+# La misma placa escrita distinto es el mismo vehículo, con o sin índice de ocupación
+@pytest.mark.parametrize("index_ready", [True, False], ids=["con índice", "sin índice"])
+def test_entry_plate_is_normalized(client, monkeypatch, index_ready):
+    monkeypatch.setattr(occupancy_index, "ready", index_ready)
+    plate = "nrm1" if index_ready else "nrm2"
+
+    first = client.post(f"/api/v1/vehicles/entry/{plate}", json={}).json()
+    assert first["success"] and first["license_plate"] == plate.upper()
+
+    duplicate = client.post(f"/api/v1/vehicles/entry/ {plate.upper()}", json={}).json()
+    assert not duplicate["success"]
+
+    exit_ = client.put(f"/api/v1/vehicles/exit/{plate}").json()
+    assert exit_["success"] and exit_["license_plate"] == plate.upper()
+
+
+def test_batch_plate_is_normalized(client):
+    events = [
+        {"type": "entry", "license_plate": "nrmb1", "timestamp": "2026-01-15T10:00:00"},
+        {"type": "entry", "license_plate": "NRMB1", "timestamp": "2026-01-15T10:01:00"},
+    ]
+    results = client.post("/api/v1/vehicles/batch", json=events).json()["results"]
+
+    assert [item["success"] for item in results] == [True, False]
+    assert results[0]["license_plate"] == "NRMB1"
+
+
+# Historial y facturas filtran por placa con la misma normalización con la que se guardó
+def test_plate_filters_agree(client):
+    client.post("/api/v1/vehicles/entry/flt1", json={})
+
+    history = client.get("/api/v1/vehicles/history", params={"plate": " flt1"}).json()["history"]
+    invoices = client.get("/api/v1/invoices/invoices/", params={"plate": "flt1"}).json()
+
+    assert [row["license_plate"] for row in history] == ["FLT1"]
+    assert [row["vehicle"]["license_plate"] for row in invoices] == ["FLT1"]
@@ -0,0 +1,103 @@
+import pytest
+
+from app.services.http_cache import response_cache
+from app.services.occupancy import occupancy_index
+from app.services.reports import report_cache
+
+# Máximo de sentencias SQL por petición. No depende de cuántas filas haya: cada prueba
+# mide, agrega visitas y vuelve a medir. Un N+1 (una consulta por fila) rompe la igualdad.
+READ_BUDGETS = [
+    ("/api/v1/vehicles/active", 1),
+    ("/api/v1/vehicles/today", 2),
+    ("/api/v1/vehicles/history", 2),
+    ("/api/v1/vehicles/history?limit=50", 2),
+    ("/api/v1/vehicles/daily-summary", 1),
+    ("/api/v1/vehicles/stats", 0),
+    ("/api/v1/invoices/invoices/", 2),
+    ("/api/v1/invoices/invoices/?limit=50", 2),
+    ("/api/v1/invoices/invoices/?plate=AAA001", 2),
+    ("/api/v1/sync?since=1", 5),
+    ("/api/v1/reports/revenue", 2),
+    ("/api/v1/reports/stays", 2),
+    ("/api/v1/reports/occupancy", 2),
+    ("/api/v1/tariffs", 0),
+]
+
+# Las escrituras en SQLite incluyen su BEGIN IMMEDIATE explícito
+ENTRY_BUDGET = 13
+EXIT_BUDGET = 12
+BATCH_BUDGET = 12
+
+
+def query_count(client, method: str, url: str, **kwargs) -> int:
+    # Sin cuerpos ni reportes en caché: se mide el camino completo hasta la BD
+    response_cache.clear()
+    report_cache.clear()
+    response = client.request(method, url, **kwargs)
+    assert response.status_code < 400, response.text
+    return int(response.headers["X-DB-Queries"])
+
+
+# Visitas nuevas: todas entran y la mitad sale (crecen activos, historial y facturas)
+def add_visits(client, prefix: str, count: int = 10) -> None:
+    plates = [f"{prefix}{i:03d}" for i in range(count)]
+    for plate in plates:
+        assert client.post(f"/api/v1/vehicles/entry/{plate}", json={}).json()["success"]
+    for plate in plates[::2]:
+        assert client.put(f"/api/v1/vehicles/exit/{plate}").json()["success"]
+
+
+@pytest.mark.parametrize("url,budget", READ_BUDGETS)
+def test_read_query_count_does_not_grow(client, url, budget):
+    before = query_count(client, "GET", url)
+    add_visits(client, f"R{READ_BUDGETS.index((url, budget)):02d}X")
+    after = query_count(client, "GET", url)
+
+    assert after <= budget, f"{url}: {after} consultas (máximo {budget})"
+    assert after == before, f"{url}: {before} → {after} consultas al crecer las tablas"
+
+
+def test_active_without_occupancy_index(client, monkeypatch):
+    monkeypatch.setattr(occupancy_index, "ready", False)
+    before = query_count(client, "GET", "/api/v1/vehicles/active")
+    add_visits(client, "ACTX")
+    after = query_count(client, "GET", "/api/v1/vehicles/active")
+
+    assert after == before <= 2
+
+
+def test_gate_query_count(client):
+    entry = query_count(client, "POST", "/api/v1/vehicles/entry/GATE001", json={"vehicle_type": "moto"})
+    exit_ = query_count(client, "PUT", "/api/v1/vehicles/exit/GATE001")
+    add_visits(client, "GROWX", count=20)
+    assert query_count(client, "POST", "/api/v1/vehicles/entry/GATE002", json={}) <= entry <= ENTRY_BUDGET
+    assert query_count(client, "PUT", "/api/v1/vehicles/exit/GATE002") <= exit_ <= EXIT_BUDGET
+
+
+def batch(prefix: str, count: int) -> list[dict]:
+    return [
+        {"type": "entry", "license_plate": f"{prefix}{i:03d}", "timestamp": "2026-01-15T10:00:00"}
+        for i in range(count)
+    ]
+
+
+def test_batch_query_count_does_not_grow_with_events(client):
+    # El primer lote del día crea el consecutivo; se descuenta con un lote previo
+    query_count(client, "POST", "/api/v1/vehicles/batch", json=batch("BW", 1))
+    small = query_count(client, "POST", "/api/v1/vehicles/batch", json=batch("BS", 5))
+    large = query_count(client, "POST", "/api/v1/vehicles/batch", json=batch("BL", 50))
+
+    assert large == small <= BATCH_BUDGET
+
+
+# Los ids de los INSERT múltiples del lote quedan asociados a la placa correcta
+def test_batch_ids_match_plates(client):
+    results = client.post("/api/v1/vehicles/batch", json=batch("BID", 20)).json()["results"]
+    history = client.get("/api/v1/vehicles/history").json()["history"]
+    rows = {row["session_id"]: row for row in history}
+
+    for item in results:
+        row = rows[item["session_id"]]
+        assert (row["id"], row["license_plate"], row["invoice_number"]) == (
+            item["id"], item["license_plate"], item["invoice_number"]
+        )
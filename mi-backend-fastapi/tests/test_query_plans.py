@@ -0,0 +1,73 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.timezone import lot_now
+from app.database.connection import ASYNC_DATABASE_URL, build_async_engine, engine
+from app.database.instrumentation import explain, full_scans, instrument_engine, track_queries
+from app.models.invoice import Invoice
+from app.models.parking_session import ParkingSession
+from app.models.vehicle import Vehicle
+from app.services.gate import apply_entry, apply_exit
+from app.services.reports import revenue_query
+from app.services.vehicle_projection import vehicle_rows_query
+
+# Tablas que crecen con el uso: ninguna consulta caliente las puede recorrer completas
+HOT_TABLES = {"vehicles", "invoices", "parking_sessions"}
+
+OPEN_SESSIONS = ("ix_parking_sessions_open", "ix_parking_sessions_exit_time", "ix_parking_sessions_vehicle_entry")
+
+# (nombre, sentencia, índices aceptados: alguno debe aparecer en el plan)
+HOT_QUERIES = [
+    ("placa", select(Vehicle).where(Vehicle.license_plate == "AAA001"), ("ix_vehicles_license_plate",)),
+    ("última factura", select(func.max(Invoice.id)).where(Invoice.vehicle_id == 1), ("ix_invoices_vehicle_latest",)),
+    ("activos", vehicle_rows_query(ParkingSession.exit_time.is_(None)), OPEN_SESSIONS),
+    (
+        "visita abierta",
+        select(ParkingSession.id).where(ParkingSession.vehicle_id == 1, ParkingSession.exit_time.is_(None)),
+        OPEN_SESSIONS,
+    ),
+    (
+        "ingresos",
+        revenue_query("day", lot_now() - timedelta(days=30), lot_now(), engine.dialect.name),
+        ("ix_parking_sessions_exit_time",),
+    ),
+]
+
+
+@pytest.mark.parametrize("name,statement,indexes", HOT_QUERIES, ids=[q[0] for q in HOT_QUERIES])
+def test_hot_query_uses_index(client, name, statement, indexes):
+    with engine.connect() as connection:
+        plan = explain(connection, statement)
+
+    assert any(index in line for line in plan for index in indexes), f"{name}: no usa {indexes}: {plan}"
+    assert not full_scans(plan, engine.dialect.name) & HOT_TABLES, f"{name}: recorre la tabla: {plan}"
+
+
+# Entrada y salida completas de la portería: se capturan todas sus sentencias (en una
+# transacción que se descarta) y ninguna puede recorrer completa una tabla caliente
+def test_gate_statements_use_indexes(client):
+    async def capture():
+        async_engine = build_async_engine(ASYNC_DATABASE_URL)
+        instrument_engine(async_engine.sync_engine)
+        try:
+            async with AsyncSession(async_engine) as db:
+                with track_queries(capture=True) as stats:
+                    await apply_entry(db, "PLAN001", {"vehicle_type": "carro"}, lot_now())
+                    await apply_exit(db, "PLAN001", lot_now())
+                await db.rollback()
+        finally:
+            await async_engine.dispose()
+        return stats.captured
+
+    captured = asyncio.run(capture())
+    assert captured
+
+    with engine.connect() as connection:
+        for statement, parameters in captured:
+            plan = explain(connection, statement, parameters)
+            scanned = full_scans(plan, engine.dialect.name) & HOT_TABLES
+            assert not scanned, f"{statement}\nrecorre {scanned}: {plan}"
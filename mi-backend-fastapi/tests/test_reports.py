@@ -0,0 +1,39 @@
+import asyncio
+from datetime import timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.timezone import lot_today
+from app.database.connection import ASYNC_DATABASE_URL, build_async_engine
+from app.services.reports import ReportCache
+
+
+def revenue(cache: ReportCache, day) -> float:
+    async def compute():
+        async_engine = build_async_engine(ASYNC_DATABASE_URL)
+        try:
+            async with AsyncSession(async_engine) as db:
+                return await cache.rows(db, "revenue", "day", day, day)
+        finally:
+            await async_engine.dispose()
+
+    return sum(row["revenue"] for row in asyncio.run(compute()))
+
+
+# Otro worker registra visitas atrasadas en un periodo cerrado: con la caché desactivada
+# (varios workers) este proceso las ve sin que nadie la limpie
+def test_backdated_visits_reach_other_workers(client):
+    day = lot_today() - timedelta(days=3)
+    shared, per_process = ReportCache(enabled=False), ReportCache()
+    before = revenue(shared, day)
+    assert revenue(per_process, day) == before
+
+    results = client.post("/api/v1/vehicles/batch", json=[
+        {"type": "entry", "license_plate": "ATR001", "timestamp": f"{day}T08:00:00"},
+        {"type": "exit", "license_plate": "ATR001", "timestamp": f"{day}T11:00:00"},
+    ]).json()["results"]
+    assert all(item["success"] for item in results)
+
+    assert revenue(shared, day) > before
+    assert revenue(per_process, day) == before  # copia en memoria de este proceso: vieja
+    assert shared.stats()["closed_periods"] == 0
@@ -0,0 +1,22 @@
+from app.services.stats import parking_stats
+
+STATS_FIELDS = ("day", "occupancy", "entries_today", "exits_today", "revenue_today", "total_visits")
+
+
+def stats(client) -> dict:
+    response = client.get("/api/v1/vehicles/stats")
+    return {"queries": int(response.headers["X-DB-Queries"]), **response.json()}
+
+
+# Con varios workers /stats sale de la BD: mismos números que los contadores en memoria
+def test_stats_from_database_match_memory(client, monkeypatch):
+    client.post("/api/v1/vehicles/entry/STAT001", json={})
+    client.put("/api/v1/vehicles/exit/STAT001")
+    client.post("/api/v1/vehicles/entry/STAT002", json={})
+
+    memory = stats(client)
+    monkeypatch.setattr(parking_stats, "from_database", True)
+    database = stats(client)
+
+    assert memory["queries"] == 0 and database["queries"] <= 3
+    assert {key: database[key] for key in STATS_FIELDS} == {key: memory[key] for key in STATS_FIELDS}
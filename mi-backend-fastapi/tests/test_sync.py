@@ -0,0 +1,42 @@
+from app.services import change_log
+
+
+def sync(client, since: int) -> dict:
+    return client.get("/api/v1/sync", params={"since": since}).json()
+
+
+# Los datos cargados sin pasar por el registro (seed) dejan una versión base, no la 0
+def test_seeded_data_has_baseline_version(client):
+    first = sync(client, 0)
+    assert first["reset"] and first["version"] >= 1
+    assert not sync(client, first["version"])["reset"]
+
+
+# Lo recortado por la retención no se puede reanudar: reset=True y se sigue desde la nueva versión
+def test_retention_truncates_log(client, monkeypatch):
+    client.post("/api/v1/vehicles/entry/SYNC001", json={})
+    before = sync(client, 0)["version"]
+
+    monkeypatch.setattr(change_log, "CHANGE_LOG_RETENTION_HOURS", 0)
+    assert client.post("/api/v1/sync/compact").json()["removed"] >= 1
+
+    assert sync(client, before - 1)["reset"]
+    resumed = sync(client, before)
+    assert not resumed["reset"] and resumed["vehicles"] == []
+
+    client.put("/api/v1/vehicles/exit/SYNC001")
+    changed = sync(client, before)
+    assert [row["license_plate"] for row in changed["vehicles"]] == ["SYNC001"]
+
+
+# El ETag sale del contador global: recortar el registro no lo hace retroceder
+def test_etag_survives_retention(client, monkeypatch):
+    client.post("/api/v1/vehicles/entry/SYNC002", json={})
+    etag = client.get("/api/v1/invoices/invoices/").headers["ETag"]
+
+    monkeypatch.setattr(change_log, "CHANGE_LOG_RETENTION_HOURS", 0)
+    client.post("/api/v1/sync/compact")
+
+    assert client.get("/api/v1/invoices/invoices/").headers["ETag"] == etag
+    client.put("/api/v1/vehicles/exit/SYNC002")
+    assert client.get("/api/v1/invoices/invoices/").headers["ETag"] != etag
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.tariffs import DEFAULT_TARIFF, Tariff
+
+# Franja nocturna que cruza la medianoche, tope diario, mínimo y valores con decimales
+# para que el truncado a pesos enteros importe
+TARIFF = Tariff.from_dict({
+    "carro": {
+        "hourly_rate": 3100,
+        "bands": [{"start": "22:00", "end": "06:00", "hourly_rate": 1750.5}],
+        "daily_cap": 25000,
+        "minimum_charge": 700,
+    },
+    "moto": {"hourly_rate": 2033.3, "short_stay_charge": 500},
+})
+
+ENTRY = datetime(2026, 3, 10, 21, 58, 30)
+
+STAYS = [
+    timedelta(0),                        # sin minutos: cobro por visita corta
+    timedelta(seconds=59),               # menos de un minuto
+    timedelta(minutes=1),
+    timedelta(minutes=1, seconds=59),
+    timedelta(minutes=7),                # entra a la franja nocturna
+    timedelta(minutes=13),
+    timedelta(hours=2, minutes=1),       # cruza la medianoche
+    timedelta(hours=8, minutes=2),       # sale justo al terminar la franja
+    timedelta(hours=24),                 # un día exacto: tope
+    timedelta(days=3, minutes=17),       # varios días con tope
+]
+
+
+@pytest.mark.parametrize("tariff", [TARIFF, Tariff.from_dict(DEFAULT_TARIFF)], ids=["franjas", "defecto"])
+@pytest.mark.parametrize("vehicle_type", ["carro", "moto", "car", "motorcycle", None])
+@pytest.mark.parametrize("entry", [ENTRY, ENTRY.replace(hour=5, minute=59, second=59), ENTRY.replace(hour=0, minute=0, second=0)])
+def test_batch_fares_match_gate_fare(tariff, vehicle_type, entry):
+    exits = [entry + stay for stay in STAYS]
+    expected = [tariff.fare(vehicle_type, entry, exit_time) for exit_time in exits]
+
+    types = [vehicle_type] * len(exits)
+    for entries, exit_times in (
+        ([entry] * len(exits), exits),
+        (np.array([entry] * len(exits), dtype="datetime64[us]"), np.array(exits, dtype="datetime64[us]")),
+    ):
+        minutes, amounts = tariff.fares(types, entries, exit_times)
+        assert list(zip(minutes.tolist(), amounts.tolist())) == expected
+
+
+# Un tipo sin tabla no se cobra con la de carro: se rechaza
+def test_unknown_vehicle_type_is_rejected(client):
+    with pytest.raises(ValueError):
+        TARIFF.fare("bus", ENTRY, ENTRY + timedelta(hours=1))
+    with pytest.raises(ValueError):
+        Tariff.from_dict({"carro": {"hourly_rate": 3000}})
+
+    entry = client.post("/api/v1/vehicles/entry/TIPO001", json={"vehicle_type": "bus"})
+    assert entry.status_code == 400
+
+    events = [{"type": "entry", "license_plate": "TIPO002", "timestamp": "2026-01-15T10:00:00", "vehicle_type": "bus"}]
+    result = client.post("/api/v1/vehicles/batch", json=events).json()["results"][0]
+    assert not result["success"]
+
+    simulate = client.post("/api/v1/tariffs/simulate", json={"vehicle_type": "bus"})
+    assert simulate.status_code == 400
+    partial = client.post("/api/v1/tariffs/simulate", json={"tariff": {"carro": {"hourly_rate": 3000}}})
+    assert partial.status_code == 400
@@ -5,8 +5,27 @@ import {
   getActiveVehicles,
   getTodayVehicles as fetchTodayVehicles,
   getVehicleHistory,
+  getVehicleStats,
+  subscribeToParkingEvents,
 } from "../services/vehicleService";
 
+const STATS_POLL_MS = 15000;
+
+// Reemplaza la fila de la misma visita (session_id) o la agrega al final
+const upsertBySession = (list, row) => {
+  const index = list.findIndex((v) => v.session_id === row.session_id);
+  if (index === -1) return [...list, row];
+  const copy = [...list];
+  copy[index] = { ...copy[index], ...row };
+  return copy;
+};
+
+// Fecha local YYYY-MM-DD (las horas del backend vienen en hora local del parqueadero)
+const localDate = (date = new Date()) =>
+  `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, "0")}-${String(date.getDate()).padStart(2, "0")}`;
+
+const enteredToday = (row) => row.entry_time?.slice(0, 10) === localDate();
+
 // ✅ Hook para manejar datos del parqueadero
 export const useParkingData = () => {
   const [activeVehicles, setActiveVehicles] = useState([]);
@@ -18,12 +37,30 @@ export const useParkingData = () => {
     totalHistory: 0,
   });
 
+  // 📡 Aplicar eventos (propios o de otros tableros) sin recargar las listas completas
+  const applyEntry = (row) => {
+    setActiveVehicles((prev) => upsertBySession(prev, row));
+    // Entradas atrasadas (lotes de cámaras) no son de hoy
+    if (enteredToday(row)) {
+      setTodayVehicles((prev) => upsertBySession(prev, row));
+    }
+    setVehicleHistory((prev) => upsertBySession(prev, row));
+  };
+
+  const applyExit = (row) => {
+    setActiveVehicles((prev) => prev.filter((v) => v.session_id !== row.session_id));
+    setTodayVehicles((prev) =>
+      prev.some((v) => v.session_id === row.session_id) ? upsertBySession(prev, row) : prev
+    );
+    setVehicleHistory((prev) => upsertBySession(prev, row));
+  };
+
   // 🚗 Registrar entrada
   const addVehicle = async (payload) => {
     const result = await registerVehicleEntry(payload);
     if (result?.success) {
-      setActiveVehicles((prev) => [...prev, result]);
-      setTodayVehicles((prev) => [...prev, result]);
+      applyEntry(result);
+      loadStatistics();
     }
     return result;
   };
@@ -31,9 +68,10 @@ export const useParkingData = () => {
   // 🚙 Registrar salida
   const removeVehicle = async (plate) => {
     const result = await registerVehicleExit(plate);
-    await loadActiveVehicles();
-    await loadTodayVehicles();
-    await loadHistory();
+    if (result?.success) {
+      applyExit(result);
+      loadStatistics();
+    }
     return result;
   };
 
@@ -64,30 +102,42 @@ export const useParkingData = () => {
     }
   };
 
-  // 📈 Estadísticas corregidas
-  useEffect(() => {
-    const activosEnParqueadero = activeVehicles.filter(
-      (v) => v.status?.toLowerCase().trim() === "en parqueadero"
-    );
-
-    const hoy = new Date().toLocaleDateString();
-    const ingresosHoy = vehicleHistory.filter((v) => {
-      const fechaEntrada = new Date(v.entry_time).toLocaleDateString();
-      return fechaEntrada === hoy;
-    });
-
-    setStatistics({
-      totalActive: activosEnParqueadero.length,
-      totalToday: ingresosHoy.length,
-      totalHistory: vehicleHistory.length,
-    });
-  }, [activeVehicles, todayVehicles, vehicleHistory]);
+  // 📈 Estadísticas calculadas en el backend (/stats), sin recorrer el historial
+  const loadStatistics = async () => {
+    const data = await getVehicleStats();
+    if (data?.success) {
+      setStatistics({
+        totalActive: data.occupancy,
+        totalToday: data.entries_today,
+        totalHistory: data.total_visits,
+      });
+    }
+  };
 
-  // 🔄 Cargar datos al montar
+  // 🔄 Cargar datos al montar y refrescar los contadores periódicamente
   useEffect(() => {
     loadActiveVehicles();
     loadTodayVehicles();
     loadHistory();
+    loadStatistics();
+    const timer = setInterval(loadStatistics, STATS_POLL_MS);
+
+    // Eventos en vivo; "reset" llega si nos perdimos eventos (p. ej. reinicio del servidor)
+    const unsubscribe = subscribeToParkingEvents({
+      entry: applyEntry,
+      exit: applyExit,
+      reset: () => {
+        loadActiveVehicles();
+        loadTodayVehicles();
+        loadHistory();
+        loadStatistics();
+      },
+    });
+
+    return () => {
+      clearInterval(timer);
+      unsubscribe();
+    };
   }, []);
 
   return {
@@ -1,4 +1,5 @@
 const BASE_URL = "http://127.0.0.1:8000/api/v1/vehicles";
+const EVENTS_URL = "http://127.0.0.1:8000/api/v1/events";
 
 // 🛠️ Manejo robusto de errores y respuestas
 const apiRequest = async (url, options = {}) => {
@@ -53,3 +54,16 @@ export const getTodayVehicles = async () => apiRequest(`${BASE_URL}/today`);
 
 // 📜 Historial de vehículos
 export const getVehicleHistory = async () => apiRequest(`${BASE_URL}/history`);
+
+// 📈 Contadores del tablero (ocupación, entradas de hoy, historial)
+export const getVehicleStats = async () => apiRequest(`${BASE_URL}/stats`);
+
+// 📡 Eventos en vivo (SSE). EventSource se reconecta solo y reanuda con Last-Event-ID.
+// `handlers` mapea tipo de evento ("entry", "exit", "invoice", "reset") -> función(datos)
+export const subscribeToParkingEvents = (handlers) => {
+  const source = new EventSource(EVENTS_URL);
+  Object.entries(handlers).forEach(([type, handler]) => {
+    source.addEventListener(type, (event) => handler(JSON.parse(event.data)));
+  });
+  return () => source.close();
+};